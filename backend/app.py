@@ -3,6 +3,7 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from datetime import timedelta
 from dotenv import load_dotenv
+import hmac
 import os
 
 load_dotenv() # Load env vars from .env if present
@@ -13,10 +14,17 @@ os.environ['GROQ_API_KEY'] = os.getenv('GROQ_API_KEY', 'default_key_if_needed')
 # Import Services
 from database import Database, get_jwt_secret_key
 from recommendation_engine import RecommendationEngine
+from match_candidates import match_candidates
+from profile_writer import ProfileWriter
 from live_jobs_service import LiveJobsService
+from live_jobs_cache import default_cache
+from job_store import default_store
+from live_jobs_refresher import LiveJobsRefresher
+from market_stats import MarketStats
 from ats_service import ATSService
 from interview_service import InterviewService
 from quiz_service import QuizService
+from skill_vocabulary import get_skill_vocabulary
 
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = get_jwt_secret_key()
@@ -27,8 +35,36 @@ jwt = JWTManager(app)
 
 # Initialize Services
 db = Database()
+# Profiles sent to /api/recommend are saved in the background, in batches,
+# and only when they changed (see profile_writer.py; PROFILE_WRITE_BEHIND=0
+# saves them before responding)
+profile_writer = ProfileWriter(db,
+                               flush_interval=float(os.environ.get('PROFILE_FLUSH_INTERVAL', '1')),
+                               batch_size=int(os.environ.get('PROFILE_FLUSH_BATCH', '500')),
+                               write_behind=os.environ.get('PROFILE_WRITE_BEHIND', '1') != '0')
+skill_vocabulary = get_skill_vocabulary()
 recommendation_engine = RecommendationEngine()
-live_jobs_service = LiveJobsService()
+# Live job searches are cached for all workers (see live_jobs_cache.py), and
+# their postings deduplicated into the job store (see job_store.py)
+live_jobs_service = LiveJobsService(cache=default_cache(), store=default_store(),
+                                    store_max_age=float(os.environ.get('JOB_STORE_MAX_AGE', '21600')))
+# Popular live searches are refreshed before they expire (see live_jobs_refresher.py;
+# LIVE_JOBS_REFRESH_INTERVAL=0 turns this off, e.g. when it runs as a sidecar)
+live_jobs_refresher = None
+if live_jobs_service.cache and float(os.environ.get('LIVE_JOBS_REFRESH_INTERVAL', '300')) > 0:
+    live_jobs_refresher = LiveJobsRefresher(live_jobs_service,
+                                            top_k=int(os.environ.get('LIVE_JOBS_REFRESH_TOP_K', '20')),
+                                            interval=float(os.environ.get('LIVE_JOBS_REFRESH_INTERVAL', '300')),
+                                            concurrency=int(os.environ.get('LIVE_JOBS_REFRESH_CONCURRENCY', '2')))
+    live_jobs_refresher.start()
+# Dashboard market numbers, recomputed every MARKET_STATS_INTERVAL seconds
+# by one worker (0 only serves the persisted snapshot, computing one once if
+# there is none)
+market_stats = MarketStats(recommendation_engine, live_jobs_service,
+                           path=os.environ.get('MARKET_STATS_FILE'),
+                           interval=float(os.environ.get('MARKET_STATS_INTERVAL', '1800')))
+if market_stats.interval > 0:
+    market_stats.start()
 ats_service = ATSService()
 interview_service = InterviewService()
 quiz_service = QuizService()
@@ -43,13 +79,22 @@ def index():
         "endpoints": {
             "health": "/api/health",
             "auth": "/api/auth/*",
-            "recommend": "/api/recommend"
+            "recommend": "/api/recommend",
+            "recommend_batch": "/api/recommend/batch",
+            "search": "/api/internships/search",
+            "scoring_profiles": "/api/scoring-profiles",
+            "internships_admin": "/api/internships"
         }
     })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "Recommendation API is running"})
+    return jsonify({"status": "healthy", "message": "Recommendation API is running",
+                    "profile_writes": profile_writer.status(),
+                    "live_sources": live_jobs_service.status(),
+                    "live_cache": live_jobs_service.cache.status() if live_jobs_service.cache else None,
+                    "live_refresh": live_jobs_refresher.status() if live_jobs_refresher else None,
+                    "job_store": live_jobs_service.store.status() if live_jobs_service.store else None})
 
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -137,6 +182,7 @@ def get_current_user():
         user = db.get_user_by_id(user_id)
         if user:
             # Get profile, but don't fail if it doesn't exist
+            profile_writer.sync(user_id)
             profile = db.get_user_profile(user_id)
             user['profile'] = profile if profile else None
             return jsonify({"user": user})
@@ -168,12 +214,46 @@ def save_profile():
         'projects_json': data.get('projects_json'),
         'work_history_json': data.get('work_history_json')
     }
-    if db.save_user_profile(get_jwt_identity(), profile):
+    if profile_writer.save_now(get_jwt_identity(), profile):
         return jsonify({"message": "Saved", "profile": profile})
     return jsonify({"error": "Failed"}), 500
 
 # --- Core Recommendation (Existing) ---
 
+# Seconds /api/recommend waits for live jobs, counted from before the catalog
+# is scored; sources that have not answered by then are left out
+LIVE_JOBS_BUDGET = float(os.environ.get('LIVE_JOBS_BUDGET', '1.5'))
+
+def start_live_search(candidate_profile):
+    """Start the live job search for a profile (see LiveJobsService.start_search)"""
+    # Enhanced Search Query: Include top skills and first interest to capture "sector passions"
+    skills = skill_vocabulary.canonicalize_all(candidate_profile.get('skills', []))
+    interests = candidate_profile.get('interests', [])
+    
+    query_parts = []
+    if skills: query_parts.extend(skills[:2])
+    if interests: query_parts.extend(interests[:1])
+    
+    if not query_parts: query_parts = ["Intern"]
+    
+    # Construct query: "Skill1 Skill2 Interest1 Intern"
+    search_query = " ".join(str(p) for p in query_parts) + " Intern"
+    
+    location_query = candidate_profile.get('location', 'India')
+    
+    return live_jobs_service.start_search(search_query, location_query)
+
+def build_candidate_profile(data):
+    """Extract the fields used for matching from a request payload"""
+    return {
+        'education': data.get('education', ''),
+        'skills': data.get('skills', []),
+        'interests': data.get('interests', []),
+        'location': data.get('location', ''),
+        'previous_experience': data.get('previous_experience', False),
+        'bio': data.get('bio', '')
+    }
+
 @app.route('/api/recommend', methods=['POST'])
 def recommend_internships():
     try:
@@ -184,37 +264,35 @@ def recommend_internships():
             user_id = get_jwt_identity()
         except: pass
 
-        candidate_profile = {
-            'education': data.get('education', ''),
-            'skills': data.get('skills', []),
-            'interests': data.get('interests', []),
-            'location': data.get('location', ''),
-            'previous_experience': data.get('previous_experience', False)
-        }
+        candidate_profile = build_candidate_profile(data)
+        explain = data.get('explain', False)
+        if not isinstance(explain, bool):
+            return jsonify({"error": "explain must be true or false"}), 400
+        # Encoded once for both storage and matching
+        encoded = recommendation_engine.encoder.encode(candidate_profile)
         
-        if user_id: db.save_user_profile(user_id, candidate_profile)
+        if user_id: profile_writer.submit(user_id, candidate_profile, encoded=encoded)
+        
+        # Live sources are queried in the background while the catalog is scored
+        live_search = None
+        try:
+            live_search = start_live_search(candidate_profile)
+        except Exception as e:
+            print(f"Error fetching live jobs for recommendations: {e}")
         
         # 1. Get Static Recommendations
-        recommendations = recommendation_engine.recommend(candidate_profile, top_n=5)
+        try:
+            recommendations = recommendation_engine.recommend(dict(candidate_profile, encoded=encoded), top_n=5,
+                                                              filters=data.get('filters'),
+                                                              explain=explain,
+                                                              scoring_profile=data.get('scoring_profile'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # 2. Get Live Jobs (Real-time) based on skills/interests
+        # 2. Get Live Jobs (Real-time) based on skills/interests, whatever
+        # arrived within the budget
         try:
-            # Enhanced Search Query: Include top skills and first interest to capture "sector passions"
-            skills = candidate_profile.get('skills', [])
-            interests = candidate_profile.get('interests', [])
-            
-            query_parts = []
-            if skills: query_parts.extend(skills[:2])
-            if interests: query_parts.extend(interests[:1])
-            
-            if not query_parts: query_parts = ["Intern"]
-            
-            # Construct query: "Skill1 Skill2 Interest1 Intern"
-            search_query = " ".join(str(p) for p in query_parts) + " Intern"
-            
-            location_query = candidate_profile.get('location', 'India')
-            
-            live_jobs = live_jobs_service.search_jobs(search_query, location_query)
+            live_jobs = live_search.results(LIVE_JOBS_BUDGET) if live_search else []
             
             # Format live jobs to match recommendation structure & Add match score dummy
             formatted_live_jobs = []
@@ -244,10 +322,131 @@ def recommend_internships():
         return jsonify({"recommendations": recommendations, "profile": candidate_profile})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
+MAX_BATCH_PROFILES = 10000
+MAX_BATCH_TOP_N = 50
+
+@app.route('/api/recommend/batch', methods=['POST'])
+@jwt_required()
+def recommend_internships_batch():
+    """Static recommendations for a cohort of profiles (no profile saving, no live jobs)"""
+    try:
+        data = request.get_json()
+        profiles = data.get('profiles', [])
+        top_n = data.get('top_n', 5)
+        if isinstance(top_n, bool) or not isinstance(top_n, int):
+            return jsonify({"error": "top_n must be an integer"}), 400
+        top_n = min(max(top_n, 1), MAX_BATCH_TOP_N)
+        if not isinstance(profiles, list) or not profiles:
+            return jsonify({"error": "profiles must be a non-empty list"}), 400
+        if len(profiles) > MAX_BATCH_PROFILES:
+            return jsonify({"error": f"At most {MAX_BATCH_PROFILES} profiles per batch"}), 400
+
+        candidate_profiles = [build_candidate_profile(p) for p in profiles]
+        try:
+            recommendations = recommendation_engine.recommend_many(candidate_profiles, top_n=top_n,
+                                                                   filters=data.get('filters'),
+                                                                   scoring_profile=data.get('scoring_profile'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = []
+        for raw, profile, recs in zip(profiles, candidate_profiles, recommendations):
+            results.append({"id": raw.get('id'), "profile": profile, "recommendations": recs})
+        return jsonify({"results": results})
+    except Exception as e: return jsonify({"error": str(e)}), 500
+
+@app.route('/api/catalog/status', methods=['GET'])
+def get_catalog_status():
+    return jsonify(recommendation_engine.catalog_status())
+
+@app.route('/api/scoring-profiles', methods=['GET'])
+def get_scoring_profiles():
+    return jsonify(recommendation_engine.scoring_profiles.describe())
+
 @app.route('/api/sectors', methods=['GET'])
 def get_sectors():
     return jsonify({"sectors": recommendation_engine.get_available_sectors()})
 
+SEARCH_FILTERS = ('sector', 'location', 'remote', 'duration', 'education')
+
+@app.route('/api/internships/search', methods=['GET'])
+def search_internships():
+    """Filter internships by facets; repeat a parameter or separate values with commas"""
+    filters = {name: [value for item in request.args.getlist(name) for value in item.split(',')]
+               for name in SEARCH_FILTERS if name in request.args}
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+        offset = int(request.args.get('offset', 0))
+        return jsonify(recommendation_engine.search_internships(filters, limit=limit, offset=offset))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def admin_error():
+    """Error response unless the request carries the ADMIN_API_KEY in X-Admin-Key"""
+    admin_key = os.environ.get('ADMIN_API_KEY')
+    if not admin_key:
+        return jsonify({"error": "Catalog changes are disabled (ADMIN_API_KEY is not set)"}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Key', ''), admin_key):
+        return jsonify({"error": "Invalid admin key"}), 401
+    return None
+
+@app.route('/api/internships', methods=['POST'])
+def add_internship():
+    """Add a posting; it is served by every worker without a restart"""
+    error = admin_error()
+    if error: return error
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected an internship object"}), 400
+    try:
+        return jsonify({"internship": recommendation_engine.add_internship(data)}), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/internships/<internship_id>', methods=['PUT', 'PATCH'])
+def update_internship(internship_id):
+    error = admin_error()
+    if error: return error
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected an object of fields to change"}), 400
+    try:
+        return jsonify({"internship": recommendation_engine.update_internship(internship_id, data)})
+    except KeyError:
+        return jsonify({"error": f"Internship {internship_id} not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/internships/<internship_id>', methods=['DELETE'])
+@app.route('/api/internships/<internship_id>/expire', methods=['POST'])
+def expire_internship(internship_id):
+    error = admin_error()
+    if error: return error
+    try:
+        recommendation_engine.expire_internship(internship_id)
+    except KeyError:
+        return jsonify({"error": f"Internship {internship_id} not found"}), 404
+    return jsonify({"expired": internship_id})
+
+@app.route('/api/internships/<internship_id>/candidates', methods=['GET', 'POST'])
+def internship_candidates(internship_id):
+    """Best-matched registered students for a posting: stored by match_candidates.py, recomputed on POST"""
+    error = admin_error()
+    if error: return error
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            match_candidates(db, recommendation_engine, [internship_id], top_k=min(int(data.get('top_k', 50)), 500),
+                             scoring_profile=data.get('scoring_profile'))
+        except KeyError:
+            return jsonify({"error": f"Internship {internship_id} not found"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    matches = db.get_internship_matches(internship_id)
+    if matches is None:
+        return jsonify({"error": f"No candidates computed for internship {internship_id}"}), 404
+    return jsonify(matches)
+
 # --- NEW FEATURES ---
 
 # 1. Real-time Live Jobs
@@ -255,7 +454,8 @@ def get_sectors():
 def get_live_internships():
     query = request.args.get('query', 'Product Manager')
     location = request.args.get('location', 'India')
-    jobs = live_jobs_service.search_jobs(query, location)
+    # Served from the local job index unless it has fewer than LIVE_JOBS_LOCAL_MIN matches
+    jobs = live_jobs_service.find_jobs(query, location, min_local=int(os.environ.get('LIVE_JOBS_LOCAL_MIN', '5')))
     return jsonify({"jobs": jobs})
 
 # 2. ATS Resume Analyzer
@@ -392,18 +592,21 @@ def get_dashboard_stats():
         
         conn.close()
         
-        # Get Live Market Stats (Quick Search Count)
-        try:
-            # Quick estimate of live jobs
-            live_opps = len(live_jobs_service.search_jobs("Product Manager", "India", limit=50))
-        except:
-            live_opps = 120 # Fallback estimate if fetch fails
+        # Live Market Stats, precomputed in the background (see market_stats.py);
+        # a pending placeholder until the first snapshot is ready
+        market = market_stats.snapshot() or market_stats.pending()
 
         return jsonify({
             "applications": {"total": total_apps, "breakdown": app_stats},
             "learning": {"avg_quiz_score": avg_quiz},
             "recent_activity": activity,
-            "market": {"live_opportunities": live_opps}
+            "market": {
+                "live_opportunities": market.get('live_opportunities'),
+                "by_sector": market.get('by_sector', {}),
+                "by_location": market.get('by_location', {}),
+                "snapshot_at": market.get('snapshot_at'),
+                "pending": market.get('pending', False)
+            }
         })
     except Exception as e:
         print(f"Dashboard stats error: {e}")
@@ -4,9 +4,11 @@ from pypdf import PdfReader
 from collections import Counter
 import json
 
+from skill_vocabulary import get_skill_vocabulary
+
 class ATSService:
     def __init__(self):
-        pass
+        self.vocabulary = get_skill_vocabulary()
 
     def extract_text_from_pdf(self, file_path):
         """Extract text from a PDF file."""
@@ -28,22 +30,35 @@ class ATSService:
         resume_text = resume_text.lower()
         job_description = job_description.lower()
         
-        # 1. Extract Keywords from Job Description (Simple Frequency Analysis)
+        # 1. Extract Keywords from Job Description
+        # Skills from the shared vocabulary come first, compared by id so that
+        # aliases match ("ML" in the job description, "machine learning" in
+        # the resume); frequent words fill the remaining keyword slots
+        job_skills, other_words = self.vocabulary.split_text(job_description)
+        job_skills = job_skills[:20]
+        resume_skill_ids = set(self.vocabulary.encode(self.vocabulary.find_in_text(resume_text)))
+
         # remove common stop words
         stop_words = set(['and', 'the', 'to', 'of', 'in', 'for', 'with', 'a', 'an', 'is', 'are', 'on', 'at', 'be', 'will', 'that', 'this', 'by', 'as'])
-        words = re.findall(r'\b[a-z]{2,}\b', job_description)
+        words = re.findall(r'\b[a-z]{2,}\b', ' '.join(other_words))
         filtered_words = [w for w in words if w not in stop_words]
         
         # Get most common significant words (potential keywords)
-        # In a real system, we'd use a predefined skills database
-        common_keywords = [word for word, count in Counter(filtered_words).most_common(20)]
+        common_words = [word for word, count in Counter(filtered_words).most_common(20 - len(job_skills))]
+        common_keywords = job_skills + common_words
         
         # 2. Check for Keywords in Resume
         found_keywords = []
         missing_keywords = []
         
         match_count = 0
-        for keyword in common_keywords:
+        for skill in job_skills:
+            if self.vocabulary.intern(skill) in resume_skill_ids:
+                found_keywords.append(skill)
+                match_count += 1
+            else:
+                missing_keywords.append(skill)
+        for keyword in common_words:
             if keyword in resume_text:
                 found_keywords.append(keyword)
                 match_count += 1
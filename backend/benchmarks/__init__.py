@@ -0,0 +1,7 @@
+"""
+Benchmarks for the recommendation engine.
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_topk``.
+``python -m benchmarks.suite --check`` runs the full suite against the
+recorded baseline.
+"""
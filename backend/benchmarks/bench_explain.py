@@ -0,0 +1,43 @@
+"""
+Measure the latency added by recommend(..., explain=True).
+
+The breakdown is gathered from the features already computed for ranking,
+for the returned postings only, so it should cost a small fraction of a
+request. Calls alternate between plain and explained recommendations so
+both see the same machine state; the script exits with status 1 when the
+median overhead exceeds --max-overhead. The suite's explain scenario runs
+the same measurement against baseline.json:
+
+    python -m benchmarks.bench_explain --size 100000 --queries 200
+"""
+import argparse
+import statistics
+import sys
+
+from benchmarks.bench_topk import build_engine
+from benchmarks.suite import benchmark_profiles, explain_timings, explain_overhead
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='number of synthetic internships')
+    parser.add_argument('--queries', type=int, default=200, help='number of candidate profiles')
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--rounds', type=int, default=3, help='passes over the profiles')
+    parser.add_argument('--max-overhead', type=float, default=0.05)
+    args = parser.parse_args()
+
+    engine = build_engine(args.size)
+    plain, explained = explain_timings(engine, benchmark_profiles(args.queries), args.top_n, args.rounds)
+
+    print(f"Catalog: {args.size} internships, {args.queries} profiles x {args.rounds}, top_n={args.top_n}")
+    for name, timings in (('plain', plain), ('explain', explained)):
+        print(f"  {name:<8} mean {statistics.mean(timings):8.3f} ms   p50 {statistics.median(timings):8.3f} ms")
+    overhead = explain_overhead(plain, explained)
+    print(f"  median overhead {overhead:+.1%} (limit {args.max_overhead:.0%})")
+    if overhead > args.max_overhead:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare approximate (LSH) and exact free-text search in SemanticIndex:
+recall of the exact top-k among the approximate top-k, latency, and the
+fraction of the catalog the LSH candidates cover.
+
+    python -m benchmarks.bench_semantic --size 100000 --queries 100 --k 10 50
+"""
+import argparse
+import statistics
+import time
+
+from semantic_index import SemanticIndex
+from benchmarks.synthetic import generate_internships, generate_bios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='number of synthetic internships')
+    parser.add_argument('--queries', type=int, default=100, help='number of candidate bios')
+    parser.add_argument('--k', type=int, nargs='+', default=[10, 50, 200])
+    args = parser.parse_args()
+
+    documents = [f"{i['title']} {i['description']}" for i in generate_internships(args.size)]
+    started = time.perf_counter()
+    index = SemanticIndex(documents)
+    print(f"Index: {args.size} documents, {len(index.terms)} terms, {index.n_tables} tables x {index.n_bits} bits, "
+          f"built in {time.perf_counter() - started:.2f}s")
+    if args.size <= index.EXACT_MAX_DOCS:
+        print(f"  (catalogs of at most {index.EXACT_MAX_DOCS} documents are always searched exactly)")
+
+    bios = generate_bios(args.queries)
+    coverage = []
+    for bio in bios:
+        terms, weights = index.vectorize(bio)
+        if len(terms):
+            coverage.append(len(index._candidates(terms, weights)) / args.size)
+    print(f"  LSH candidates: {statistics.mean(coverage) * 100:.1f}% of the catalog on average")
+
+    for k in args.k:
+        recalls, approximate_ms, exact_ms = [], [], []
+        for bio in bios:
+            start = time.perf_counter()
+            approximate, _ = index.query(bio, k)
+            approximate_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            exact, _ = index.query(bio, k, exact=True)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+            if len(exact):
+                recalls.append(len(set(approximate.tolist()) & set(exact.tolist())) / len(exact))
+        print(f"  k={k:<4} recall {statistics.mean(recalls):.3f}   "
+              f"approximate p50 {statistics.median(approximate_ms):7.2f} ms   "
+              f"exact p50 {statistics.median(exact_ms):7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Measure recommend() latency with the catalog scored in parallel shards.
+
+Pruning is disabled by default so every call scores the whole catalog,
+which is the case sharding is meant for:
+
+    python -m benchmarks.bench_shards --size 1000000 --shards 1 4 16
+"""
+import argparse
+import statistics
+
+from benchmarks.bench_topk import build_engine, time_calls
+from benchmarks.synthetic import generate_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000000, help='number of synthetic internships')
+    parser.add_argument('--queries', type=int, default=30, help='number of candidate profiles')
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--pruning', action='store_true', help='keep inverted-index pruning enabled')
+    args = parser.parse_args()
+
+    engine = build_engine(args.size)
+    engine.shard_min_rows = 0
+    if not args.pruning:
+        engine.CANDIDATE_PRUNING_MAX_FRACTION = -1
+    profiles = generate_profiles(args.queries)
+
+    engine.scoring_shards = 1
+    expected = [engine.recommend(profile, args.top_n) for profile in profiles]
+
+    print(f"Catalog: {args.size} internships, {args.queries} profiles, top_n={args.top_n}")
+    for shards in args.shards:
+        if engine._shard_pool is not None:
+            engine._shard_pool.shutdown()
+        engine.scoring_shards = shards
+        engine._shard_pool = None
+        assert [engine.recommend(profile, args.top_n) for profile in profiles] == expected
+        timings = time_calls(lambda e, p, n: e.recommend(p, n), engine, profiles, args.top_n)
+        print(f"  {shards:>2} shard(s)   mean {statistics.mean(timings):8.2f} ms   p50 {statistics.median(timings):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare top-N selection in RecommendationEngine.recommend() against the
+previous approach of copying every scored posting and sorting the full list.
+
+    python -m benchmarks.bench_topk --size 100000 --queries 50
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from recommendation_engine import RecommendationEngine
+from benchmarks.synthetic import generate_internships, generate_profiles
+
+
+def legacy_recommend(engine, profile, top_n):
+    """Exhaustive scoring followed by a copy and full sort of every posting"""
+    catalog = engine.catalog
+    features = engine._candidate_features(profile, catalog)
+    scores = engine._score_catalog(features, catalog)
+    scored_internships = []
+    for internship, score in zip(catalog.internships, scores.tolist()):
+        scored_internship = internship.copy()
+        scored_internship['match_score'] = round(score * 100, 1)
+        scored_internships.append(scored_internship)
+    scored_internships.sort(key=lambda x: x['match_score'], reverse=True)
+    return scored_internships[:top_n]
+
+
+def topk_recommend(engine, profile, top_n):
+    """Exhaustive scoring followed by the partition-based top-N selection"""
+    catalog = engine.catalog
+    features = engine._candidate_features(profile, catalog)
+    scores = engine._score_catalog(features, catalog)
+    return [dict(catalog.internships[row], match_score=match_score)
+            for row, match_score in engine._top_rows(scores, np.arange(catalog.size), top_n)]
+
+
+def build_engine(size, seed=42):
+    """Engine loaded from a temporary synthetic internships.json, without result caching"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'internships.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(generate_internships(size, seed), f)
+        engine = RecommendationEngine(path)
+    engine.cache.max_entries = 0
+    return engine
+
+
+def time_calls(fn, engine, profiles, top_n):
+    timings = []
+    for profile in profiles:
+        start = time.perf_counter()
+        fn(engine, profile, top_n)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='number of synthetic internships')
+    parser.add_argument('--queries', type=int, default=50, help='number of candidate profiles')
+    parser.add_argument('--top-n', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = build_engine(args.size)
+    profiles = generate_profiles(args.queries)
+
+    for profile in profiles:
+        assert legacy_recommend(engine, profile, args.top_n) == engine.recommend(profile, args.top_n)
+
+    print(f"Catalog: {args.size} internships, {args.queries} profiles, top_n={args.top_n}")
+    for name, fn in (('copy + full sort', legacy_recommend),
+                     ('partition top-N', topk_recommend),
+                     ('recommend()', lambda e, p, n: e.recommend(p, n))):
+        timings = time_calls(fn, engine, profiles, args.top_n)
+        print(f"  {name:<18} mean {statistics.mean(timings):8.2f} ms   p50 {statistics.median(timings):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Benchmark suite for RecommendationEngine on seeded synthetic catalogs.
+
+Scenarios, each run in its own process so peak RSS is attributable:
+
+    single       recommend() latency and throughput, result cache disabled
+    batch        recommend_many() in batches of --batch-size profiles
+    load         engine start-up from internships.json (parse + index build)
+    load_mapped  engine start-up from the compiled catalog artifact
+    reload       synchronous reload() after internships.json changes
+    explain      recommend(..., explain=True) latency and its median overhead
+                 over the same call without explain
+
+Usage (from the backend directory):
+
+    python -m benchmarks.suite --scales 1k 10k 100k 1m
+    python -m benchmarks.suite --check             # compare with baseline.json
+    python -m benchmarks.suite --update-baseline   # record a new baseline
+
+With --check the exit code is 1 when any metric is worse than the baseline
+by more than --tolerance (latencies, load times and RSS higher, throughput
+lower), or when a metric in LIMITS exceeds its fixed bound whatever the
+baseline, so the command can gate CI. Timings depend on the machine: record
+the baseline on the machine that runs the check.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.synthetic import generate_internships, generate_profiles, generate_bios
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+SCENARIOS = ('single', 'batch', 'load', 'load_mapped', 'reload', 'explain')
+# Metrics checked against a fixed bound rather than the baseline
+LIMITS = {'overhead_pct': 5.0}
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def benchmark_profiles(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Synthetic profiles; every fourth one has a bio so the semantic factor is exercised"""
+    profiles = generate_profiles(count, seed)
+    for i, bio in enumerate(generate_bios(count, seed)):
+        if i % 4 == 0:
+            profiles[i]['bio'] = bio
+    return profiles
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _latency_metrics(timings_ms: List[float], items: int) -> Dict[str, float]:
+    return {
+        'p50_ms': float(np.percentile(timings_ms, 50)),
+        'p99_ms': float(np.percentile(timings_ms, 99)),
+        'throughput_per_s': items / (sum(timings_ms) / 1000),
+    }
+
+
+def _engine(path: str, use_artifact: bool = True):
+    from recommendation_engine import RecommendationEngine
+    engine = RecommendationEngine(path, use_artifact=use_artifact)
+    engine.reload_check_interval = 0
+    engine.cache.max_entries = 0
+    return engine
+
+
+def run_single(path: str, args) -> Dict[str, float]:
+    engine = _engine(path)
+    profiles = benchmark_profiles(args.queries)
+    for profile in profiles[:5]:
+        engine.recommend(profile, args.top_n)
+    timings = []
+    for profile in profiles:
+        start = time.perf_counter()
+        engine.recommend(profile, args.top_n)
+        timings.append((time.perf_counter() - start) * 1000)
+    return _latency_metrics(timings, len(profiles))
+
+
+def run_batch(path: str, args) -> Dict[str, float]:
+    engine = _engine(path)
+    profiles = benchmark_profiles(args.batch_size * args.batches, seed=8)
+    timings = []
+    for start_at in range(0, len(profiles), args.batch_size):
+        start = time.perf_counter()
+        engine.recommend_many(profiles[start_at:start_at + args.batch_size], args.top_n)
+        timings.append((time.perf_counter() - start) * 1000)
+    return _latency_metrics(timings, len(profiles))
+
+
+def _load_times(path: str, repeats: int, use_artifact: bool) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine = _engine(path, use_artifact)
+        timings.append(time.perf_counter() - start)
+        del engine
+    return timings
+
+
+def run_load(path: str, args) -> Dict[str, float]:
+    return {'load_s': statistics.median(_load_times(path, args.repeats, use_artifact=False))}
+
+
+def run_load_mapped(path: str, args) -> Dict[str, float]:
+    timings = _load_times(path, args.repeats, use_artifact=True)
+    return {'load_ms': statistics.median(timings) * 1000}
+
+
+def run_reload(path: str, args) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        local = os.path.join(tmp, 'internships.json')
+        shutil.copyfile(path, local)
+        with open(local, 'rb') as f:
+            content = f.read()
+        engine = _engine(local, use_artifact=False)
+        timings = []
+        for repeat in range(args.repeats):
+            # Same postings, different bytes: a full rebuild under a new version
+            with open(local, 'wb') as f:
+                f.write(content + b'\n' * (repeat + 1))
+            start = time.perf_counter()
+            assert engine.reload()
+            timings.append(time.perf_counter() - start)
+    return {'reload_s': statistics.median(timings)}
+
+
+def explain_timings(engine, profiles: List[Dict[str, Any]], top_n: int,
+                    rounds: int) -> Tuple[List[float], List[float]]:
+    """
+    Milliseconds of plain and explained recommend() calls. They alternate,
+    so each explained call sees the machine state of the plain call for the
+    same profile just before it.
+    """
+    for profile in profiles[:5]:
+        engine.recommend(profile, top_n, explain=True)
+    plain, explained = [], []
+    for _ in range(rounds):
+        for profile in profiles:
+            for explain, timings in ((False, plain), (True, explained)):
+                start = time.perf_counter()
+                engine.recommend(profile, top_n, explain=explain)
+                timings.append((time.perf_counter() - start) * 1000)
+    return plain, explained
+
+
+def explain_overhead(plain: List[float], explained: List[float]) -> float:
+    """Median relative cost of each explained call over its plain one"""
+    return statistics.median(e / p for e, p in zip(explained, plain)) - 1
+
+
+def run_explain(path: str, args) -> Dict[str, float]:
+    engine = _engine(path)
+    plain, explained = explain_timings(engine, benchmark_profiles(args.queries), args.top_n, args.repeats)
+    metrics = _latency_metrics(explained, len(explained))
+    metrics['overhead_pct'] = explain_overhead(plain, explained) * 100
+    return metrics
+
+
+RUNNERS = {'single': run_single, 'batch': run_batch, 'load': run_load,
+           'load_mapped': run_load_mapped, 'reload': run_reload, 'explain': run_explain}
+
+
+def prepare_catalog(scale: str, directory: str) -> str:
+    """Write the synthetic catalog for a scale and compile its artifact"""
+    from catalog_store import build
+    path = os.path.join(directory, f'internships_{scale}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(generate_internships(SCALES[scale]), f)
+    build(path, os.path.splitext(path)[0] + '.catalog')
+    return path
+
+
+def run_scenario(scale: str, scenario: str, path: str, args) -> Dict[str, float]:
+    """Run one scenario in a fresh interpreter and return its metrics"""
+    command = [sys.executable, '-m', 'benchmarks.suite', '--run-one', scenario, path,
+               '--queries', str(args.queries), '--top-n', str(args.top_n),
+               '--batch-size', str(args.batch_size), '--batches', str(args.batches),
+               '--repeats', str(args.repeats if SCALES[scale] < 1_000_000 else 1)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def is_regression(metric: str, value: float, baseline: float, tolerance: float) -> bool:
+    if metric.endswith('_per_s'):
+        return value < baseline / (1 + tolerance)
+    return value > baseline * (1 + tolerance)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Descriptions of the metrics that regressed against the baseline"""
+    regressions = []
+    for scale, scenarios in results.items():
+        for scenario, metrics in scenarios.items():
+            expected = baseline.get(scale, {}).get(scenario, {})
+            for metric, value in metrics.items():
+                if metric in LIMITS and value > LIMITS[metric]:
+                    regressions.append(f"{scale} {scenario} {metric}: {value:.4g} (limit {LIMITS[metric]:.4g})")
+                elif metric in expected and is_regression(metric, value, expected[metric], tolerance):
+                    regressions.append(f"{scale} {scenario} {metric}: {value:.4g} (baseline {expected[metric]:.4g})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['1k', '10k'])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--queries', type=int, default=200, help='profiles in the single scenario')
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--batches', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='loads, reloads and explain passes over the profiles (1 at 1m)')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--check', action='store_true', help='exit 1 on regressions against the baseline')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative slowdown')
+    parser.add_argument('--run-one', nargs=2, metavar=('SCENARIO', 'CATALOG'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        scenario, path = args.run_one
+        metrics = RUNNERS[scenario](path, args)
+        metrics['peak_rss_mb'] = _peak_rss_mb()
+        print(json.dumps(metrics))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = prepare_catalog(scale, tmp)
+            results[scale] = {}
+            for scenario in args.scenarios:
+                metrics = run_scenario(scale, scenario, path, args)
+                results[scale][scenario] = metrics
+                print(f"{scale:>5} {scenario:<12} " + "   ".join(f"{k} {v:.4g}" for k, v in metrics.items()))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        for scale, scenarios in results.items():
+            baseline.setdefault(scale, {}).update(scenarios)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Updated {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
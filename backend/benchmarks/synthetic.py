@@ -0,0 +1,112 @@
+import random
+from typing import List, Dict, Any
+
+# Vocabulary modelled on data/internships.json, widened so that large
+# catalogs have a realistic spread of distinct values
+SECTORS = [
+    "Technology and Digital", "Healthcare and Public Health", "Rural Development and Agriculture",
+    "Education and Skill Development", "Finance and Banking", "Environment and Climate",
+    "Infrastructure and Urban Planning", "Energy and Power", "Tourism and Culture",
+    "Manufacturing", "Media and Communication", "Legal and Governance", "Transport and Logistics",
+    "Retail and E-commerce", "Telecommunications", "Textiles", "Pharmaceuticals", "Automobile",
+    "Food Processing", "Defence and Aerospace", "Mining", "Social Welfare", "Sports and Youth Affairs",
+    "Water Resources", "Housing",
+]
+
+LOCATIONS = [
+    "New Delhi", "Mumbai", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Pune", "Ahmedabad",
+    "Jaipur", "Lucknow", "Bhopal", "Chandigarh", "Patna", "Bhubaneswar", "Guwahati", "Thiruvananthapuram",
+    "Kochi", "Coimbatore", "Indore", "Nagpur", "Surat", "Vadodara", "Visakhapatnam", "Ranchi",
+    "Raipur", "Dehradun", "Shimla", "Srinagar", "Noida", "Gurugram", "Navi Mumbai", "Mysuru",
+]
+
+SKILLS = [
+    "python", "sql", "excel", "data analysis", "machine learning", "research", "report writing",
+    "communication", "social media", "content writing", "creative thinking", "public speaking",
+    "project management", "graphic design", "java", "javascript", "web development", "accounting",
+    "financial analysis", "marketing", "field work", "survey design", "statistics", "gis",
+    "environmental science", "policy analysis", "teamwork", "leadership", "customer service",
+    "negotiation", "supply chain", "autocad", "quality control", "hindi", "english", "photography",
+    "video editing", "legal research", "drafting", "community outreach", "teaching", "counselling",
+    "networking", "cloud computing", "cyber security", "mechanical design", "electrical systems",
+    "agronomy", "nutrition", "event management",
+]
+
+EDUCATION_LEVELS = ["undergraduate", "graduate", "postgraduate", "diploma", "any"]
+
+DURATIONS = ["2 months", "3 months", "4 months", "6 months", "12 months"]
+
+ROLES = ["Intern", "Research Assistant", "Analyst Intern", "Associate Intern", "Coordinator", "Trainee"]
+
+TASKS = [
+    "analyse survey responses from district offices", "prepare weekly dashboards for senior officials",
+    "draft briefing notes on new policy proposals", "coordinate outreach camps in rural blocks",
+    "digitise land and revenue records", "monitor progress of flagship welfare schemes",
+    "build data pipelines for citizen service portals", "design awareness campaigns on social platforms",
+    "evaluate vendor bids and procurement documents", "map groundwater levels using satellite imagery",
+    "audit hospital supply inventories", "support teachers with digital classroom content",
+    "study crop yield patterns across seasons", "test mobile applications for accessibility",
+    "translate public information material into regional languages", "review contracts and compliance filings",
+    "organise skill development workshops for youth", "track carbon emissions of public buildings",
+    "model traffic flows for smart city corridors", "interview beneficiaries and document case studies",
+    "maintain geographic databases of public assets", "write press releases and newsletter stories",
+    "optimise delivery routes for rural supply chains", "analyse loan repayment data for microfinance groups",
+    "assist engineers with site inspections", "produce short videos on government initiatives",
+    "research best practices from other states", "clean and validate health survey datasets",
+    "prototype chatbots for grievance redressal", "estimate energy savings from solar installations",
+    "plan cultural festivals and heritage walks", "benchmark export performance of small industries",
+]
+
+ORGANIZATIONS = [
+    "Ministry of Electronics and IT", "Ministry of Rural Development", "Ministry of Health and Family Welfare",
+    "Ministry of Education", "Ministry of Finance", "NITI Aayog", "Reserve Bank of India", "Indian Railways",
+    "State Bank of India", "ONGC", "NTPC", "BHEL", "ISRO", "DRDO", "Tata Group", "Reliance Industries",
+    "Infosys", "Wipro", "Mahindra Group", "Larsen and Toubro",
+]
+
+
+def generate_internships(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Generate a reproducible catalog shaped like data/internships.json"""
+    rng = random.Random(seed)
+    internships = []
+    for i in range(count):
+        sector = rng.choice(SECTORS)
+        skills = rng.sample(SKILLS, rng.randint(1, 5))
+        internships.append({
+            "id": i + 1,
+            "title": f"{sector.split(' and ')[0]} {rng.choice(ROLES)}",
+            "organization": rng.choice(ORGANIZATIONS),
+            "sector": sector,
+            "location": rng.choice(LOCATIONS),
+            "remote_available": rng.random() < 0.2,
+            "duration": rng.choice(DURATIONS),
+            "stipend": f"₹{rng.randrange(5000, 25001, 1000):,}/month",
+            "description": (f"Work with the {sector.lower()} team to "
+                            f"{' and '.join(rng.sample(TASKS, 2))}, applying {skills[0]} and {skills[-1]}."),
+            "required_education": rng.choice(EDUCATION_LEVELS),
+            "required_skills": skills,
+            "experience_required": rng.random() < 0.25,
+            "benefits": rng.sample(["Certificate", "Networking opportunities", "Skill development",
+                                    "Mentorship", "Field experience", "Letter of recommendation"], 3),
+        })
+    return internships
+
+
+def generate_profiles(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Generate reproducible candidate profiles as sent to /api/recommend"""
+    rng = random.Random(seed)
+    return [{
+        "education": rng.choice(EDUCATION_LEVELS[:4]),
+        "skills": rng.sample(SKILLS, rng.randint(1, 6)),
+        "interests": rng.sample(SECTORS, rng.randint(0, 2)),
+        "location": rng.choice(LOCATIONS),
+        "previous_experience": rng.random() < 0.3,
+    } for _ in range(count)]
+
+
+def generate_bios(count: int, seed: int = 11) -> List[str]:
+    """Generate reproducible free-text candidate bios"""
+    rng = random.Random(seed)
+    return [(f"Student interested in {rng.choice(SECTORS).lower()}. I have experience in "
+             f"{', '.join(rng.sample(SKILLS, 2))} and would like to {rng.choice(TASKS)}.")
+            for _ in range(count)]
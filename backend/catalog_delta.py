@@ -0,0 +1,296 @@
+"""
+Incremental catalog changes: an append-only journal shared by all workers
+and the in-memory delta it replays onto a base CatalogIndex.
+
+The journal lives next to internships.json (internships.journal) and holds
+one JSON object per line:
+
+    {"op": "upsert", "internship": {...}}     add or replace a posting by id
+    {"op": "expire", "id": ...}               remove a posting
+
+Entries are idempotent, so replaying a journal over a base that already
+contains some of them gives the same catalog. Upserted postings are checked
+with validate_internship(), both before they are written and when they are
+replayed. Compaction folds the journal
+into internships.json (and the compiled artifact) and keeps only entries
+written after it started.
+"""
+import contextlib
+import copy
+import json
+import os
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
+from catalog_index import CatalogIndex
+from skill_vocabulary import SkillVocabulary
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single worker
+    fcntl = None
+
+
+# Fields the catalog index reads, with the types internships.json holds;
+# None counts as absent
+TEXT_FIELDS = ('title', 'description', 'sector', 'location', 'required_education')
+BOOL_FIELDS = ('remote_available', 'experience_required')
+
+
+def validate_internship(internship: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The posting with its text fields and skills stripped of whitespace.
+    Raises ValueError if a field the catalog index reads has the wrong type.
+    """
+    if not isinstance(internship, dict):
+        raise ValueError("An internship must be an object")
+    internship = dict(internship)
+    internship_id = internship.get('id')
+    if isinstance(internship_id, bool) or not isinstance(internship_id, (int, str)) or internship_id == '':
+        raise ValueError(f"Internship id must be an integer or a string, not {internship_id!r}")
+    for field in TEXT_FIELDS:
+        value = internship.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"'{field}' must be a string")
+        if value is not None:
+            internship[field] = value.strip()
+    for field in BOOL_FIELDS:
+        value = internship.get(field)
+        if value is not None and not isinstance(value, bool):
+            raise ValueError(f"'{field}' must be true or false")
+    skills = internship.get('required_skills', [])
+    if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+        raise ValueError("'required_skills' must be a list of strings")
+    internship['required_skills'] = [skill.strip() for skill in skills if skill.strip()]
+    return internship
+
+
+def _lock(f, flags: int) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), flags)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class CatalogJournal:
+    """Reader and writer of the catalog journal; remembers how far it has read"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.identity: Optional[Tuple[int, int]] = None
+        self._writer = None
+
+    def _stat(self) -> Optional[os.stat_result]:
+        try:
+            return os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+    def replaced(self) -> bool:
+        """Whether the file was replaced or removed since it was first read"""
+        stat = self._stat()
+        identity = None if stat is None else (stat.st_dev, stat.st_ino)
+        return self.identity is not None and identity != self.identity
+
+    def pending(self) -> bool:
+        """Whether entries were appended (or the file replaced) since the last read"""
+        stat = self._stat()
+        if stat is None:
+            return self.identity is not None
+        return (stat.st_dev, stat.st_ino) != self.identity or stat.st_size > self.offset
+
+    def reset(self):
+        """Read from the start of the current file on the next read_new()"""
+        self.offset = 0
+        self.identity = None
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        """Complete entries appended since the last read"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_dev, stat.st_ino) != self.identity:
+                self.identity, self.offset = (stat.st_dev, stat.st_ino), 0
+            f.seek(self.offset)
+            data = f.read()
+        # A writer may be halfway through its line
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        entries = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                print(f"Warning: skipping malformed entry in {self.path}: {line[:80]!r}")
+        return entries
+
+    def _open_current(self, mode: str):
+        """Open the journal locked exclusively, following replacements by compaction"""
+        while True:
+            f = open(self.path, mode)
+            _lock(f, fcntl.LOCK_EX if fcntl else 0)
+            current, opened = self._stat(), os.fstat(f.fileno())
+            if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                return f
+            f.close()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Hold the write lock: no other process appends until the block exits,
+        so entries read inside it are all there are. append() inside the
+        block writes through the locked file.
+        """
+        with self._open_current('ab') as f:
+            self._writer = f
+            try:
+                yield
+            finally:
+                self._writer = None
+
+    def append(self, entry: Dict[str, Any]):
+        """Append one entry with a single write"""
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with contextlib.nullcontext(self._writer) if self._writer else self._open_current('ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def truncate_to(self, offset: int, identity: Tuple[int, int]):
+        """
+        Drop the entries before offset (already folded into the catalog file)
+        by atomically replacing the journal with the rest of it. Nothing is
+        dropped if the journal was replaced since `identity` was read.
+        """
+        if not os.path.exists(self.path):
+            return
+        with self._open_current('rb') as f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_dev, stat.st_ino) != identity:
+                return
+            f.seek(offset)
+            rest = f.read()
+            temporary = f'{self.path}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as out:
+                out.write(rest)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(temporary, self.path)
+
+    @contextlib.contextmanager
+    def compaction_lock(self):
+        """Non-blocking lock held by the one process compacting; yields whether it was acquired"""
+        with open(self.path + '.lock', 'ab') as f:
+            acquired = _lock(f, fcntl.LOCK_EX | fcntl.LOCK_NB if fcntl else 0)
+            yield acquired
+
+
+class CatalogDelta:
+    """
+    Postings changed since a base CatalogIndex was built: added or updated
+    records by id, in the order of their last change, and the base rows
+    they replace or expire (tombstones). Ids are compared as strings.
+    """
+
+    def __init__(self, base: CatalogIndex):
+        self.base = base
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.dead: Set[int] = set()
+        self.applied = 0
+        self._base_rows: Optional[Dict[str, int]] = None
+        self._max_id: Optional[int] = None
+
+    @property
+    def changes(self) -> int:
+        """Pending postings and tombstones; compaction resets this to 0"""
+        return len(self.records) + len(self.dead)
+
+    def base_rows(self) -> Dict[str, int]:
+        """Base row of every id, decoded once per base"""
+        if self._base_rows is None:
+            self._base_rows = {str(internship_id): row
+                               for row, internship_id in enumerate(self.base.column('id'))
+                               if internship_id is not None}
+        return self._base_rows
+
+    def get(self, internship_id: Any) -> Optional[Dict[str, Any]]:
+        """Current record of an id, or None if it does not exist or expired"""
+        key = str(internship_id)
+        if key in self.records:
+            return self.records[key]
+        row = self.base_rows().get(key)
+        if row is None or row in self.dead:
+            return None
+        return self.base.internships[row]
+
+    def next_id(self) -> int:
+        """One more than the largest integer id ever seen"""
+        if self._max_id is None:
+            ids = [int(key) for key in self.base_rows() if key.lstrip('-').isdigit()]
+            self._max_id = max(ids, default=0)
+        return self._max_id + 1
+
+    def apply(self, entry: Dict[str, Any]):
+        if entry['op'] == 'upsert':
+            internship = validate_internship(entry['internship'])
+            key = str(internship['id'])
+            if key.lstrip('-').isdigit():
+                self._max_id = max(self.next_id() - 1, int(key))
+        elif entry['op'] == 'expire':
+            internship, key = None, str(entry['id'])
+        else:
+            raise ValueError(f"Unknown journal operation '{entry['op']}'")
+
+        # Updated postings move to the end of the delta, like an appended row
+        self.records.pop(key, None)
+        row = self.base_rows().get(key)
+        if row is not None:
+            self.dead.add(row)
+        if internship is not None:
+            self.records[key] = internship
+        self.applied += 1
+
+    def freeze(self) -> 'CatalogDelta':
+        """A copy that later changes do not affect, for compaction"""
+        frozen = copy.copy(self)
+        frozen.records = dict(self.records)
+        frozen.dead = set(self.dead)
+        return frozen
+
+    def snapshot(self, vocabulary: SkillVocabulary) -> CatalogIndex:
+        """
+        The base with the changes applied. Only the changed postings are
+        indexed; base arrays are shared, and tombstones become an alive flag
+        per base row.
+        """
+        if not self.records and not self.dead:
+            return self.base
+        catalog = copy.copy(self.base)
+        catalog.delta = None
+        if self.records:
+            catalog.delta = CatalogIndex(list(self.records.values()), vocabulary,
+                                         semantic_base=self.base.semantic)
+        if self.dead:
+            alive = np.ones(self.base.size, dtype=bool)
+            alive[np.fromiter(self.dead, dtype=np.int64, count=len(self.dead))] = False
+            catalog.alive = alive
+            catalog.alive_bits = np.packbits(alive)
+            catalog.expired = len(self.dead)
+        catalog.version = f'{self.base.version}+{self.applied}'
+        return catalog
+
+    def live_records(self) -> List[Dict[str, Any]]:
+        """Every current posting, base rows first, as compaction writes them"""
+        records = [self.base.internships[row] for row in range(self.base.size) if row not in self.dead]
+        records.extend(self.records.values())
+        return records
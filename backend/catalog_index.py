@@ -0,0 +1,254 @@
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from facet_index import FacetIndex
+from location_gazetteer import get_gazetteer
+from semantic_index import SemanticIndex
+from skill_vocabulary import SkillVocabulary, get_skill_vocabulary
+
+
+def _postings(codes: np.ndarray, rows: np.ndarray, n_values: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group rows by code: rows for code c are postings[offsets[c]:offsets[c + 1]]"""
+    order = np.argsort(codes, kind='stable')
+    offsets = np.zeros(n_values + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n_values), out=offsets[1:])
+    return offsets, rows[order]
+
+
+def _encode(values: List[Any]) -> Tuple[List[Any], np.ndarray]:
+    """Encode a column as (unique values, integer code per row)"""
+    lookup = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for row, value in enumerate(values):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(lookup)
+        codes[row] = code
+    return list(lookup), codes
+
+
+class CatalogIndex:
+    """
+    Precomputed feature columns for an internship catalog.
+
+    Categorical fields (education, sector, location, experience) are stored as
+    integer codes into a table of unique values, so per-candidate factor scores
+    only have to be computed once per distinct value and can then be gathered
+    for the whole catalog. Required skills are stored as a sparse incidence
+    list (row, skill id) for vectorized overlap counting.
+
+    Inverted indexes map each skill, sector and location to the rows that
+    carry it, and "residual groups" bucket rows by the fields that decide
+    their score when they share no skill, sector or location with a
+    candidate (education, empty skill list, remote flag, experience).
+    Postings are always in ascending row order.
+
+    Distinct locations are resolved to gazetteer place ids (-1 if unknown)
+    in `location_places`, aligned with `location_values`.
+
+    Titles and descriptions are indexed for free-text similarity in
+    `semantic` (see SemanticIndex), and filterable fields as bitmaps in
+    `facets` (see FacetIndex).
+
+    An index is never modified once built. Changes made through the
+    recommender's mutation API produce snapshots (see CatalogDelta) that share
+    this index's arrays and add `delta`, an index of the postings added or
+    updated since, and `alive`/`alive_bits`, flags of the rows still current.
+    """
+
+    # Postings changed since this index was built, set on snapshots only
+    delta = None
+    alive = None
+    alive_bits = None
+    expired = 0
+
+    # Derived attributes persisted by catalog_store: numpy arrays and small
+    # JSON-serializable tables of unique values
+    ARRAYS = (
+        'education_codes', 'sector_codes', 'location_codes', 'experience_codes', 'remote',
+        'skill_rows', 'skill_ids', 'skill_counts',
+        'skill_offsets', 'skill_postings', 'sector_offsets', 'sector_postings',
+        'location_offsets', 'location_postings', 'group_offsets', 'group_postings',
+        'group_education', 'group_no_skills', 'group_remote', 'group_experience',
+    )
+    TABLES = ('education_values', 'sector_values', 'location_values', 'experience_values')
+
+    def __init__(self, internships: List[Dict[str, Any]], vocabulary: SkillVocabulary = None,
+                 semantic_base: SemanticIndex = None):
+        self.internships = internships
+        self.size = len(internships)
+
+        self.education_values, self.education_codes = _encode(
+            [(i.get('required_education') or '').lower() for i in internships])
+        self.sector_values, self.sector_codes = _encode(
+            [(i.get('sector') or '').lower() for i in internships])
+        self.location_values, self.location_codes = _encode(
+            [(i.get('location') or '').lower() for i in internships])
+        self.experience_values, self.experience_codes = _encode(
+            [i.get('experience_required', False) for i in internships])
+        self.remote = np.array([bool(i.get('remote_available', False)) for i in internships], dtype=bool)
+
+        # Skills: catalog-local ids of canonical skill names plus a
+        # (row, skill id) incidence list and the distinct skill count per row
+        vocabulary = vocabulary or get_skill_vocabulary()
+        self.skill_vocabulary_version = vocabulary.version
+        self.skill_vocab: Dict[str, int] = {}
+        rows, ids = [], []
+        counts = np.zeros(self.size, dtype=np.float64)
+        for row, internship in enumerate(internships):
+            skills = vocabulary.canonicalize_all(internship.get('required_skills', []))
+            counts[row] = len(skills)
+            for skill in skills:
+                skill_id = self.skill_vocab.setdefault(skill, len(self.skill_vocab))
+                rows.append(row)
+                ids.append(skill_id)
+        self.skill_rows = np.array(rows, dtype=np.int32)
+        self.skill_ids = np.array(ids, dtype=np.int32)
+        self.skill_counts = counts
+        self.skill_names = list(self.skill_vocab)
+
+        self._build_inverted_indexes()
+        self._resolve_locations()
+        # A delta index shares the term space of its base (see SemanticIndex.extension)
+        documents = [f"{i.get('title') or ''} {i.get('description') or ''}" for i in internships]
+        self.semantic = SemanticIndex(documents) if semantic_base is None else semantic_base.extension(documents)
+        self.facets = FacetIndex(internships)
+
+    def _build_inverted_indexes(self):
+        """Build skill/sector/location postings and residual groups"""
+        all_rows = np.arange(self.size, dtype=np.int32)
+        self.skill_offsets, self.skill_postings = _postings(
+            self.skill_ids, self.skill_rows, len(self.skill_vocab))
+        self.sector_offsets, self.sector_postings = _postings(
+            self.sector_codes, all_rows, len(self.sector_values))
+        self.location_offsets, self.location_postings = _postings(
+            self.location_codes, all_rows, len(self.location_values))
+
+        group_keys = self.education_codes.astype(np.int64)
+        group_keys = group_keys * 2 + (self.skill_counts == 0)
+        group_keys = group_keys * 2 + self.remote
+        group_keys = group_keys * len(self.experience_values) + self.experience_codes
+        keys, group_codes = np.unique(group_keys, return_inverse=True)
+        self.group_offsets, self.group_postings = _postings(
+            group_codes.reshape(-1), all_rows, len(keys))
+        first_rows = self.group_postings[self.group_offsets[:-1]]
+        self.group_education = self.education_codes[first_rows]
+        self.group_no_skills = self.skill_counts[first_rows] == 0
+        self.group_remote = self.remote[first_rows]
+        self.group_experience = self.experience_codes[first_rows]
+
+    @classmethod
+    def from_columns(cls, internships, arrays: Dict[str, np.ndarray], tables: Dict[str, list]) -> 'CatalogIndex':
+        """Rebuild an index from persisted arrays and tables without touching the records"""
+        catalog = cls.__new__(cls)
+        catalog.internships = internships
+        catalog.size = len(internships)
+        for name in cls.ARRAYS:
+            setattr(catalog, name, arrays[name])
+        for name in cls.TABLES:
+            setattr(catalog, name, tables[name])
+        catalog.skill_vocab = {skill: i for i, skill in enumerate(tables['skills'])}
+        catalog.skill_names = list(tables['skills'])
+        catalog.skill_vocabulary_version = tables['skill_vocabulary_version']
+        catalog._resolve_locations()
+        catalog.semantic = SemanticIndex.from_columns(
+            {name: arrays['semantic_' + name] for name in SemanticIndex.ARRAYS}, tables['semantic'])
+        catalog.facets = FacetIndex.from_columns(
+            {name: arrays['facet_' + name] for name in FacetIndex.array_names()}, tables['facets'], catalog.size)
+        return catalog
+
+    def _resolve_locations(self):
+        gazetteer = get_gazetteer()
+        self.location_places = np.array([gazetteer.resolve(location) for location in self.location_values],
+                                        dtype=np.int64)
+
+    def column(self, name: str, default: Any = None) -> List[Any]:
+        """One field of every internship, decoding nothing else"""
+        column = getattr(self.internships, 'column', None)
+        if column is not None:
+            return column(name, default)
+        return [i.get(name, default) for i in self.internships]
+
+    @staticmethod
+    def _gather(offsets: np.ndarray, postings: np.ndarray, codes) -> np.ndarray:
+        """Concatenate the postings of several codes"""
+        parts = [postings[offsets[c]:offsets[c + 1]] for c in codes]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(parts)
+
+    def skill_ids_for(self, skills: List[str]) -> np.ndarray:
+        """Sorted catalog ids of canonical candidate skills required anywhere in the catalog"""
+        ids = {self.skill_vocab[s] for s in skills if s in self.skill_vocab}
+        return np.array(sorted(ids), dtype=np.int32)
+
+    def rows_with_skills(self, skill_ids: np.ndarray) -> np.ndarray:
+        """Rows requiring any of the given skills (one entry per shared skill)"""
+        return self._gather(self.skill_offsets, self.skill_postings, skill_ids)
+
+    def _skill_range(self, start: int, stop: int) -> Tuple[int, int]:
+        """Incidences of rows start..stop-1, as skill_rows is sorted"""
+        # Keys of the array's own dtype, as mixed dtypes would copy the array
+        bounds = np.array([start, stop], dtype=self.skill_rows.dtype)
+        low, high = np.searchsorted(self.skill_rows, bounds)
+        return int(low), int(high)
+
+    def explain_columns(self) -> np.ndarray:
+        """
+        One row of ints per internship for score breakdowns, built on first
+        use: education, sector, location and experience codes, each offset
+        past the tables before it (so they index the candidate's four tables
+        laid end to end), where its incidences start and end in skill_rows,
+        and the remote flag. A single gather then reads everything a
+        breakdown needs about a few rows.
+        """
+        columns = self.__dict__.get('_explain_columns')
+        if columns is None:
+            offsets = np.cumsum([0, len(self.education_values), len(self.sector_values), len(self.location_values)])
+            bounds = np.searchsorted(self.skill_rows, np.arange(self.size + 1, dtype=self.skill_rows.dtype))
+            columns = np.stack([self.education_codes + offsets[0], self.sector_codes + offsets[1],
+                                self.location_codes + offsets[2], self.experience_codes + offsets[3],
+                                bounds[:-1], bounds[1:], self.remote], axis=1).astype(np.int32)
+            self._explain_columns = columns
+        return columns
+
+    def required_skill_ids(self, rows: np.ndarray) -> List[List[int]]:
+        """Catalog skill ids each of the given internships requires, in listing order"""
+        keys = np.asarray(rows, dtype=self.skill_rows.dtype)
+        lows = np.searchsorted(self.skill_rows, keys).tolist()
+        highs = np.searchsorted(self.skill_rows, keys + 1).tolist()
+        return [self.skill_ids[low:high].tolist() for low, high in zip(lows, highs)]
+
+    def rows_with_sectors(self, sector_codes) -> np.ndarray:
+        return self._gather(self.sector_offsets, self.sector_postings, sector_codes)
+
+    def rows_with_locations(self, location_codes) -> np.ndarray:
+        return self._gather(self.location_offsets, self.location_postings, location_codes)
+
+    def group_rows(self, group: int) -> np.ndarray:
+        return self.group_postings[self.group_offsets[group]:self.group_offsets[group + 1]]
+
+    def matched_skill_counts(self, skill_ids: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Number of distinct required skills each internship shares with the
+        candidate, for all rows, a contiguous slice of rows or only for the
+        given sorted rows
+        """
+        if rows is None:
+            rows = slice(0, self.size)
+        if isinstance(rows, slice):
+            # skill_rows is sorted, so a row range is a range of incidences
+            start, stop, _ = rows.indices(self.size)
+            low, high = self._skill_range(start, stop)
+            mask = np.zeros(len(self.skill_vocab), dtype=np.float64)
+            mask[skill_ids] = 1.0
+            return np.bincount(self.skill_rows[low:high] - start,
+                               weights=mask[self.skill_ids[low:high]], minlength=stop - start)
+
+        hits, counts = np.unique(self.rows_with_skills(skill_ids), return_counts=True)
+        matched = np.zeros(len(rows), dtype=np.float64)
+        if len(hits):
+            pos = np.minimum(np.searchsorted(hits, rows), len(hits) - 1)
+            found = hits[pos] == rows
+            matched[found] = counts[pos[found]]
+        return matched
@@ -0,0 +1,220 @@
+"""
+Compact columnar catalog artifact shared by all workers through mmap.
+
+The build step compiles data/internships.json into a single binary file:
+
+    magic (8 bytes) | header length (uint64) | JSON header | aligned arrays
+
+The header holds the source file's signature and version, the small tables
+of unique values and the dtype/shape/offset of every array. Arrays are the
+CatalogIndex feature columns and inverted indexes, the semantic_* arrays of
+its SemanticIndex and the facet_* bitmaps of its FacetIndex, plus a string
+heap with each record field stored as JSON text and an (fields x rows + 1)
+offsets table into it. Opening the artifact maps the file read-only, so workers
+share the same physical pages and no record is parsed until it is returned.
+
+Usage (from the backend directory, after every catalog update):
+
+    python catalog_store.py [internships.json] [internships.catalog]
+"""
+import json
+import mmap
+import os
+import sys
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from catalog_index import CatalogIndex
+from facet_index import FacetIndex
+from semantic_index import SemanticIndex
+
+MAGIC = b'PMCAT003'
+ALIGNMENT = 64
+
+
+class ArtifactRecords:
+    """Read-only sequence of internships decoded on demand from the string heap"""
+
+    def __init__(self, buffer, heap_offset: int, fields: List[str], offsets: np.ndarray):
+        self._buffer = buffer
+        self._heap_offset = heap_offset
+        self._fields = fields
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return self._offsets.shape[1] - 1
+
+    def _decode(self, field: int, row: int) -> Any:
+        start = self._heap_offset + int(self._offsets[field, row])
+        end = self._heap_offset + int(self._offsets[field, row + 1])
+        return json.loads(self._buffer[start:end])
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        present = self._offsets[:, row + 1] > self._offsets[:, row]
+        return {name: self._decode(field, row)
+                for field, name in enumerate(self._fields) if present[field]}
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def column(self, name: str, default: Any = None) -> List[Any]:
+        """Decode a single field for every record"""
+        if name not in self._fields:
+            return [default] * len(self)
+        field = self._fields.index(name)
+        starts, ends = self._offsets[field, :-1], self._offsets[field, 1:]
+        return [self._decode(field, row) if ends[row] > starts[row] else default
+                for row in range(len(self))]
+
+
+def _string_heap(internships: List[Dict[str, Any]]):
+    """Encode every field of every record as JSON text; missing fields are empty"""
+    fields = []
+    for internship in internships:
+        for name in internship:
+            if name not in fields:
+                fields.append(name)
+
+    chunks = []
+    offsets = np.zeros((len(fields), len(internships) + 1), dtype=np.int64)
+    position = 0
+    for field, name in enumerate(fields):
+        offsets[field, 0] = position
+        for row, internship in enumerate(internships):
+            if name in internship:
+                encoded = json.dumps(internship[name], ensure_ascii=False).encode('utf-8')
+                chunks.append(encoded)
+                position += len(encoded)
+            offsets[field, row + 1] = position
+    heap = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+    return fields, offsets, heap
+
+
+def write_artifact(path: str, catalog: CatalogIndex, source_signature, version: str):
+    """Write a catalog artifact atomically (temp file + rename)"""
+    fields, offsets, heap = _string_heap(list(catalog.internships))
+    arrays = {name: getattr(catalog, name) for name in CatalogIndex.ARRAYS}
+    for name in SemanticIndex.ARRAYS:
+        arrays['semantic_' + name] = getattr(catalog.semantic, name)
+    for name in FacetIndex.array_names():
+        arrays['facet_' + name] = getattr(catalog.facets, name)
+    arrays['record_offsets'] = offsets
+    arrays['heap'] = heap
+
+    tables = {name: getattr(catalog, name) for name in CatalogIndex.TABLES}
+    tables['skills'] = list(catalog.skill_vocab)
+    tables['skill_vocabulary_version'] = catalog.skill_vocabulary_version
+    tables['facets'] = catalog.facets.labels
+    tables['semantic'] = {name: getattr(catalog.semantic, name) for name in SemanticIndex.TABLES}
+    header = {
+        'version': version,
+        'source_signature': list(source_signature) if source_signature else None,
+        'size': catalog.size,
+        'fields': fields,
+        'tables': tables,
+        'arrays': {},
+    }
+
+    # Lay arrays out after the header, each aligned for direct mapping
+    layout = []
+    position = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        position = -(-position // ALIGNMENT) * ALIGNMENT
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+        layout.append((position, array))
+        position += array.nbytes
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for offset, array in layout:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+    os.replace(tmp_path, path)
+
+
+def open_artifact(path: str, source_signature=None, vocabulary_version: str = None) -> Optional[CatalogIndex]:
+    """
+    Map a catalog artifact and return its CatalogIndex.
+
+    Returns None when the artifact is missing, in an older format, was built
+    from a different version of the source file than source_signature
+    describes, or with a different skill vocabulary.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        if buffer[:5] == MAGIC[:5]:
+            # Written by another version of this module; rebuild from JSON
+            buffer.close()
+            return None
+        raise ValueError(f"{path} is not a catalog artifact")
+    header_length = int(np.frombuffer(buffer, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+    header_start = len(MAGIC) + 8
+    header = json.loads(buffer[header_start:header_start + header_length])
+    stale = source_signature is not None and header['source_signature'] != list(source_signature)
+    if vocabulary_version is not None and header['tables'].get('skill_vocabulary_version') != vocabulary_version:
+        stale = True
+    if stale:
+        buffer.close()
+        return None
+
+    data_start = -(-(header_start + header_length) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        if count == 0:
+            arrays[name] = np.empty(spec['shape'], dtype=dtype)
+            continue
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        arrays[name] = array.reshape(spec['shape'])
+
+    records = ArtifactRecords(buffer, data_start + header['arrays']['heap']['offset'],
+                              header['fields'], arrays['record_offsets'])
+    catalog = CatalogIndex.from_columns(records, arrays, header['tables'])
+    catalog.version = header['version']
+    return catalog
+
+
+def build(source: str, destination: str) -> CatalogIndex:
+    """Compile a JSON catalog into an artifact next to it"""
+    from recommendation_engine import RecommendationEngine
+
+    started = time.perf_counter()
+    engine = RecommendationEngine(source, use_artifact=False, use_journal=False)
+    catalog = engine.catalog
+    write_artifact(destination, catalog, catalog.signature[0], catalog.version)
+    print(f"Wrote {destination}: {catalog.size} internships, version {catalog.version}, "
+          f"{os.path.getsize(destination)} bytes in {time.perf_counter() - started:.2f}s")
+    return catalog
+
+
+if __name__ == '__main__':
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(data_dir, 'internships.json')
+    destination = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.catalog'
+    build(source, destination)
@@ -1,7 +1,9 @@
+import json
 import sqlite3
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 import bcrypt
+from profile_encoding import ProfileEncoder, get_profile_encoder
 try:
     import psycopg2
     from psycopg2.extras import RealDictCursor
@@ -14,10 +16,12 @@ def get_jwt_secret_key():
 class Database:
     """Database handler for user management (Supports SQLite and PostgreSQL)"""
     
-    def __init__(self, db_path='users.db'):
+    def __init__(self, db_path='users.db', encoder: ProfileEncoder = None):
         self.db_url = os.environ.get('DATABASE_URL')
         self.db_path = db_path
         self.is_postgres = bool(self.db_url)
+        # Profiles are stored with their matching fields pre-encoded
+        self.encoder = encoder or get_profile_encoder()
         self.init_database()
     
     def get_connection(self):
@@ -91,9 +95,12 @@ class Database:
                 linkedin TEXT,
                 projects_json TEXT,
                 work_history_json TEXT,
+                feature_vector TEXT,
+                feature_version TEXT,
                 FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
             )
         '''))
+        self._add_columns(cursor, 'user_profiles', [('feature_vector', 'TEXT'), ('feature_version', 'TEXT')])
 
         cursor.execute(adjust_type('''
             CREATE TABLE IF NOT EXISTS applications (
@@ -132,9 +139,32 @@ class Database:
             )
         '''))
         
+        # Top candidates per internship, written by match_candidates.py
+        cursor.execute(adjust_type('''
+            CREATE TABLE IF NOT EXISTS internship_matches (
+                internship_id TEXT PRIMARY KEY,
+                candidates TEXT NOT NULL,
+                catalog_version TEXT,
+                scoring_profile TEXT,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''))
+        
         conn.commit()
         conn.close()
     
+    def _add_columns(self, cursor, table: str, columns: List[tuple]):
+        """Add columns missing from a table created by an older version"""
+        if self.is_postgres:
+            for name, column_type in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {column_type}')
+            return
+        cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type in columns:
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+
     def hash_password(self, password: str) -> str:
         """Hash a password using bcrypt"""
         return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -224,72 +254,91 @@ class Database:
             }
         return None
     
-    def save_user_profile(self, user_id: int, profile: Dict[str, Any]) -> bool:
-        """Save or update user profile with comprehensive fields"""
+    def save_user_profile(self, user_id: int, profile: Dict[str, Any], encoded: Dict[str, Any] = None) -> bool:
+        """
+        Save or update user profile with comprehensive fields, and the
+        encoding of its matching fields (computed here unless given)
+        """
+        return self.save_user_profiles([(user_id, profile, encoded)]) == 1
+    
+    def save_user_profiles(self, profiles: List[tuple]) -> int:
+        """
+        Save (user_id, profile, encoded) tuples in one transaction, as
+        save_user_profile() does one by one. Returns how many were saved:
+        all of them, or 0 if the transaction failed.
+        """
         try:
             conn = self.get_connection()
             cursor = self.get_cursor(conn)
-            
-            # Check if profile exists
-            sql, params = self._query('SELECT id FROM user_profiles WHERE user_id = ?', (user_id,))
-            cursor.execute(sql, params)
-            existing = cursor.fetchone()
-            
-            skills_json = ','.join(profile.get('skills', []))
-            interests_json = ','.join(profile.get('interests', []))
-            previous_exp = 1 if profile.get('previous_experience', False) else 0
-            
-            # New fields
-            bio = profile.get('bio', '')
-            institution = profile.get('institution', '')
-            gpa = profile.get('gpa', '')
-            academic_score = profile.get('academic_score', '')
-            languages = profile.get('languages', '')
-            certifications = profile.get('certifications', '')
-            github = profile.get('github', '')
-            
-            # V2 Fields - Full Profile Expansion
-            linkedin = profile.get('linkedin', '')
-            projects_json = profile.get('projects_json', '[]')
-            work_history_json = profile.get('work_history_json', '[]')
-            
-            if existing:
-                # Update existing profile
-                sql, params = self._query('''
-                    UPDATE user_profiles
-                    SET education = ?, skills = ?, interests = ?, location = ?,
-                        previous_experience = ?, updated_at = CURRENT_TIMESTAMP,
-                        bio = ?, institution = ?, gpa = ?, academic_score = ?,
-                        languages = ?, certifications = ?, github = ?,
-                        linkedin = ?, projects_json = ?, work_history_json = ?
-                    WHERE user_id = ?
-                ''', (profile.get('education'), skills_json, interests_json,
-                      profile.get('location'), previous_exp,
-                      bio, institution, gpa, academic_score, languages, certifications, github,
-                      linkedin, projects_json, work_history_json,
-                      user_id))
-                cursor.execute(sql, params)
-            else:
-                # Insert new profile
-                sql, params = self._query('''
-                    INSERT INTO user_profiles (
-                        user_id, education, skills, interests, location, previous_experience,
-                        bio, institution, gpa, academic_score, languages, certifications, github,
-                        linkedin, projects_json, work_history_json
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, profile.get('education'), skills_json, interests_json,
-                      profile.get('location'), previous_exp,
-                      bio, institution, gpa, academic_score, languages, certifications, github,
-                      linkedin, projects_json, work_history_json))
-                cursor.execute(sql, params)
-            
+            for user_id, profile, encoded in profiles:
+                self._write_user_profile(cursor, user_id, profile, encoded)
             conn.commit()
             conn.close()
-            return True
+            return len(profiles)
         except Exception as e:
             print(f"Error saving profile: {e}")
-            return False
+            return 0
+    
+    def _write_user_profile(self, cursor, user_id: int, profile: Dict[str, Any], encoded: Dict[str, Any] = None):
+        # Check if profile exists
+        sql, params = self._query('SELECT id FROM user_profiles WHERE user_id = ?', (user_id,))
+        cursor.execute(sql, params)
+        existing = cursor.fetchone()
+        
+        skills_json = ','.join(profile.get('skills', []))
+        interests_json = ','.join(profile.get('interests', []))
+        previous_exp = 1 if profile.get('previous_experience', False) else 0
+        
+        # New fields
+        bio = profile.get('bio', '')
+        institution = profile.get('institution', '')
+        gpa = profile.get('gpa', '')
+        academic_score = profile.get('academic_score', '')
+        languages = profile.get('languages', '')
+        certifications = profile.get('certifications', '')
+        github = profile.get('github', '')
+        
+        # V2 Fields - Full Profile Expansion
+        linkedin = profile.get('linkedin', '')
+        projects_json = profile.get('projects_json', '[]')
+        work_history_json = profile.get('work_history_json', '[]')
+        
+        if not self.encoder.is_current(encoded):
+            encoded = self.encoder.encode(profile)
+        feature_vector = self.encoder.dumps(encoded)
+        
+        if existing:
+            # Update existing profile
+            sql, params = self._query('''
+                UPDATE user_profiles
+                SET education = ?, skills = ?, interests = ?, location = ?,
+                    previous_experience = ?, updated_at = CURRENT_TIMESTAMP,
+                    bio = ?, institution = ?, gpa = ?, academic_score = ?,
+                    languages = ?, certifications = ?, github = ?,
+                    linkedin = ?, projects_json = ?, work_history_json = ?,
+                    feature_vector = ?, feature_version = ?
+                WHERE user_id = ?
+            ''', (profile.get('education'), skills_json, interests_json,
+                  profile.get('location'), previous_exp,
+                  bio, institution, gpa, academic_score, languages, certifications, github,
+                  linkedin, projects_json, work_history_json,
+                  feature_vector, encoded['version'],
+                  user_id))
+            cursor.execute(sql, params)
+        else:
+            # Insert new profile
+            sql, params = self._query('''
+                INSERT INTO user_profiles (
+                    user_id, education, skills, interests, location, previous_experience,
+                    bio, institution, gpa, academic_score, languages, certifications, github,
+                    linkedin, projects_json, work_history_json, feature_vector, feature_version
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, profile.get('education'), skills_json, interests_json,
+                  profile.get('location'), previous_exp,
+                  bio, institution, gpa, academic_score, languages, certifications, github,
+                  linkedin, projects_json, work_history_json, feature_vector, encoded['version']))
+            cursor.execute(sql, params)
     
     def get_user_profile(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user profile"""
@@ -303,6 +352,9 @@ class Database:
         
         if row:
             profile = dict(row)
+            # Internal matching encoding, see iter_candidate_profiles()
+            profile.pop('feature_vector', None)
+            profile.pop('feature_version', None)
             # Parse skills and interests from comma-separated strings
             profile['skills'] = profile['skills'].split(',') if profile.get('skills') else []
             profile['interests'] = profile['interests'].split(',') if profile.get('interests') else []
@@ -315,6 +367,87 @@ class Database:
             return profile
         return None
     
+    def iter_candidate_profiles(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Matching fields of every stored profile, in id order, with their
+        stored encoding as 'encoded' (see ProfileEncoder). Profiles are
+        fetched batch_size at a time by keyset pagination on the primary key,
+        so memory stays bounded however many there are. Encodings missing or
+        made with another vocabulary or gazetteer version are redone and
+        written back, a batch at a time.
+        """
+        last_id = 0
+        while True:
+            conn = self.get_connection()
+            cursor = self.get_cursor(conn)
+            sql, params = self._query('''
+                SELECT id, user_id, education, skills, interests, location, previous_experience,
+                       feature_vector, feature_version
+                FROM user_profiles WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            cursor.execute(sql, params)
+            rows = [dict(row) for row in cursor.fetchall()]
+
+            profiles, stale = [], []
+            for row in rows:
+                profile = {
+                    'user_id': row['user_id'],
+                    'education': row['education'] or '',
+                    'skills': row['skills'].split(',') if row['skills'] else [],
+                    'interests': row['interests'].split(',') if row['interests'] else [],
+                    'location': row['location'] or '',
+                    'previous_experience': bool(row['previous_experience']),
+                }
+                encoded = None
+                if row['feature_version'] == self.encoder.version:
+                    encoded = self.encoder.loads(row['feature_vector'])
+                if encoded is None:
+                    encoded = self.encoder.encode(profile)
+                    stale.append((self.encoder.dumps(encoded), encoded['version'], row['id']))
+                profile['encoded'] = encoded
+                profiles.append(profile)
+            if stale:
+                sql, _ = self._query('UPDATE user_profiles SET feature_vector = ?, feature_version = ? WHERE id = ?')
+                cursor.executemany(sql, stale)
+                conn.commit()
+            conn.close()
+
+            yield from profiles
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['id']
+
+    def save_internship_matches(self, matches: Dict[Any, List[Dict[str, Any]]],
+                                catalog_version: str, scoring_profile: str):
+        """Store the ranked candidates of each internship, replacing earlier results"""
+        conn = self.get_connection()
+        cursor = self.get_cursor(conn)
+        sql, _ = self._query('''
+            INSERT INTO internship_matches (internship_id, candidates, catalog_version, scoring_profile, computed_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (internship_id) DO UPDATE SET
+                candidates = excluded.candidates, catalog_version = excluded.catalog_version,
+                scoring_profile = excluded.scoring_profile, computed_at = excluded.computed_at
+        ''')
+        cursor.executemany(sql, [(str(internship_id), json.dumps(candidates), catalog_version, scoring_profile)
+                                 for internship_id, candidates in matches.items()])
+        conn.commit()
+        conn.close()
+
+    def get_internship_matches(self, internship_id) -> Optional[Dict[str, Any]]:
+        """Stored ranked candidates of one internship (a primary key lookup)"""
+        conn = self.get_connection()
+        cursor = self.get_cursor(conn)
+        sql, params = self._query('SELECT * FROM internship_matches WHERE internship_id = ?', (str(internship_id),))
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        matches = dict(row)
+        matches['candidates'] = json.loads(matches['candidates'])
+        return matches
+
     def add_application(self, user_id, company, role, link):
         conn = self.get_connection()
         cursor = self.get_cursor(conn)
@@ -0,0 +1,171 @@
+from typing import List, Dict, Any, Iterable, Optional, Union
+
+import numpy as np
+
+# Filterable facets: (name, internship field, label for a missing value)
+FACETS = (
+    ('sector', 'sector', 'Other'),
+    ('location', 'location', ''),
+    ('remote', 'remote_available', False),
+    ('duration', 'duration', ''),
+    ('education', 'required_education', ''),
+)
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bitmaps: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+else:
+    _BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+    def _popcount(bitmaps: np.ndarray) -> np.ndarray:
+        return _BITS[bitmaps].sum(axis=-1)
+
+
+def _key(value: Any) -> str:
+    """Case-insensitive lookup key of a facet value ('Remote' / True -> 'true')"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).strip().lower()
+
+
+class FacetIndex:
+    """
+    One packed bitmap per value of every filterable facet.
+
+    Bit r of a value's bitmap is set when internship r has that value, so a
+    filter is an OR of value bitmaps within a facet and an AND across facets,
+    and counts are popcounts of intersections. Each bitmap takes size / 8
+    bytes, which suits these low-cardinality fields.
+    """
+
+    def __init__(self, internships: List[Dict[str, Any]]):
+        self.size = len(internships)
+        self.labels: Dict[str, List[Any]] = {}
+        for name, field, default in FACETS:
+            lookup: Dict[str, int] = {}
+            labels = []
+            codes = np.empty(self.size, dtype=np.int32)
+            for row, internship in enumerate(internships):
+                value = internship.get(field)
+                if name == 'remote':
+                    value = bool(value)
+                elif value is None or value == '':
+                    value = default
+                key = _key(value)
+                code = lookup.get(key)
+                if code is None:
+                    code = lookup[key] = len(labels)
+                    labels.append(value)
+                codes[row] = code
+            self.labels[name] = labels
+            # Every row sets one bit of one value's bitmap, so adding the bit
+            # values into the packed bytes is the same as OR-ing them
+            rows = np.arange(self.size)
+            width = (self.size + 7) // 8
+            bitmaps = np.zeros((len(labels), width), dtype=np.uint8)
+            np.add.at(bitmaps.reshape(-1), codes.astype(np.int64) * width + (rows >> 3),
+                      (128 >> (rows & 7)).astype(np.uint8))
+            setattr(self, f'{name}_bitmaps', bitmaps)
+        self._init_lookup()
+
+    @classmethod
+    def from_columns(cls, arrays: Dict[str, np.ndarray], labels: Dict[str, List[Any]], size: int) -> 'FacetIndex':
+        """Rebuild an index from persisted bitmaps and labels"""
+        index = cls.__new__(cls)
+        index.size = size
+        index.labels = labels
+        for name, _, _ in FACETS:
+            setattr(index, f'{name}_bitmaps', arrays[f'{name}_bitmaps'])
+        index._init_lookup()
+        return index
+
+    def _init_lookup(self):
+        self._codes = {name: {_key(label): code for code, label in enumerate(labels)}
+                       for name, labels in self.labels.items()}
+        self._all = np.packbits(np.ones(self.size, dtype=bool))
+
+    @staticmethod
+    def array_names() -> List[str]:
+        return [f'{name}_bitmaps' for name, _, _ in FACETS]
+
+    def bitmaps(self, facet: str) -> np.ndarray:
+        return getattr(self, f'{facet}_bitmaps')
+
+    @staticmethod
+    def normalize(filters: Optional[Dict[str, Union[Any, Iterable[Any]]]]) -> Dict[str, List[str]]:
+        """
+        Validated filters as {facet: sorted lookup keys}. A value may be a
+        single value, a comma-separated string or a list; facets without
+        values are dropped. Raises ValueError for unknown facets.
+        """
+        normalized = {}
+        names = [name for name, _, _ in FACETS]
+        for facet, values in (filters or {}).items():
+            if facet not in names:
+                raise ValueError(f"Unknown filter '{facet}', expected one of {', '.join(names)}")
+            if isinstance(values, str):
+                values = values.split(',')
+            elif not isinstance(values, (list, tuple, set)):
+                values = [values]
+            keys = sorted({_key(value) for value in values if _key(value)})
+            if keys:
+                normalized[facet] = keys
+        return normalized
+
+    def _facet_mask(self, facet: str, keys: List[str]) -> np.ndarray:
+        codes = [self._codes[facet][key] for key in keys if key in self._codes[facet]]
+        if not codes:
+            return np.zeros_like(self._all)
+        return np.bitwise_or.reduce(self.bitmaps(facet)[codes], axis=0)
+
+    def mask(self, filters: Dict[str, List[str]], exclude: str = None,
+             within: np.ndarray = None) -> np.ndarray:
+        """
+        Packed bitmap of the rows matching normalized filters, ignoring one
+        facet, among all rows or those set in a packed `within` bitmap
+        """
+        mask = self._all if within is None else within
+        for facet, keys in filters.items():
+            if facet != exclude:
+                mask = mask & self._facet_mask(facet, keys)
+        return mask
+
+    def select(self, filters: Dict[str, List[str]], within: np.ndarray = None) -> np.ndarray:
+        """Boolean flag per row: whether it matches normalized filters"""
+        return np.unpackbits(self.mask(filters, within=within), count=self.size).view(bool)
+
+    def rows(self, mask: np.ndarray) -> np.ndarray:
+        """Ascending rows set in a packed bitmap"""
+        return np.flatnonzero(np.unpackbits(mask, count=self.size))
+
+    def counts(self, filters: Dict[str, List[str]], within: np.ndarray = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Count of matching internships per value of every facet. Each facet is
+        counted under the filters on the other facets, so the counts show how
+        many results selecting that value would add or leave.
+        """
+        result = {}
+        for facet, _, _ in FACETS:
+            counts = _popcount(self.bitmaps(facet) & self.mask(filters, exclude=facet, within=within))
+            result[facet] = [{'value': label, 'count': int(count)}
+                             for label, count in zip(self.labels[facet], counts.tolist())
+                             if count and _key(label)]
+            result[facet].sort(key=lambda item: (-item['count'], str(item['value'])))
+        return result
+
+    @staticmethod
+    def merge_counts(results: List[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Sum counts() of several indexes (catalog segments) per value, keeping the first label seen"""
+        merged = {}
+        for facet, _, _ in FACETS:
+            totals: Dict[str, Dict[str, Any]] = {}
+            for result in results:
+                for item in result[facet]:
+                    total = totals.setdefault(_key(item['value']), {'value': item['value'], 'count': 0})
+                    total['count'] += item['count']
+            merged[facet] = sorted(totals.values(), key=lambda item: (-item['count'], str(item['value'])))
+        return merged
+
+    def values(self, facet: str) -> List[Any]:
+        """Distinct values of a facet across the catalog"""
+        return list(self.labels[facet])
@@ -0,0 +1,340 @@
+"""
+Deduplicated store of the live postings found by LiveJobsService.
+
+Every search result is ingested into a SQLite table of jobs:
+
+- URLs are canonicalized (canonical_url()): https, no www./m. host prefix
+  or LinkedIn country subdomain, no tracking parameters or fragment, and
+  LinkedIn/Indeed postings reduced to their job id. Postings reached
+  through different URLs of the same page are stored once. Canonical URLs
+  are only compared: postings keep the URL they were found under as their
+  apply_url, since boards may need the parameters dropped here.
+- Postings whose title, company and snippet are near-identical (SimHash
+  within MAX_DISTANCE bits, texts of at least MIN_TOKENS words) are merged
+  into the first one stored, even when their URLs differ (e.g. the same job
+  syndicated on two boards).
+- Ids are derived from the canonical URL of the first sighting
+  (stable_job_id()), so they are the same in every process and every run.
+
+Stored postings keep the fields of their first sighting, so repeated
+searches return identical payloads. The store also remembers which
+postings each search returned, for serving it again (jobs_for()).
+
+Title, company, snippet and location are indexed with SQLite FTS5, so any
+query can be answered from the postings harvested so far (search()), ranked
+by BM25, in milliseconds and without the network. SQLite builds without
+FTS5 only lose search().
+"""
+import contextlib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'refid', 'trackingid', 'trk', 'trkinfo', 'lipi',
+                   'position', 'pagenum', 'ref', 'referer', 'src', 'from', 'source', 'vjs', 'tk', 'sid',
+                   'currentjobid', 'eboss', 'originalsubdomain', 'alid'}
+TRACKING_PREFIXES = ('utm_', 'mc_', 'hsa_')
+MOBILE_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# SimHash: 64 bits, split into 4 bands of 16; two hashes within 3 bits of
+# each other agree on at least one whole band
+SIMHASH_BITS = 64
+BANDS = 4
+MAX_DISTANCE = 3
+# Shorter texts (e.g. a bare title) are too alike across postings to merge on
+MIN_TOKENS = 8
+
+# BM25 weights of the indexed columns: title, company, snippet, location
+# (location only filters)
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 0.0)
+# Locations that cover every stored posting
+ANY_LOCATION = {'', 'india', 'anywhere'}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def canonical_url(url: str) -> str:
+    parts = urlsplit((url or '').strip())
+    host = (parts.hostname or '').lower()
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    # in.linkedin.com, uk.linkedin.com, ... are the same site
+    if host.endswith('.linkedin.com'):
+        host = 'linkedin.com'
+    path = re.sub(r'/+', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+
+    # Job boards: the posting id identifies the page, the rest is decoration
+    linkedin = re.match(r'^/jobs/view/(?:[^/]*-)?(\d+)$', path)
+    if host == 'linkedin.com' and linkedin:
+        path, query = f'/jobs/view/{linkedin.group(1)}', []
+    elif host.endswith('indeed.com') and path in ('/viewjob', '/rc/clk', '/pagead/clk'):
+        path, query = '/viewjob', [(key, value) for key, value in query if key == 'jk']
+
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def stable_job_id(url: str) -> int:
+    """48-bit id of a posting URL: the same in every process, and exact in JavaScript"""
+    return int(hashlib.sha1(canonical_url(url).encode('utf-8')).hexdigest()[:12], 16)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a text's word unigrams and bigrams"""
+    tokens = _TOKEN.findall(text.lower())
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.md5(feature.encode('utf-8')).digest()[:8], 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def _bands(value: int) -> List[int]:
+    width = SIMHASH_BITS // BANDS
+    return [value >> (band * width) & ((1 << width) - 1) for band in range(BANDS)]
+
+
+def _signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class JobStore:
+    def __init__(self, path: str, retention: float = 30 * 86400.0):
+        self.path = path
+        # Postings not seen for this many seconds are dropped
+        self.retention = retention
+        self._lock = threading.Lock()
+        self.ingested = 0
+        self.merged = 0
+        self.searches = 0
+        self.fts = True
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT, company TEXT, location TEXT, apply_url TEXT,
+                    source TEXT, posted_at TEXT, snippet TEXT,
+                    simhash INTEGER NOT NULL,
+                    band0 INTEGER, band1 INTEGER, band2 INTEGER, band3 INTEGER,
+                    first_seen REAL NOT NULL, last_seen REAL NOT NULL
+                )
+            ''')
+            for band in range(BANDS):
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_jobs_band{band} ON jobs (band{band})')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_last_seen ON jobs (last_seen)')
+            # Every canonical URL a stored posting was seen under
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_urls (
+                    canonical_url TEXT PRIMARY KEY,
+                    job_id INTEGER NOT NULL
+                )
+            ''')
+            # Which postings each search (by LiveJobsService.cache_key) returned
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_searches (
+                    search_key TEXT NOT NULL,
+                    job_id INTEGER NOT NULL,
+                    rank INTEGER NOT NULL,
+                    seen_at REAL NOT NULL,
+                    PRIMARY KEY (search_key, job_id)
+                )
+            ''')
+            self._create_index(conn)
+
+    def _create_index(self, conn: sqlite3.Connection):
+        """Full-text index over the jobs table, kept in sync by triggers"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone()
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                    title, company, snippet, location,
+                    content='jobs', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Warning: job search disabled, SQLite has no FTS5: {e}")
+            self.fts = False
+            return
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts (rowid, title, company, snippet, location)
+                VALUES (new.id, new.title, new.company, new.snippet, new.location);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts (jobs_fts, rowid, title, company, snippet, location)
+                VALUES ('delete', old.id, old.title, old.company, old.snippet, old.location);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, company, snippet, location ON jobs
+            BEGIN
+                INSERT INTO jobs_fts (jobs_fts, rowid, title, company, snippet, location)
+                VALUES ('delete', old.id, old.title, old.company, old.snippet, old.location);
+                INSERT INTO jobs_fts (rowid, title, company, snippet, location)
+                VALUES (new.id, new.title, new.company, new.snippet, new.location);
+            END
+        ''')
+        # Stores created before the index: index what they already hold
+        if not exists:
+            conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _payload(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row['id'],
+            "title": row['title'],
+            "company": row['company'],
+            "location": row['location'],
+            "apply_url": row['apply_url'],
+            "source": row['source'],
+            "posted_at": row['posted_at'],
+            "snippet": row['snippet'],
+        }
+
+    def _near_duplicate(self, conn: sqlite3.Connection, fingerprint: int) -> Optional[int]:
+        """Id of a stored posting whose SimHash is within MAX_DISTANCE bits"""
+        rows = conn.execute(' UNION '.join(f'SELECT id, simhash FROM jobs WHERE band{band} = ?'
+                                           for band in range(BANDS)), _bands(fingerprint)).fetchall()
+        for job_id, stored in rows:
+            if bin((stored & (1 << 64) - 1) ^ fingerprint).count('1') <= MAX_DISTANCE:
+                return job_id
+        return None
+
+    def ingest(self, search_key: Optional[str], jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store a search's results and return them as stored: with stable ids,
+        the first sighting's fields, and duplicates (by URL or near-identical
+        text) dropped. With a search key, they become that search's
+        jobs_for() results.
+        """
+        now = time.time()
+        results, seen = [], set()
+        new = merged = 0
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in jobs:
+                url = canonical_url(job['apply_url'])
+                known = conn.execute('SELECT job_id FROM job_urls WHERE canonical_url = ?', (url,)).fetchone()
+                if known is not None:
+                    job_id = known[0]
+                else:
+                    text = ' '.join(str(job.get(field) or '') for field in ('title', 'company', 'snippet'))
+                    fingerprint = simhash(text)
+                    job_id = None
+                    if len(_TOKEN.findall(text.lower())) >= MIN_TOKENS:
+                        job_id = self._near_duplicate(conn, fingerprint)
+                    if job_id is None:
+                        job_id = stable_job_id(url)
+                        conn.execute('''
+                            INSERT OR IGNORE INTO jobs (id, title, company, location, apply_url, source,
+                                posted_at, snippet, simhash, band0, band1, band2, band3, first_seen, last_seen)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (job_id, job.get('title'), job.get('company'), job.get('location'), job['apply_url'],
+                              job.get('source'), job.get('posted_at'), job.get('snippet'),
+                              _signed(fingerprint), *_bands(fingerprint), now, now))
+                        new += 1
+                    else:
+                        merged += 1
+                    conn.execute('INSERT INTO job_urls (canonical_url, job_id) VALUES (?, ?)', (url, job_id))
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+                conn.execute('UPDATE jobs SET last_seen = ? WHERE id = ?', (now, job_id))
+                results.append(self._payload(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()))
+
+            if search_key is not None:
+                conn.execute('DELETE FROM job_searches WHERE search_key = ?', (search_key,))
+                conn.executemany('INSERT INTO job_searches (search_key, job_id, rank, seen_at) VALUES (?, ?, ?, ?)',
+                                 [(search_key, job['id'], rank, now) for rank, job in enumerate(results)])
+
+            cutoff = now - self.retention
+            conn.execute('DELETE FROM job_urls WHERE job_id IN (SELECT id FROM jobs WHERE last_seen < ?)', (cutoff,))
+            conn.execute('DELETE FROM job_searches WHERE job_id IN (SELECT id FROM jobs WHERE last_seen < ?)',
+                         (cutoff,))
+            conn.execute('DELETE FROM jobs WHERE last_seen < ?', (cutoff,))
+        with self._lock:
+            self.ingested += new
+            self.merged += merged
+        return results
+
+    def jobs_for(self, search_key: str, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """A search's stored results if it ran within max_age seconds, else None"""
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT jobs.* FROM job_searches JOIN jobs ON jobs.id = job_searches.job_id
+                WHERE search_key = ? AND seen_at >= ? ORDER BY rank
+            ''', (search_key, time.time() - max_age)).fetchall()
+        return [self._payload(row) for row in rows] or None
+
+    def search(self, query: str, location: str = 'India', limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Stored postings matching every word of the query (as a prefix) in
+        their title, company or snippet, best BM25 score first; outside
+        ANY_LOCATION, only those found for that location. None without FTS5.
+        """
+        if not self.fts:
+            return None
+        words = _TOKEN.findall((query or '').lower())
+        if not words:
+            return []
+        match = '{title company snippet} : (%s)' % ' '.join(f'"{word}"*' for word in words)
+        places = _TOKEN.findall((location or '').lower())
+        if ' '.join(places) not in ANY_LOCATION:
+            match += ' AND location : (%s)' % ' '.join(f'"{place}"' for place in places)
+        with self._connect() as conn:
+            rows = conn.execute(f'''
+                SELECT jobs.* FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid
+                WHERE jobs_fts MATCH ?
+                ORDER BY bm25(jobs_fts, {", ".join(map(str, BM25_WEIGHTS))}), jobs.last_seen DESC
+                LIMIT ?
+            ''', (match, limit)).fetchall()
+        with self._lock:
+            self.searches += 1
+        return [self._payload(row) for row in rows]
+
+    def status(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            jobs = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        with self._lock:
+            return {'jobs': jobs, 'ingested': self.ingested, 'merged_duplicates': self.merged,
+                    'full_text': self.fts, 'searches': self.searches}
+
+
+def default_store() -> Optional[JobStore]:
+    """Store configured by JOB_STORE (a path; 0 disables it)"""
+    path = os.environ.get('JOB_STORE', os.path.join(os.path.dirname(__file__), 'data', 'live_jobs.db'))
+    if path in ('', '0'):
+        return None
+    try:
+        return JobStore(path)
+    except sqlite3.Error as e:
+        print(f"Warning: job store disabled, could not open {path}: {e}")
+        return None
@@ -0,0 +1,222 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class LiveJobsCache:
+    """
+    Live job search results shared by all workers, in a SQLite file.
+
+    Entries are fresh for ttl seconds (negative_ttl for searches that found
+    nothing), then stale for stale_ttl more: stale entries are still served,
+    while one worker refreshes them. That worker is whoever takes the
+    entry's lease first (try_lease()); the lease lapses after a while in case
+    it dies before put(). Errors from SQLite are printed and treated as
+    misses, so the cache never fails a search.
+
+    The same file counts how often each search is made, across workers, for
+    LiveJobsRefresher (record_searches(), popular_searches()).
+    """
+
+    def __init__(self, path: str, ttl: float = 900.0, stale_ttl: float = 86400.0,
+                 negative_ttl: float = 120.0, half_life: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        try:
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS live_job_cache (
+                        key TEXT PRIMARY KEY,
+                        results TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        lease_until REAL NOT NULL DEFAULT 0
+                    )
+                ''')
+                # How often each search is made, decayed over time (see record_searches())
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS live_job_searches (
+                        key TEXT PRIMARY KEY,
+                        query TEXT NOT NULL,
+                        location TEXT NOT NULL,
+                        result_limit INTEGER NOT NULL,
+                        score REAL NOT NULL,
+                        seen_at REAL NOT NULL
+                    )
+                ''')
+        except sqlite3.Error as e:
+            self._error('open', e)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _error(self, action: str, e: Exception):
+        print(f"Live jobs cache: {action} failed: {e}")
+        with self._lock:
+            self.errors += 1
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """(results, fresh) for a key, or None if absent or too old to serve"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT results, expires_at FROM live_job_cache WHERE key = ?',
+                                   (key,)).fetchone()
+        except sqlite3.Error as e:
+            self._error('read', e)
+            row = None
+        if row is None or row[1] + self.stale_ttl < now:
+            self._count('misses')
+            return None
+        fresh = row[1] >= now
+        self._count('hits' if fresh else 'stale_hits')
+        return json.loads(row[0]), fresh
+
+    def try_lease(self, key: str, seconds: float, expires_before: float = None) -> Optional[bool]:
+        """
+        Whether this caller gets to refresh the key for the next `seconds`.
+        Only keys that expire before `expires_before` (default: now) can be
+        leased, so a key another worker has just refreshed is left alone.
+        None when the cache cannot be reached, so nobody else holds it either.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                # Keys not cached yet get a placeholder, too old to be served
+                conn.execute("INSERT OR IGNORE INTO live_job_cache (key, results, expires_at) VALUES (?, '[]', 0)",
+                             (key,))
+                claimed = conn.execute('UPDATE live_job_cache SET lease_until = ? '
+                                       'WHERE key = ? AND lease_until < ? AND expires_at < ?',
+                                       (now + seconds, key, now, expires_before or now)).rowcount == 1
+        except sqlite3.Error as e:
+            self._error('lease', e)
+            return None
+        if claimed:
+            self._count('refreshes')
+        return claimed
+
+    def put(self, key: str, results: List[Dict[str, Any]]):
+        """Store results (empty ones for negative_ttl) and release any lease"""
+        now = time.time()
+        expires_at = now + (self.ttl if results else self.negative_ttl)
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    INSERT INTO live_job_cache (key, results, expires_at, lease_until) VALUES (?, ?, ?, 0)
+                    ON CONFLICT(key) DO UPDATE SET results = excluded.results,
+                        expires_at = excluded.expires_at, lease_until = 0
+                ''', (key, json.dumps(results, ensure_ascii=False), expires_at))
+                # Entries too old to serve are dropped as new ones come in
+                conn.execute('DELETE FROM live_job_cache WHERE expires_at < ? AND lease_until < ?',
+                             (now - self.stale_ttl, now))
+        except sqlite3.Error as e:
+            self._error('write', e)
+
+    def release(self, key: str):
+        """Give up a lease without storing results, e.g. when no source answered"""
+        try:
+            with self._connect() as conn:
+                conn.execute('UPDATE live_job_cache SET lease_until = 0 WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            self._error('write', e)
+
+    def expiries(self, keys: List[str]) -> Dict[str, float]:
+        """Expiry time of each cached key (placeholders count as expired)"""
+        if not keys:
+            return {}
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(f'SELECT key, expires_at FROM live_job_cache '
+                                    f'WHERE key IN ({",".join("?" * len(keys))})', keys).fetchall()
+        except sqlite3.Error as e:
+            self._error('read', e)
+            return {}
+        return dict(rows)
+
+    def record_searches(self, searches: Dict[str, tuple]):
+        """
+        Add search counts, given as key -> (query, location, limit, count).
+        Every search is weighted by 0.5 ** (age / half_life), so a key's
+        score follows recent traffic; keys whose score has decayed below
+        0.01 are dropped.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                # Write lock up front, so concurrent workers do not lose counts
+                conn.execute('BEGIN IMMEDIATE')
+                rows = conn.execute('SELECT key, score, seen_at FROM live_job_searches').fetchall()
+                scores = {key: score * 0.5 ** ((now - seen_at) / self.half_life) for key, score, seen_at in rows}
+                conn.executemany('''
+                    INSERT INTO live_job_searches (key, query, location, result_limit, score, seen_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET score = excluded.score, seen_at = excluded.seen_at
+                ''', [(key, query, location, limit, scores.get(key, 0.0) + count, now)
+                      for key, (query, location, limit, count) in searches.items()])
+                conn.executemany('DELETE FROM live_job_searches WHERE key = ?',
+                                 [(key,) for key, score in scores.items() if score < 0.01 and key not in searches])
+        except sqlite3.Error as e:
+            self._error('write', e)
+
+    def popular_searches(self, top_k: int) -> List[Dict[str, Any]]:
+        """The top_k searches by decayed score, most popular first"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                rows = conn.execute('SELECT key, query, location, result_limit, score, seen_at '
+                                    'FROM live_job_searches').fetchall()
+        except sqlite3.Error as e:
+            self._error('read', e)
+            return []
+        searches = [{'key': key, 'query': query, 'location': location, 'limit': limit,
+                     'score': score * 0.5 ** ((now - seen_at) / self.half_life)}
+                    for key, query, location, limit, score, seen_at in rows]
+        searches.sort(key=lambda search: search['score'], reverse=True)
+        return searches[:top_k]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'errors': self.errors,
+            }
+
+
+def default_cache() -> Optional[LiveJobsCache]:
+    """Cache configured by LIVE_JOBS_CACHE* (LIVE_JOBS_CACHE=0 disables it)"""
+    path = os.environ.get('LIVE_JOBS_CACHE',
+                          os.path.join(os.path.dirname(__file__), 'data', 'live_jobs_cache.db'))
+    if path in ('', '0'):
+        return None
+    return LiveJobsCache(path,
+                         ttl=float(os.environ.get('LIVE_JOBS_CACHE_TTL', '900')),
+                         stale_ttl=float(os.environ.get('LIVE_JOBS_CACHE_STALE', '86400')),
+                         negative_ttl=float(os.environ.get('LIVE_JOBS_CACHE_NEGATIVE_TTL', '120')),
+                         half_life=float(os.environ.get('LIVE_JOBS_POPULARITY_HALF_LIFE', '3600')))
@@ -0,0 +1,157 @@
+"""
+Keep the live job cache warm for the most popular searches.
+
+Every worker's LiveJobsService counts its searches in the shared cache, so
+the popularity ranking covers all of them. Every tick, LiveJobsRefresher
+takes the top K searches by recent popularity and refreshes those whose
+cached results would expire before the next tick. Refreshes run at most
+`concurrency` at a time, and each cached search is refreshed by one worker
+only (the cache lease). Ticks are spaced `interval` seconds apart, give or
+take `jitter` (a fraction), so workers started together do not refresh in
+lockstep.
+
+The API runs one refresher per worker (LIVE_JOBS_REFRESH_INTERVAL=0 turns
+it off). It can also run as a sidecar process, from the backend directory:
+
+    python live_jobs_refresher.py                 # refresh forever
+    python live_jobs_refresher.py --once          # a single tick
+    python live_jobs_refresher.py --dry-run       # one tick against a fake source
+
+The dry run reads the popularity ranking from the real cache but fetches
+from a local fake source into a temporary cache, so it shows what would be
+refreshed, and how long it takes, without any network traffic or changes
+to the cached results.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+from live_jobs_cache import LiveJobsCache, default_cache
+from live_jobs_service import LiveJobsService, FakeJobSource
+
+
+class LiveJobsRefresher:
+    def __init__(self, service: LiveJobsService, top_k: int = 20, interval: float = 300.0,
+                 jitter: float = 0.2, concurrency: int = 2, stats_cache: LiveJobsCache = None):
+        self.service = service
+        self.top_k = top_k
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        # Where popularity and expiry are read from; the service's own cache
+        # except in dry runs
+        self.stats_cache = stats_cache or service.cache
+        self._thread = None
+        self._stop = threading.Event()
+        self.ticks = 0
+        self.refreshed = 0
+        self.last_tick = None
+
+    def plan(self) -> List[Dict[str, Any]]:
+        """Popular searches whose cached results expire before the next tick"""
+        self.service.record_searches()
+        popular = self.stats_cache.popular_searches(self.top_k)
+        expiries = self.stats_cache.expiries([search['key'] for search in popular])
+        timeout = max((source.timeout for source in self.service.sources), default=0)
+        horizon = time.time() + self.interval * (1 + self.jitter) + timeout
+        return [dict(search, expires_before=horizon) for search in popular
+                if expiries.get(search['key'], 0) < horizon]
+
+    def _refresh(self, search: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            refreshed = self.service.refresh(search['query'], search['location'], search['limit'],
+                                             search['expires_before'])
+            outcome = 'refreshed' if refreshed else 'skipped (refreshed by another worker)'
+        except Exception as e:
+            outcome = f'failed: {e}'
+        return dict(search, outcome=outcome, seconds=round(time.monotonic() - started, 3))
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """One tick: refresh what plan() returns, `concurrency` at a time"""
+        due = self.plan()
+        results = []
+        if due:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='live-jobs-refresh') as pool:
+                results = list(pool.map(self._refresh, due))
+        self.ticks += 1
+        self.refreshed += sum(result['outcome'] == 'refreshed' for result in results)
+        self.last_tick = time.time()
+        return results
+
+    def _run(self):
+        while not self._stop.wait(self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Live jobs refresh failed: {e}")
+
+    def start(self):
+        """Refresh in a background thread until stop()"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None and not self._stop.is_set(),
+            'top_k': self.top_k,
+            'interval': self.interval,
+            'ticks': self.ticks,
+            'refreshed': self.refreshed,
+            'last_tick': self.last_tick,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top-k', type=int, default=int(os.environ.get('LIVE_JOBS_REFRESH_TOP_K', '20')))
+    parser.add_argument('--interval', type=float, default=float(os.environ.get('LIVE_JOBS_REFRESH_INTERVAL', '300')),
+                        help='seconds between ticks')
+    parser.add_argument('--jitter', type=float, default=0.2, help='fraction of the interval')
+    parser.add_argument('--concurrency', type=int,
+                        default=int(os.environ.get('LIVE_JOBS_REFRESH_CONCURRENCY', '2')))
+    parser.add_argument('--once', action='store_true', help='run a single tick and exit')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='fetch from a local fake source into a temporary cache')
+    args = parser.parse_args()
+
+    cache = default_cache()
+    if cache is None:
+        parser.error('the live job cache is disabled (LIVE_JOBS_CACHE=0)')
+
+    temporary = None
+    if args.dry_run:
+        temporary = tempfile.TemporaryDirectory()
+        service = LiveJobsService([FakeJobSource()],
+                                  cache=LiveJobsCache(os.path.join(temporary.name, 'live_jobs_cache.db')))
+    else:
+        service = LiveJobsService(cache=cache)
+    refresher = LiveJobsRefresher(service, top_k=args.top_k, interval=args.interval, jitter=args.jitter,
+                                  concurrency=args.concurrency, stats_cache=cache)
+
+    while True:
+        started = time.perf_counter()
+        results = refresher.run_once()
+        for result in results:
+            print(f"{result['outcome']}: {result['query']!r} in {result['location']!r} "
+                  f"(limit {result['limit']}, score {result['score']:.1f}) in {result['seconds']}s")
+        print(f"{'Dry run: ' if args.dry_run else ''}{len(results)} of the top {args.top_k} searches due, "
+              f"tick took {time.perf_counter() - started:.1f}s")
+        if args.once or args.dry_run:
+            break
+        time.sleep(args.interval * random.uniform(1 - args.jitter, 1 + args.jitter))
+    if temporary is not None:
+        temporary.cleanup()
+
+
+if __name__ == '__main__':
+    main()
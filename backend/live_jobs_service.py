@@ -1,111 +1,508 @@
-from googlesearch import search
+"""
+Live job search across several web sources.
+
+Each source is a JobSource adapter whose blocking search() runs on a shared
+thread pool, so all sources are queried concurrently. A search waits for
+each source at most its own `timeout`, and for all of them at most the
+caller's `budget`; whatever arrived by then is merged (round robin across
+sources, duplicates by URL dropped) and the rest is ignored. Late sources
+keep their pool thread until their library-level timeout, which is set to
+the same value, expires.
+
+start_search() returns as soon as the queries are submitted, so callers can
+do other work (e.g. score the static catalog) while the sources respond.
+With a LiveJobsCache, searches answered from the cache do not wait at all;
+see live_jobs_cache.py for freshness and refreshes.
+
+With a JobStore, find_jobs() answers from the full-text index of postings
+harvested so far, and only queries the sources when it finds too few.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional
+from urllib.parse import quote
+
+from job_store import JobStore, canonical_url, stable_job_id
+from live_jobs_cache import LiveJobsCache
+
 try:
     from duckduckgo_search import DDGS
 except ImportError:
     DDGS = None
-import random
-import time
+try:
+    from googlesearch import search as google_search
+except ImportError:
+    google_search = None
 
-class LiveJobsService:
-    def __init__(self):
-        self.sources = [
-            "site:linkedin.com/jobs",
-            "site:indeed.com",
-            "site:glassdoor.com",
-            "site:naukri.com"
-        ]
-
-    def search_jobs(self, query, location="India", limit=10):
+JOB_SITES = ["linkedin.com/jobs", "indeed.com", "naukri.com", "glassdoor.com"]
+
+# `source` of the made-up postings returned when no live ones are found
+SIMULATED_SOURCE = "Simulated Feed"
+
+# Anti-Spam / Anti-Product Filter
+SPAM_KEYWORDS = ['price', 'buy', 'shop', 'store', 'cart', 'dvd', 'cd', 'toy', 'puzzle',
+                 'course', 'bootcamp', 'training', 'certificate', 'admission', 'syllabus', 'fee']
+
+
+def site_query(query: str, location: str) -> str:
+    """Stricter search query, restricted to the known job sites"""
+    sites = " OR ".join(f"site:{site}" for site in JOB_SITES)
+    return f'"{query}" internship {location} ({sites})'
+
+
+def to_job(title_text: str, href: str, location: str, snippet: str = '') -> Optional[Dict[str, Any]]:
+    """A search hit as a job, or None if it does not look like a posting"""
+    if any(x in title_text.lower() for x in SPAM_KEYWORDS):
+        return None
+    if not any(site.split('/')[0] in href for site in JOB_SITES):
+        # If not from a known job site, be very skeptical
+        if "intern" not in title_text.lower() and "job" not in title_text.lower():
+            return None
+
+    company_name = "External Source"
+
+    # Improved Company Extraction for LinkedIn/Indeed
+    if "linkedin.com" in href:
+        company_name = "LinkedIn"
+        if " at " in title_text:
+            company_name = title_text.split(" at ")[1].split(" | ")[0]
+    elif "indeed.com" in href:
+        company_name = "Indeed"
+    elif " at " in title_text:
+        company_name = title_text.split(" at ")[1].split("-")[0]
+
+    return {
+        "id": stable_job_id(href),
+        "title": title_text.replace(" | LinkedIn", "").replace(" - Indeed.com", ""),
+        "company": company_name.strip(),
+        "location": location,
+        "apply_url": href,
+        "source": "Live Web",
+        "posted_at": "Recently",
+        "snippet": snippet
+    }
+
+
+class JobSource:
+    """
+    A backend queried for live jobs. search() blocks and may raise; it runs
+    on a pool thread and is abandoned after `timeout` seconds.
+    """
+    name = 'source'
+
+    def __init__(self, timeout: float = 4.0):
+        self.timeout = timeout
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def search(self, query: str, location: str, limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class DuckDuckGoSource(JobSource):
+    name = 'duckduckgo'
+
+    @property
+    def available(self) -> bool:
+        return DDGS is not None
+
+    def search(self, query, location, limit):
+        search_query = site_query(query, location)
+        print(f"Searching DDG: {search_query}")
+        results = []
+        with DDGS(timeout=self.timeout) as ddgs:
+            # Fetch more to filter
+            for r in ddgs.text(search_query, max_results=limit * 2):
+                job = to_job(r['title'], r['href'], location, r.get('body', ''))
+                if job:
+                    results.append(job)
+                    if len(results) >= limit:
+                        break
+        return results
+
+
+class GoogleSource(JobSource):
+    name = 'google'
+
+    @property
+    def available(self) -> bool:
+        return google_search is not None
+
+    def search(self, query, location, limit):
+        results = []
+        for r in google_search(site_query(query, location), num_results=limit * 2,
+                               advanced=True, timeout=self.timeout):
+            job = to_job(r.title or '', r.url, location, r.description or '')
+            if job:
+                results.append(job)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class LiveSearch:
+    """Queries in flight for one search; results() collects them"""
+
+    # Seconds between checks for the results of a search another worker runs
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, service: 'LiveJobsService', futures: Dict[Any, JobSource],
+                 query: str, location: str, limit: int, cached: List[Dict[str, Any]] = None,
+                 awaiting: str = None):
+        self.service = service
+        self.futures = futures
+        self.query = query
+        self.location = location
+        self.limit = limit
+        # Served from the cache or job store; any futures only refresh them
+        self.cached = cached
+        # Cache key another worker holds the lease of: its results are
+        # awaited instead of querying the sources again
+        self.awaiting = awaiting
+        self.started = time.monotonic()
+
+    def results(self, budget: float = None) -> List[Dict[str, Any]]:
         """
-        Search for live jobs using DuckDuckGo/Google with strict filtering.
+        Jobs from the sources that answered within their timeout and within
+        `budget` seconds of the start of the search (no overall limit if
+        None). Falls back to simulated postings when none did.
         """
-        # Stricter Search Query
-        search_query = f'"{query}" internship {location} (site:linkedin.com/jobs OR site:indeed.com OR site:naukri.com OR site:glassdoor.com)'
-        results = []
-        
-        try:
-            # 1. Try DuckDuckGo Search
-            if DDGS:
-                print(f"Searching DDG: {search_query}")
-                with DDGS() as ddgs:
-                    # Search for jobs specifically
-                    ddg_results = list(ddgs.text(search_query, max_results=limit*2)) # Fetch more to filter
-                    
-                    for r in ddg_results:
-                        title_text = r['title']
-                        href = r['href']
-                        body = r.get('body', '').lower()
-                        
-                        # Anti-Spam / Anti-Product Filter
-                        spam_keywords = ['price', 'buy', 'shop', 'store', 'cart', 'dvd', 'cd', 'toy', 'puzzle', 
-                                       'course', 'bootcamp', 'training', 'certificate', 'admission', 'syllabus', 'fee']
-                        
-                        if any(x in title_text.lower() for x in spam_keywords):
-                            continue
-                        if "linkedin.com" not in href and "indeed.com" not in href and "naukri.com" not in href and "glassdoor.com" not in href:
-                             # If not from a known job site, be very skeptical
-                             if "intern" not in title_text.lower() and "job" not in title_text.lower():
-                                 continue
-
-                        company_name = "External Source"
-                        
-                        # Improved Company Extraction for LinkedIn/Indeed
-                        if "linkedin.com" in href:
-                            company_name = "LinkedIn"
-                            if " at " in title_text:
-                                company_name = title_text.split(" at ")[1].split(" | ")[0]
-                        elif "indeed.com" in href:
-                            company_name = "Indeed"
-                        elif " at " in title_text:
-                             company_name = title_text.split(" at ")[1].split("-")[0]
-
-                        results.append({
-                            "id": abs(hash(r['href'])),
-                            "title": title_text.replace(" | LinkedIn", "").replace(" - Indeed.com", ""),
-                            "company": company_name.strip(),
-                            "location": location,
-                            "apply_url": r['href'],
-                            "source": "Live Web",
-                            "posted_at": "Recently"
-                        })
-                        
-                        if len(results) >= limit: break
-            
-            # 2. Results Check & Simulation Fallback
-            if not results:
-                print("No valid live results found. Using High-Fidelity Simulation.")
-                titles = [
-                    f"Product Management Intern",
-                    f"Associate {query}",
-                    f"{query} Trainee",
-                    f"Strategy Intern",
-                    f"Junior {query}"
-                ]
-                companies = ["Google", "Microsoft", "Amazon", "Flipkart", "Uber", "Cred", "Razorpay"]
-                locations = ["Bangalore", "Mumbai", "Hyderabad", "Remote"]
-                
-                for i in range(5):
-                    results.append({
-                        "id": i + 100,
-                        "title": random.choice(titles),
-                        "company": random.choice(companies),
-                        "location": location if location != "India" else random.choice(locations),
-                        "apply_url": f"https://www.linkedin.com/jobs/search/?keywords={query}",
-                        "source": "Simulated Feed",
-                        "posted_at": "Just now"
-                    })
-                
-        except Exception as e:
-            print(f"Error searching jobs: {e}")
-            # Crash Fallback
-            results.append({
-                "id": 999,
-                "title": f"{query} Intern (Fallback)",
-                "company": "System Provider",
-                "location": location,
-                "apply_url": "#",
-                "source": "Offline",
-                "posted_at": "Now"
-            })
+        if self.cached is not None:
+            return self.cached or simulated_jobs(self.query, self.location)
+        if self.awaiting is not None:
+            return self._await_cached(budget)
+        overall = self.started + budget if budget is not None else float('inf')
+        deadlines = {future: min(overall, self.started + source.timeout)
+                     for future, source in self.futures.items()}
+        answered = {}
+        pending = set(self.futures)
+        while pending:
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now and not f.done()]:
+                pending.discard(future)
+                future.cancel()
+                self.service._count(self.futures[future], 'timeouts')
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=max(0.0, min(deadlines[f] for f in pending) - now),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                source = self.futures[future]
+                try:
+                    answered[source] = future.result()
+                    self.service._count(source, 'answered')
+                except Exception as e:
+                    print(f"Error searching jobs on {source.name}: {e}")
+                    self.service._count(source, 'errors')
+
+        results = self.service._merge(self.service.cache_key(self.query, self.location, self.limit),
+                                      [answered[source] for source in self.futures.values() if source in answered],
+                                      self.limit)
 
+        # Results Check & Simulation Fallback
+        if not results:
+            print("No valid live results found. Using High-Fidelity Simulation.")
+            results = simulated_jobs(self.query, self.location)
         return results
+
+    def _await_cached(self, budget: float = None) -> List[Dict[str, Any]]:
+        """
+        What the worker holding the lease caches for this search, if it does
+        within `budget` seconds of the start of the search and the sources'
+        timeout; simulated postings otherwise.
+        """
+        cache = self.service.cache
+        timeout = max((source.timeout for source in self.service.sources), default=0)
+        deadline = self.started + (timeout if budget is None else min(budget, timeout))
+        while True:
+            # Polls the expiry only, so waiting does not count as cache misses
+            if cache.expiries([self.awaiting]).get(self.awaiting, 0) >= time.time():
+                entry = cache.get(self.awaiting)
+                if entry is not None and entry[0]:
+                    return entry[0]
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(self.POLL_INTERVAL, remaining))
+        print("No live results cached in time. Using High-Fidelity Simulation.")
+        return simulated_jobs(self.query, self.location)
+
+
+class FakeJobSource(JobSource):
+    """
+    Local stand-in for a web source: `limit` made-up postings for any query,
+    after `delay` seconds. Used by the refresher's dry run; never touches
+    the network.
+    """
+    name = 'fake'
+
+    def __init__(self, timeout: float = 4.0, delay: float = 0.2):
+        super().__init__(timeout)
+        self.delay = delay
+
+    def search(self, query, location, limit):
+        time.sleep(self.delay)
+        return [{
+            "id": i,
+            "title": f"{query} ({i + 1})",
+            "company": "Dry Run",
+            "location": location,
+            "apply_url": f"https://example.invalid/jobs?q={quote(str(query))}&l={quote(str(location))}&i={i}",
+            "source": "Dry Run",
+            "posted_at": "Just now"
+        } for i in range(limit)]
+
+
+def merge_jobs(lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Round robin over per-source results in source order, so one fast source
+    cannot crowd out the rest; duplicate URLs (once canonicalized) are dropped
+    """
+    results, seen = [], set()
+    for rank in range(max((len(jobs) for jobs in lists), default=0)):
+        for jobs in lists:
+            if rank < len(jobs) and canonical_url(jobs[rank]['apply_url']) not in seen:
+                seen.add(canonical_url(jobs[rank]['apply_url']))
+                results.append(jobs[rank])
+    return results[:limit]
+
+
+def simulated_jobs(query: str, location: str) -> List[Dict[str, Any]]:
+    titles = [
+        f"Product Management Intern",
+        f"Associate {query}",
+        f"{query} Trainee",
+        f"Strategy Intern",
+        f"Junior {query}"
+    ]
+    companies = ["Google", "Microsoft", "Amazon", "Flipkart", "Uber", "Cred", "Razorpay"]
+    locations = ["Bangalore", "Mumbai", "Hyderabad", "Remote"]
+
+    results = []
+    for i in range(5):
+        results.append({
+            "id": i + 100,
+            "title": random.choice(titles),
+            "company": random.choice(companies),
+            "location": location if location != "India" else random.choice(locations),
+            "apply_url": f"https://www.linkedin.com/jobs/search/?keywords={query}",
+            "source": SIMULATED_SOURCE,
+            "posted_at": "Just now"
+        })
+    return results
+
+
+class LiveJobsService:
+    # Seconds between writes of search counts to the cache
+    RECORD_INTERVAL = 30
+
+    def __init__(self, sources: List[JobSource] = None, max_workers: int = None,
+                 cache: LiveJobsCache = None, store: JobStore = None, store_max_age: float = 6 * 3600.0):
+        if sources is None:
+            timeout = float(os.environ.get('LIVE_JOBS_SOURCE_TIMEOUT', '4'))
+            sources = [DuckDuckGoSource(timeout), GoogleSource(timeout)]
+        self.sources = [source for source in sources if source.available]
+        self.max_workers = max_workers or int(os.environ.get('LIVE_JOBS_WORKERS', '8'))
+        # Results shared by all workers (see live_jobs_cache.py), None to
+        # query the sources on every search
+        self.cache = cache
+        # Deduplicated postings with stable ids (see job_store.py), None to
+        # serve results as the sources return them. With a cache, searches it
+        # misses are answered from the store if they ran in the last
+        # store_max_age seconds, while they are refreshed in the background.
+        self.store = store
+        self.store_max_age = store_max_age
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {source.name: {'answered': 0, 'timeouts': 0, 'errors': 0} for source in self.sources}
+        self.local_stats = {'answered': 0, 'fallbacks': 0}
+        # Searches made since they were last recorded in the cache (every
+        # RECORD_INTERVAL seconds), as key -> (query, location, limit, count),
+        # for LiveJobsRefresher
+        self._searches: Dict[str, tuple] = {}
+        self._recorded_at = time.monotonic()
+
+    @staticmethod
+    def cache_key(query, location, limit) -> str:
+        return f'{str(query).strip().lower()}|{str(location).strip().lower()}|{limit}'
+
+    @property
+    def lease_seconds(self) -> float:
+        """How long a refresh may take before another worker may retry it"""
+        return 2 * max((source.timeout for source in self.sources), default=0) + 5
+
+    def record_searches(self):
+        """Add the searches made since the last call to the cache's counts"""
+        with self._lock:
+            searches, self._searches = self._searches, {}
+            self._recorded_at = time.monotonic()
+        if searches:
+            self.cache.record_searches(searches)
+
+    def _count(self, source: JobSource, outcome: str):
+        with self._lock:
+            self.stats[source.name][outcome] += 1
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='live-jobs')
+            return self._pool
+
+    def _merge(self, key: str, lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """Per-source results merged, and deduplicated through the store if any"""
+        results = merge_jobs(lists, limit)
+        if self.store is not None:
+            try:
+                results = self.store.ingest(key, results)
+            except sqlite3.Error as e:
+                print(f"Job store: ingest failed: {e}")
+        return results
+
+    def _stored(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return self.store.jobs_for(key, self.store_max_age)
+        except sqlite3.Error as e:
+            print(f"Job store: read failed: {e}")
+            return None
+
+    def _query_sources(self, query, location, limit, cache_key: str = None,
+                       cached: threading.Event = None) -> Dict[Any, JobSource]:
+        """
+        Submit the query to every source. With a cache key, the merged results
+        are cached once every source has answered, failed or been cancelled,
+        however long the caller waits for them; `cached` is set after that.
+        Nothing is cached unless at least one source answered, so a search
+        cut short by its caller's budget, or an outage, is not cached as empty.
+        """
+        pool = self._executor()
+        futures = {pool.submit(source.search, query, location, limit): source for source in self.sources}
+        if cache_key is not None and futures:
+            remaining = [len(futures)]
+            lock = threading.Lock()
+
+            def source_done(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                lists = [future.result() for future in futures
+                         if not future.cancelled() and future.exception() is None]
+                if lists:
+                    self.cache.put(cache_key, self._merge(cache_key, lists, limit))
+                else:
+                    # Let the next search (in any worker) try again
+                    self.cache.release(cache_key)
+                if cached is not None:
+                    cached.set()
+
+            for future in futures:
+                future.add_done_callback(source_done)
+        return futures
+
+    def start_search(self, query, location="India", limit=10) -> LiveSearch:
+        """
+        Query every source concurrently; collect with .results(budget).
+        Cached results are returned without waiting, and when stale they are
+        refreshed in the background by one worker. A search nobody has cached
+        is also run by one worker at a time: the others wait for its results
+        within their budget rather than query the sources too.
+        """
+        if self.cache is None:
+            return LiveSearch(self, self._query_sources(query, location, limit), query, location, limit)
+
+        key = self._note_search(query, location, limit)
+        entry = self.cache.get(key)
+        if entry is None and self.store is not None:
+            stored = self._stored(key)
+            if stored is not None:
+                entry = stored, False
+        if entry is None:
+            if self.cache.try_lease(key, self.lease_seconds) is False:
+                return LiveSearch(self, {}, query, location, limit, awaiting=key)
+            return LiveSearch(self, self._query_sources(query, location, limit, key), query, location, limit)
+        results, fresh = entry
+        futures = {}
+        if not fresh and self.cache.try_lease(key, self.lease_seconds):
+            futures = self._query_sources(query, location, limit, key)
+        return LiveSearch(self, futures, query, location, limit, cached=results)
+
+    def _note_search(self, query, location, limit) -> str:
+        """Count a search for record_searches(); returns its cache key"""
+        key = self.cache_key(query, location, limit)
+        with self._lock:
+            count = self._searches.get(key, (None, None, None, 0))[3]
+            self._searches[key] = (query, location, limit, count + 1)
+            record = time.monotonic() - self._recorded_at >= self.RECORD_INTERVAL
+            if record:
+                self._recorded_at = time.monotonic()
+        if record:
+            self._executor().submit(self.record_searches)
+        return key
+
+    def refresh(self, query, location="India", limit=10, expires_before: float = None) -> bool:
+        """
+        Query the sources and update the cache, unless another worker holds
+        the key's lease or the cached results are good until `expires_before`
+        (see LiveJobsCache.try_lease()). Waits until the results are cached
+        or the sources time out; False if nothing was refreshed.
+        """
+        key = self.cache_key(query, location, limit)
+        if not self.cache.try_lease(key, self.lease_seconds, expires_before):
+            return False
+        cached = threading.Event()
+        futures = self._query_sources(query, location, limit, key, cached)
+        if futures:
+            cached.wait(max(source.timeout for source in futures.values()))
+        return True
+
+    def search_jobs(self, query, location="India", limit=10, budget: float = None):
+        """
+        Search for live jobs on every source with strict filtering, waiting
+        at most `budget` seconds overall (each source's timeout if None).
+        """
+        return self.start_search(query, location, limit).results(budget)
+
+    def find_jobs(self, query, location="India", limit=10, min_local: int = 5, budget: float = None):
+        """
+        Search the job store's full-text index, and the sources only if it
+        finds fewer than min_local postings (or there is no index); local
+        matches are then merged with what the sources return. Local searches still
+        count towards popularity, so the refresher keeps harvesting them.
+        """
+        local = None
+        if self.store is not None:
+            try:
+                local = self.store.search(query, location, limit)
+            except sqlite3.Error as e:
+                print(f"Job store: search failed: {e}")
+        if local is not None and len(local) >= min(min_local, limit):
+            if self.cache is not None:
+                self._note_search(query, location, limit)
+            with self._lock:
+                self.local_stats['answered'] += 1
+            return local
+        with self._lock:
+            self.local_stats['fallbacks'] += 1
+
+        jobs = self.search_jobs(query, location, limit, budget)
+        if not local:
+            return jobs
+        # Offline, or every source failed: the local matches beat simulated ones
+        if all(job['source'] == SIMULATED_SOURCE for job in jobs):
+            return local
+        return merge_jobs([jobs, local], limit)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = {name: dict(counts) for name, counts in self.stats.items()}
+            if self.store is not None:
+                status['local index'] = dict(self.local_stats)
+            return status
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+_NON_WORD = re.compile(r'[^\w&]+')
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase a place name and collapse punctuation: 'Navi-Mumbai ' -> 'navi mumbai'"""
+    return ' '.join(_NON_WORD.sub(' ', str(text).lower()).split())
+
+
+class Gazetteer:
+    """
+    Offline gazetteer of Indian states, union territories and cities.
+
+    Places from data/gazetteer.json get integer ids (states first, then
+    cities, in file order). Location strings are resolved to ids once, and
+    `relation` is a precomputed (places x places) table of how two places
+    relate, as indexes into LEVELS:
+
+        same place                      SAME_PLACE
+        cities within NEARBY_KM         NEARBY
+        same state (city or state)      SAME_STATE
+        anything else                   ELSEWHERE
+
+    Scoring profiles assign a match score to each level, so one table serves
+    every profile.
+    """
+
+    LEVELS = ('same_place', 'nearby', 'same_state', 'elsewhere')
+    SAME_PLACE, NEARBY, SAME_STATE, ELSEWHERE = range(4)
+    NEARBY_KM = 60.0
+
+    # Upper bound on remembered resolutions of distinct strings
+    MAX_CACHED = 100_000
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.json')
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            print(f"Warning: {self.path} not found. Locations will be matched by name only.")
+            raw = b'{}'
+        self.version = hashlib.sha1(raw).hexdigest()[:12]
+        data = json.loads(raw)
+
+        self.names: List[str] = []
+        states: List[int] = []
+        latitudes, longitudes = [], []
+        self._ids = {}
+        for name, aliases in data.get('states', {}).items():
+            place = len(self.names)
+            self.names.append(name)
+            states.append(place)
+            latitudes.append(np.nan)
+            longitudes.append(np.nan)
+            for term in [name] + aliases:
+                self._ids.setdefault(normalize_place(term), place)
+
+        # Cities take precedence over states of the same name (Delhi, Chandigarh)
+        state_ids = {name: place for place, name in enumerate(self.names)}
+        for city in data.get('cities', []):
+            place = len(self.names)
+            self.names.append(city['name'])
+            states.append(state_ids[city['state']])
+            latitudes.append(city['lat'])
+            longitudes.append(city['lon'])
+            self._ids[normalize_place(city['name'])] = place
+            for alias in city.get('aliases', []):
+                self._ids.setdefault(normalize_place(alias), place)
+
+        self.state = np.array(states, dtype=np.int32)
+        self.is_state = self.state == np.arange(len(self.names))
+        self.relation = self._relation_table(np.radians(latitudes), np.radians(longitudes))
+        self._resolved = {}
+
+    def _relation_table(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Relation level of every pair of places"""
+        # Haversine distances between cities (NaN when either is a state)
+        dlat = latitudes[:, None] - latitudes[None, :]
+        dlon = longitudes[:, None] - longitudes[None, :]
+        a = np.sin(dlat / 2) ** 2 + np.cos(latitudes[:, None]) * np.cos(latitudes[None, :]) * np.sin(dlon / 2) ** 2
+        with np.errstate(invalid='ignore'):
+            distance_km = 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        table = np.full((len(self.names), len(self.names)), self.ELSEWHERE, dtype=np.int8)
+        table[self.state[:, None] == self.state[None, :]] = self.SAME_STATE
+        table[distance_km <= self.NEARBY_KM] = self.NEARBY
+        np.fill_diagonal(table, self.SAME_PLACE)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, location: str) -> int:
+        """
+        Place id of a location string, or -1 if unknown. Tries the whole
+        string, then each comma-separated part ('Pune, Maharashtra, India').
+        """
+        place = self._resolved.get(location)
+        if place is not None:
+            return place
+        normalized = normalize_place(location)
+        place = self._ids.get(normalized, -1)
+        if place < 0 and ',' in location:
+            for part in location.split(','):
+                place = self._ids.get(normalize_place(part), -1)
+                if place >= 0:
+                    break
+        if len(self._resolved) < self.MAX_CACHED:
+            self._resolved[location] = place
+        return place
+
+    def name(self, place: int) -> str:
+        return self.names[place]
+
+
+_default_gazetteer = None
+_default_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer shared by the recommender and its catalogs"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        with _default_lock:
+            if _default_gazetteer is None:
+                _default_gazetteer = Gazetteer()
+    return _default_gazetteer
@@ -0,0 +1,184 @@
+"""
+Market statistics for the dashboard, computed in the background.
+
+A snapshot counts live opportunities (postings found by LiveJobsService,
+simulated ones excluded) for the catalog's largest sectors and locations,
+next to the catalog's own counts:
+
+    {
+      "snapshot_at": "2026-01-01T00:00:00+00:00",
+      "live_opportunities": 87,            # distinct postings across all searches
+      "catalog_internships": 3000,
+      "by_sector":   {"Finance and Economics": {"catalog": 120, "live": 14}, ...},
+      "by_location": {"Mumbai": {"catalog": 310, "live": 9}, ...}
+    }
+
+Snapshots are written atomically to data/market_stats.json. Every worker
+serves the one in memory and picks up newer files written by others; the
+worker that finds the snapshot older than `interval` and gets the lock file
+computes the next one. Run `python market_stats.py` (from the backend
+directory) to compute one by hand.
+"""
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from live_jobs_service import LiveJobsService, SIMULATED_SOURCE
+from recommendation_engine import RecommendationEngine
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, every worker computes
+    fcntl = None
+
+
+class MarketStats:
+    # Seconds between checks for a snapshot written by another worker
+    RELOAD_CHECK_INTERVAL = 5
+
+    def __init__(self, engine: RecommendationEngine, live_jobs: LiveJobsService, path: str = None,
+                 interval: float = 1800.0, top_sectors: int = 6, top_locations: int = 5):
+        self.engine = engine
+        self.live_jobs = live_jobs
+        self.path = path or os.path.join(os.path.dirname(__file__), 'data', 'market_stats.json')
+        self.interval = interval
+        self.top_sectors = top_sectors
+        self.top_locations = top_locations
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._thread = None
+        # One-off computation started by pending()
+        self._once = None
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.last_error = None
+        self._load()
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read market stats from {self.path}: {e}")
+            return
+        self._snapshot, self._mtime = snapshot, mtime
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """The latest snapshot, or None before the first one is computed"""
+        now = time.monotonic()
+        if now - self._last_check >= self.RELOAD_CHECK_INTERVAL:
+            self._last_check = now
+            with self._lock:
+                self._load()
+        return self._snapshot
+
+    def pending(self) -> Dict[str, Any]:
+        """
+        Placeholder until the first snapshot, flagged pending. Unless this
+        worker is already keeping snapshots up to date, one is computed in the
+        background (see maybe_compute()), so the caller never waits on a
+        web search.
+        """
+        with self._lock:
+            running = any(thread is not None and thread.is_alive() for thread in (self._thread, self._once))
+            if not running:
+                self._once = threading.Thread(target=self.maybe_compute, daemon=True)
+                self._once.start()
+        return {'pending': True, 'snapshot_at': None, 'live_opportunities': None,
+                'by_sector': {}, 'by_location': {}}
+
+    def _live_count(self, query: str, location: str, seen: set) -> int:
+        jobs = [job for job in self.live_jobs.search_jobs(query, location, limit=50)
+                if job.get('source') != SIMULATED_SOURCE]
+        seen.update(job['apply_url'] for job in jobs)
+        return len(jobs)
+
+    def compute(self) -> Dict[str, Any]:
+        """Compute, persist and return a new snapshot"""
+        search = self.engine.search_internships(limit=0)
+        facets = search['facets']
+        seen = set()
+        by_sector, by_location = {}, {}
+        for item in facets['sector'][:self.top_sectors]:
+            by_sector[item['value']] = {'catalog': item['count'],
+                                        'live': self._live_count(f"{item['value']} Intern", "India", seen)}
+        for item in facets['location'][:self.top_locations]:
+            by_location[item['value']] = {'catalog': item['count'],
+                                          'live': self._live_count("Intern", item['value'], seen)}
+        # The dashboard's original headline search
+        self._live_count("Product Manager", "India", seen)
+
+        snapshot = {
+            'snapshot_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'live_opportunities': len(seen),
+            'catalog_internships': search['total'],
+            'by_sector': by_sector,
+            'by_location': by_location,
+        }
+        temporary = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.path)
+        with self._lock:
+            self._snapshot, self._mtime = snapshot, os.stat(self.path).st_mtime
+        self.computations += 1
+        return snapshot
+
+    def _due(self) -> bool:
+        try:
+            return time.time() - os.stat(self.path).st_mtime >= self.interval
+        except FileNotFoundError:
+            return True
+
+    def maybe_compute(self) -> bool:
+        """Compute a snapshot if the persisted one is older than interval and no other worker is on it"""
+        if not self._due():
+            return False
+        with open(self.path + '.lock', 'ab') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            # Another worker may have finished one while we waited
+            if not self._due():
+                return False
+            try:
+                self.compute()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Market stats computation failed: {e}")
+                return False
+        return True
+
+    def _run(self):
+        while True:
+            self.maybe_compute()
+            # Jitter keeps workers started together from checking in lockstep
+            time.sleep(min(self.interval, 60) * random.uniform(0.8, 1.2))
+
+    def start(self):
+        """Keep the snapshot up to date from a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+
+if __name__ == '__main__':
+    from live_jobs_cache import default_cache
+    started = time.perf_counter()
+    stats = MarketStats(RecommendationEngine(), LiveJobsService(cache=default_cache()))
+    snapshot = stats.compute()
+    print(json.dumps(snapshot, ensure_ascii=False, indent=2))
+    print(f"Market stats written to {stats.path} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,58 @@
+"""
+Rank stored candidate profiles for each internship and store the top K in
+the internship_matches table, where /api/internships/<id>/candidates reads
+them with one primary key lookup.
+
+Usage (from the backend directory):
+
+    python match_candidates.py                      # every internship
+    python match_candidates.py --internship 12 --internship 15 --top-k 100
+
+Profiles are streamed from user_profiles in pages, so memory does not grow
+with the number of candidates. Rerun it (e.g. nightly) after profiles or the
+catalog change; each run replaces the stored results of the internships it
+ranks.
+"""
+import argparse
+import time
+from typing import List, Dict, Any
+
+from database import Database
+from recommendation_engine import RecommendationEngine
+
+# Internships ranked per pass over the profiles. Each pass reads every
+# profile once; larger groups mean fewer passes but wider score matrices.
+INTERNSHIPS_PER_PASS = 20000
+
+
+def match_candidates(db: Database, engine: RecommendationEngine, internship_ids: List[Any] = None,
+                     top_k: int = 50, scoring_profile: str = None) -> Dict[Any, List[Dict[str, Any]]]:
+    """Rank and store the top K candidates of the given internships (all if None)"""
+    if internship_ids is None:
+        internship_ids = [internship['id'] for internship in engine.get_all_internships()]
+    profile = engine.scoring_profiles.get(scoring_profile)
+    results = {}
+    for start in range(0, len(internship_ids), INTERNSHIPS_PER_PASS):
+        ids = internship_ids[start:start + INTERNSHIPS_PER_PASS]
+        matches = engine.rank_candidates(db.iter_candidate_profiles(), ids, top_k, profile.name)
+        db.save_internship_matches(matches, engine.catalog.version, profile.name)
+        results.update(matches)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--internship', action='append', help='internship id (repeatable), all if omitted')
+    parser.add_argument('--top-k', type=int, default=50)
+    parser.add_argument('--scoring-profile', help='scoring profile name, the default one if omitted')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = RecommendationEngine()
+    results = match_candidates(Database(), engine, args.internship, args.top_k, args.scoring_profile)
+    print(f"Stored top {args.top_k} candidates for {len(results)} internships "
+          f"(catalog {engine.catalog.version}) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
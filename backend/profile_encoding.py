@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+from typing import List, Dict, Any, Optional
+
+from location_gazetteer import Gazetteer, get_gazetteer
+from skill_vocabulary import SkillVocabulary, get_skill_vocabulary
+
+# Bump when the layout of encoded profiles changes
+ENCODING_FORMAT = 1
+
+
+class ProfileEncoder:
+    """
+    Compact encoding of the fields a candidate profile is matched on, with
+    all text normalization done up front:
+
+        education    lowercased education
+        skills       sorted vocabulary ids of dictionary skills
+        new_skills   canonical names of skills outside the dictionary
+        interests    lowercased interests
+        location     lowercased location
+        place        its gazetteer place id (-1 if unknown)
+        experience   the previous_experience flag
+
+    Vocabulary ids and place ids are only meaningful for the vocabulary and
+    gazetteer they came from, so every encoding records `version`, derived
+    from both; current() re-encodes anything older. Encodings do not depend
+    on the catalog, so stored ones survive catalog reloads.
+    """
+
+    def __init__(self, vocabulary: SkillVocabulary = None, gazetteer: Gazetteer = None):
+        self.vocabulary = vocabulary or get_skill_vocabulary()
+        self.gazetteer = gazetteer or get_gazetteer()
+        key = f'{ENCODING_FORMAT}:{self.vocabulary.version}:{self.gazetteer.version}'
+        self.version = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+    def encode(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        skills, new_skills = [], []
+        for name in self.vocabulary.canonicalize_all(profile.get('skills') or []):
+            skill_id = self.vocabulary.known_id(name)
+            if skill_id is None:
+                new_skills.append(name)
+            else:
+                skills.append(skill_id)
+        location = (profile.get('location') or '').lower()
+        return {
+            'version': self.version,
+            'education': (profile.get('education') or '').lower(),
+            'skills': sorted(skills),
+            'new_skills': sorted(new_skills),
+            'interests': [i.lower() for i in profile.get('interests') or []],
+            'location': location,
+            'place': self.gazetteer.resolve(location),
+            'experience': profile.get('previous_experience', False),
+        }
+
+    def is_current(self, encoded: Optional[Dict[str, Any]]) -> bool:
+        return encoded is not None and encoded.get('version') == self.version
+
+    def current(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """A profile's 'encoded' fields if made with this version, otherwise a fresh encoding"""
+        encoded = profile.get('encoded')
+        return encoded if self.is_current(encoded) else self.encode(profile)
+
+    def skill_names(self, encoded: Dict[str, Any]) -> List[str]:
+        """Canonical names of an encoding's skills"""
+        return [self.vocabulary.name(skill_id) for skill_id in encoded['skills']] + encoded['new_skills']
+
+    @staticmethod
+    def dumps(encoded: Dict[str, Any]) -> str:
+        return json.dumps(encoded, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def loads(text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """A stored encoding, or None if missing or unreadable"""
+        if not text:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+_default_encoder = None
+_default_lock = threading.Lock()
+
+
+def get_profile_encoder() -> ProfileEncoder:
+    """Process-wide encoder over the shared vocabulary and gazetteer"""
+    global _default_encoder
+    if _default_encoder is None:
+        with _default_lock:
+            if _default_encoder is None:
+                _default_encoder = ProfileEncoder()
+    return _default_encoder
@@ -0,0 +1,184 @@
+"""
+Write-behind persistence of the profiles sent to /api/recommend.
+
+submit() returns without touching the database. A profile identical to the
+last one written (or queued) for that user is skipped; otherwise it replaces
+whatever is queued for the user, so repeated changes coalesce into one
+write. A background thread writes the queue in batches, one transaction per
+batch, every flush_interval seconds or as soon as batch_size users are
+queued.
+
+Durability: a submitted profile is in memory only until its batch commits.
+flush() writes everything queued and is registered with atexit, so a clean
+shutdown (including gunicorn's SIGTERM) loses nothing; a crash or SIGKILL
+loses at most the last flush_interval seconds of profile updates. Failed
+batches stay queued and are retried on the next flush, unless a newer
+profile for the user was submitted meanwhile. When max_pending users are
+queued (e.g. while the database is down), or with write_behind=False,
+submit() writes synchronously instead, still skipping unchanged profiles.
+
+Writes made directly (save_now()) take the same lock as batches, so a queued
+profile never overwrites a newer explicit save. Change detection is per
+process: with several workers, each writes a user's first profile once.
+"""
+import atexit
+import hashlib
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+from database import Database
+
+
+def profile_hash(profile: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(profile, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ProfileWriter:
+    def __init__(self, db: Database, flush_interval: float = 1.0, batch_size: int = 500,
+                 max_pending: int = 10000, remember: int = 100000, write_behind: bool = True):
+        self.db = db
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.remember = remember
+        # user -> (profile, encoded, hash), in submission order
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        # user -> hash of the last profile written, least recent first
+        self._written: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        # Held while writing, so writes reach the database in order
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self.submitted = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        atexit.register(self.close)
+
+    def submit(self, user_id: Any, profile: Dict[str, Any], encoded: Dict[str, Any] = None) -> bool:
+        """Queue a profile for writing; False if it was skipped as unchanged"""
+        user, digest = str(user_id), profile_hash(profile)
+        entry = (profile, encoded, digest)
+        with self._lock:
+            self.submitted += 1
+            queued = self._pending.get(user)
+            last = queued[2] if queued is not None else self._written.get(user)
+            if last == digest:
+                self.skipped += 1
+                return False
+            if queued is not None:
+                self.coalesced += 1
+                del self._pending[user]
+            synchronous = not self.write_behind or self._stopped or len(self._pending) >= self.max_pending
+            self._pending[user] = entry
+            if not synchronous:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                if len(self._pending) >= self.batch_size:
+                    self._wake.notify()
+        if synchronous and not self._write({user: entry}):
+            # Not kept for a retry, as with a direct save_user_profile()
+            with self._lock:
+                if self._pending.get(user) is entry:
+                    del self._pending[user]
+        return True
+
+    def save_now(self, user_id: Any, profile: Dict[str, Any], encoded: Dict[str, Any] = None) -> bool:
+        """Write a profile synchronously, replacing anything queued for the user"""
+        user = str(user_id)
+        with self._write_lock:
+            with self._lock:
+                self._pending.pop(user, None)
+                # A profile saved here need not match what /api/recommend sends
+                # next, so the next submit() always writes
+                self._written.pop(user, None)
+            saved = self.db.save_user_profile(user_id, profile, encoded)
+        return saved
+
+    def sync(self, user_id: Any):
+        """Write the user's queued profile now, if any, for reads that must see it"""
+        with self._lock:
+            queued = self._pending.get(str(user_id))
+        if queued is not None:
+            self._write({str(user_id): queued})
+
+    def _take(self) -> Dict[str, tuple]:
+        """
+        The oldest batch_size queued entries. They stay queued until written,
+        so anything that replaces or removes them meanwhile wins.
+        """
+        return OrderedDict(itertools.islice(self._pending.items(), self.batch_size))
+
+    def _write(self, batch: Dict[str, tuple]) -> bool:
+        with self._write_lock:
+            with self._lock:
+                # Skip entries superseded or written since the batch was taken
+                batch = {user: entry for user, entry in batch.items() if self._pending.get(user) is entry}
+            if not batch:
+                return True
+            saved = self.db.save_user_profiles([(int(user) if user.isdigit() else user, profile, encoded)
+                                                for user, (profile, encoded, _) in batch.items()])
+            with self._lock:
+                if not saved:
+                    # Still queued, retried on the next flush
+                    self.failures += 1
+                    return False
+                self.written += saved
+                self.batches += 1
+                for user, entry in batch.items():
+                    if self._pending.get(user) is entry:
+                        del self._pending[user]
+                    self._written[user] = entry[2]
+                    self._written.move_to_end(user)
+                while len(self._written) > self.remember:
+                    self._written.popitem(last=False)
+                return True
+
+    def flush(self) -> bool:
+        """Write everything queued now; False if a batch failed (it stays queued)"""
+        while True:
+            with self._lock:
+                batch = self._take()
+            if not batch:
+                return True
+            if not self._write(batch):
+                return False
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._lock:
+                if not self._stopped and (failed or len(self._pending) < self.batch_size):
+                    self._wake.wait(self.flush_interval)
+                if self._stopped:
+                    return
+                batch = self._take()
+            failed = bool(batch) and not self._write(batch)
+
+    def close(self):
+        """Stop the background thread and flush; later submits write synchronously"""
+        with self._lock:
+            self._stopped = True
+            self._wake.notify()
+        self.flush()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'submitted': self.submitted,
+                'skipped_unchanged': self.skipped,
+                'coalesced': self.coalesced,
+                'written': self.written,
+                'batches': self.batches,
+                'failures': self.failures,
+            }
@@ -1,111 +1,544 @@
+import contextlib
+import hashlib
+import itertools
 import json
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from catalog_delta import CatalogDelta, CatalogJournal, validate_internship
+from catalog_index import CatalogIndex
+from catalog_store import open_artifact, write_artifact
+from facet_index import FacetIndex
+from location_gazetteer import get_gazetteer
+from profile_encoding import get_profile_encoder
+from semantic_index import tokenize
+from recommendation_cache import RecommendationCache
+from scoring_profiles import ScoringProfile, get_scoring_profiles
+from skill_vocabulary import get_skill_vocabulary
+
+# Percentages between t / 10 and (t + 1) / 10, as floats, and whether
+# round(percentage, 1) rounds each of them up; see RecommendationEngine._tenths
+_MIDPOINTS = (2 * np.arange(1001) + 1) / 20
+_ROUNDS_UP_AT_MIDPOINT = np.array([round(round(midpoint, 1) * 10) > t
+                                   for t, midpoint in enumerate(_MIDPOINTS.tolist())])
 
 class RecommendationEngine:
     """Lightweight rule-based recommendation engine for internships"""
+
+    # Factor weights and partial-match scores come from a scoring profile
+    # (see scoring_profiles.py), selectable per request.
+
+    # Free-text similarity between a profile's bio and internship titles and
+    # descriptions. Only profiles with a bio get this extra factor (and the
+    # larger total weight); the SEMANTIC_NEIGHBOURS most similar internships
+    # get their cosine similarity, all others 0.
+    SEMANTIC_NEIGHBOURS = 200
+
+    # Score the whole catalog instead of indexed candidates once more than
+    # this fraction of it shares a skill, sector or location with the profile
+    CANDIDATE_PRUNING_MAX_FRACTION = 0.25
+
+    # Upper bound on the size of one (candidates x internships) score matrix
+    # in recommend_many(); 2M float64 cells is about 16 MB per intermediate
+    BATCH_MAX_CELLS = 2_000_000
+
+    # Larger requests are computed every time instead of filling the
+    # recommendation cache with long result lists
+    CACHE_MAX_TOP_N = 50
+
+    # Largest user id rank_candidates() can pack into a ranking key
+    MAX_USER_ID = 2 ** 32 - 1
     
-    def __init__(self):
-        self.internships_file = os.path.join(os.path.dirname(__file__), 'data', 'internships.json')
-        self.internships = self._load_internships()
-    
-    def _load_internships(self) -> List[Dict[str, Any]]:
-        """Load internships data from JSON file"""
+    def __init__(self, internships_file: Optional[str] = None, use_artifact: bool = True,
+                 use_journal: bool = True):
+        self.internships_file = internships_file or os.path.join(os.path.dirname(__file__), 'data', 'internships.json')
+
+        # Compiled columnar catalog (see catalog_store.py), mapped instead of
+        # parsing the JSON file when it was built from the current version
+        self.artifact_file = None
+        if use_artifact:
+            self.artifact_file = (os.environ.get('CATALOG_ARTIFACT')
+                                  or os.path.splitext(self.internships_file)[0] + '.catalog')
+
+        # Postings added, updated or expired through the mutation API are
+        # appended to a journal next to the catalog file and replayed by every
+        # worker (see catalog_delta.py). Once CATALOG_COMPACT_THRESHOLD changes
+        # have accumulated, they are folded into the catalog file in the
+        # background.
+        self.journal = None
+        if use_journal:
+            self.journal = CatalogJournal(os.path.splitext(self.internships_file)[0] + '.journal')
+        self.compact_threshold = int(os.environ.get('CATALOG_COMPACT_THRESHOLD', '1000'))
+        self.compactions = 0
+        self._compacting = threading.Lock()
+
+        self.vocabulary = get_skill_vocabulary()
+        self.gazetteer = get_gazetteer()
+        self.encoder = get_profile_encoder()
+        self.scoring_profiles = get_scoring_profiles()
+
+        # Seconds between cheap mtime/size checks of the catalog file
+        # (0 disables hot reloading)
+        self.reload_check_interval = float(os.environ.get('CATALOG_RELOAD_INTERVAL', '2'))
+        self.reload_count = 0
+        self.last_reload_error = None
+        self._failed_signature = None
+        self._last_reload_check = time.monotonic()
+        self._reload_lock = threading.Lock()
+
+        # Opt-in parallel scoring: with SCORING_SHARDS > 1, recommend() splits
+        # the rows it scores into that many shards once there are at least
+        # SCORING_SHARD_MIN_ROWS of them, and scores the shards on threads
+        self.scoring_shards = int(os.environ.get('SCORING_SHARDS', '1'))
+        self.shard_min_rows = int(os.environ.get('SCORING_SHARD_MIN_ROWS', '200000'))
+        self._shard_pool = None
+        self._shard_pool_lock = threading.Lock()
+
+        # Results of recent recommend() calls by profile fingerprint
+        # (RECOMMENDATION_CACHE_SIZE=0 disables the cache)
+        self.cache = RecommendationCache(
+            max_entries=int(os.environ.get('RECOMMENDATION_CACHE_SIZE', '1024')),
+            ttl_seconds=float(os.environ.get('RECOMMENDATION_CACHE_TTL', '300')))
+
         try:
-            with open(self.internships_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            base = self._load_catalog()
         except FileNotFoundError:
             print(f"Warning: {self.internships_file} not found. Using empty list.")
-            return []
+            base = self._stamp(CatalogIndex([], self.vocabulary), (None, None), '', time.perf_counter())
+        self._set_base(base)
+
+    @property
+    def internships(self) -> List[Dict[str, Any]]:
+        return self._live_internships(self.catalog)
+
+    @staticmethod
+    def _file_signature(path: Optional[str]) -> Optional[Tuple[int, int]]:
+        """(mtime, size) of a file, or None if it is missing"""
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _catalog_signature(self) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """Signatures of the catalog file and of its compiled artifact"""
+        return self._file_signature(self.internships_file), self._file_signature(self.artifact_file)
+
+    def _load_catalog(self) -> CatalogIndex:
+        """Load the internships catalog and build all derived structures"""
+        started = time.perf_counter()
+        signature = self._catalog_signature()
+        if signature[1] is not None:
+            catalog = open_artifact(self.artifact_file, signature[0], self.vocabulary.version)
+            if catalog is not None:
+                return self._stamp(catalog, signature, catalog.version, started)
+            print(f"Warning: {self.artifact_file} is stale, loading {self.internships_file}")
+
+        with open(self.internships_file, 'rb') as f:
+            raw = f.read()
+        internships = json.loads(raw)
+        return self._stamp(CatalogIndex(internships, self.vocabulary), signature, hashlib.sha1(raw).hexdigest()[:12], started)
+
+    @staticmethod
+    def _stamp(catalog: CatalogIndex, signature, version: str, started: float) -> CatalogIndex:
+        """Record where a catalog came from and how long it took to load"""
+        catalog.signature = signature
+        catalog.version = version
+        catalog.loaded_at = time.time()
+        catalog.load_seconds = time.perf_counter() - started
+        return catalog
+
+    def reload(self) -> bool:
+        """
+        Rebuild the catalog from disk and swap it in.
+
+        The new CatalogIndex is fully built before it replaces self.catalog in
+        a single reference assignment, and request handlers take one reference
+        to the catalog up front, so in-flight requests keep using the old
+        catalog and never see a partially built one. On failure the current
+        catalog stays in place.
+        """
+        with self._reload_lock:
+            return self._swap_catalog()
+
+    def _swap_catalog(self) -> bool:
+        try:
+            base = self._load_catalog()
+        except Exception as e:
+            print(f"Catalog reload failed, keeping version {self.catalog.version}: {e}")
+            self.last_reload_error = str(e)
+            self._failed_signature = self._catalog_signature()
+            return False
+        self._set_base(base)
+        self.reload_count += 1
+        self.last_reload_error = None
+        print(f"Catalog reloaded: version {self.catalog.version}, {base.size} internships "
+              f"in {base.load_seconds:.3f}s")
+        return True
+
+    def _set_base(self, base: CatalogIndex):
+        """Serve a freshly loaded catalog with the whole journal replayed onto it"""
+        self._delta = CatalogDelta(base)
+        if self.journal is not None:
+            self.journal.reset()
+            self._apply_entries(self.journal.read_new())
+        self.catalog = self._delta.snapshot(self.vocabulary)
+
+    def _index_error(self, internships: List[Dict[str, Any]]) -> Optional[str]:
+        """Why the postings cannot be indexed, or None if they can"""
+        try:
+            CatalogIndex(internships, self.vocabulary, semantic_base=self._delta.base.semantic)
+        except (AttributeError, TypeError, ValueError) as e:
+            return f"{type(e).__name__}: {e}"
+        return None
+
+    def _apply_entries(self, entries: List[Dict[str, Any]]):
+        valid = []
+        for entry in entries:
+            try:
+                if entry['op'] == 'upsert':
+                    entry = dict(entry, internship=validate_internship(entry['internship']))
+                valid.append(entry)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Warning: skipping invalid journal entry {entry!r}: {e}")
+        # Entries that would fail the snapshot are skipped, not served; they
+        # are checked one by one only if the batch fails
+        upserts = [entry['internship'] for entry in valid if entry['op'] == 'upsert']
+        if upserts and self._index_error(upserts) is not None:
+            checked = []
+            for entry in valid:
+                error = self._index_error([entry['internship']]) if entry['op'] == 'upsert' else None
+                if error is None:
+                    checked.append(entry)
+                else:
+                    print(f"Warning: skipping journal entry that cannot be indexed {entry!r}: {error}")
+            valid = checked
+        for entry in valid:
+            try:
+                self._delta.apply(entry)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Warning: skipping invalid journal entry {entry!r}: {e}")
+
+    def _follow_journal(self):
+        """Apply the entries other workers appended since the last read"""
+        entries = self.journal.read_new()
+        if entries:
+            self._apply_entries(entries)
+            self.catalog = self._delta.snapshot(self.vocabulary)
+
+    def _catch_up(self):
+        """Bring the catalog up to date with disk; called with the reload lock held"""
+        if self._catalog_signature() != self.catalog.signature or (
+                self.journal is not None and self.journal.replaced()):
+            # Another worker compacted (or the file was replaced): entries
+            # folded into the new file may not have been read yet
+            self._swap_catalog()
+        elif self.journal is not None:
+            self._follow_journal()
+
+    def _background_reload(self):
+        try:
+            self._swap_catalog()
+        finally:
+            self._reload_lock.release()
+
+    def _background_follow(self):
+        try:
+            self._catch_up()
+        finally:
+            self._reload_lock.release()
+
+    def maybe_reload(self):
+        """
+        Start a background reload if the catalog file changed on disk, or
+        catch up with the journal if other workers appended to it.
+
+        Called on every request; the stat() is throttled to once per
+        reload_check_interval and at most one reload runs at a time.
+        """
+        if self.reload_check_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_reload_check < self.reload_check_interval:
+            return
+        self._last_reload_check = now
+
+        signature = self._catalog_signature()
+        if signature[0] is not None and signature not in (self.catalog.signature, self._failed_signature):
+            target = self._background_reload
+        elif self.journal is not None and self.journal.pending():
+            target = self._background_follow
+        else:
+            return
+        if self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=target, daemon=True).start()
+
+    @contextlib.contextmanager
+    def _mutation(self):
+        """
+        Up-to-date delta to validate a change against before writing it.
+
+        The journal's write lock is held throughout, so no other worker can
+        append in between (e.g. assign the same new id).
+        """
+        with self._reload_lock:
+            with self.journal.locked() if self.journal is not None else contextlib.nullcontext():
+                self._catch_up()
+                yield self._delta
+
+    def _write(self, entry: Dict[str, Any]):
+        """
+        Record one change and serve it; called inside _mutation(). Raises
+        ValueError, before anything is written, for a posting that cannot be
+        indexed.
+        """
+        if entry['op'] == 'upsert':
+            error = self._index_error([entry['internship']])
+            if error is not None:
+                raise ValueError(f"Invalid internship: {error}")
+        if self.journal is None:
+            self._delta.apply(entry)
+            self.catalog = self._delta.snapshot(self.vocabulary)
+        else:
+            self.journal.append(entry)
+            self._follow_journal()
+
+    def add_internship(self, internship: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a posting, visible to every worker once it has read the journal.
+        An integer id is assigned if the posting has none. Raises ValueError
+        if a posting with its id exists, or a field has the wrong type (see
+        validate_internship()).
+        """
+        internship = dict(internship)
+        with self._mutation() as delta:
+            if internship.get('id') is None:
+                internship['id'] = delta.next_id()
+            internship = validate_internship(internship)
+            if delta.get(internship['id']) is not None:
+                raise ValueError(f"Internship {internship['id']} already exists")
+            self._write({'op': 'upsert', 'internship': internship})
+        self._maybe_compact()
+        return internship
+
+    def update_internship(self, internship_id: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Change fields of a posting (not its id). Raises KeyError if it does
+        not exist, ValueError if a field has the wrong type.
+        """
+        with self._mutation() as delta:
+            current = delta.get(internship_id)
+            if current is None:
+                raise KeyError(f"Internship {internship_id} not found")
+            internship = dict(current, **changes)
+            internship['id'] = current['id']
+            internship = validate_internship(internship)
+            self._write({'op': 'upsert', 'internship': internship})
+        self._maybe_compact()
+        return internship
+
+    def expire_internship(self, internship_id: Any):
+        """Remove a posting from recommendations and search. Raises KeyError if it does not exist"""
+        with self._mutation() as delta:
+            current = delta.get(internship_id)
+            if current is None:
+                raise KeyError(f"Internship {internship_id} not found")
+            self._write({'op': 'expire', 'id': current['id']})
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.journal is None or self._delta.changes < self.compact_threshold:
+            return
+        if self._compacting.acquire(blocking=False):
+            threading.Thread(target=self._background_compact, daemon=True).start()
+
+    def _background_compact(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Catalog compaction failed: {e}")
+        finally:
+            self._compacting.release()
+
+    def compact(self) -> bool:
+        """
+        Fold the journal into the catalog file and its artifact.
+
+        The live postings are written and indexed outside the reload lock, so
+        requests and mutations carry on meanwhile; the files are then swapped
+        in by rename and the journal keeps only the entries appended since.
+        Only one process compacts at a time. Returns whether it compacted.
+        """
+        if self.journal is None:
+            return False
+        with self.journal.compaction_lock() as acquired:
+            if not acquired:
+                return False
+            with self._reload_lock:
+                self._catch_up()
+                delta = self._delta.freeze()
+                offset, identity = self.journal.offset, self.journal.identity
+            if delta.changes == 0:
+                return False
+
+            started = time.perf_counter()
+            records = delta.live_records()
+            raw = json.dumps(records, indent=2, ensure_ascii=False).encode('utf-8')
+            json_tmp = f"{self.internships_file}.tmp{os.getpid()}"
+            with open(json_tmp, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            base = CatalogIndex(records, self.vocabulary)
+            version = hashlib.sha1(raw).hexdigest()[:12]
+            artifact_tmp = None
+            if self.artifact_file:
+                # The rename keeps the mtime the artifact is matched against
+                artifact_tmp = f"{self.artifact_file}.compact{os.getpid()}"
+                write_artifact(artifact_tmp, base, self._file_signature(json_tmp), version)
+
+            with self._reload_lock:
+                if self._catalog_signature() != delta.base.signature:
+                    # Replaced by hand while compacting; its reload wins
+                    for path in (json_tmp, artifact_tmp):
+                        if path:
+                            os.remove(path)
+                    return False
+                os.replace(json_tmp, self.internships_file)
+                if artifact_tmp:
+                    os.replace(artifact_tmp, self.artifact_file)
+                self.journal.truncate_to(offset, identity)
+                self._set_base(self._stamp(base, self._catalog_signature(), version, started))
+                self.compactions += 1
+        print(f"Catalog compacted: version {version}, {base.size} internships "
+              f"in {time.perf_counter() - started:.3f}s")
+        return True
+
+    def catalog_status(self) -> Dict[str, Any]:
+        """Version and reload state of the catalog served by this process"""
+        catalog = self.catalog
+        delta = self._delta
+        return {
+            'version': catalog.version,
+            'internships': self._live_size(catalog),
+            'loaded_at': datetime.fromtimestamp(catalog.loaded_at, timezone.utc).isoformat(),
+            'load_seconds': round(catalog.load_seconds, 4),
+            'mapped': not isinstance(catalog.internships, list),
+            'reloads': self.reload_count,
+            'reloading': self._reload_lock.locked(),
+            'last_error': self.last_reload_error,
+            'pending_changes': delta.changes,
+            'journal_entries': delta.applied,
+            'compactions': self.compactions,
+            'compacting': self._compacting.locked(),
+            'pid': os.getpid(),
+            'cache': self.cache.stats(),
+        }
+
+    @staticmethod
+    def _segments(catalog: CatalogIndex) -> List[Tuple[CatalogIndex, int]]:
+        """
+        (index, first global row) of each part of a catalog: the base, and
+        the index of postings changed since if it is a snapshot. Global rows
+        number the delta's rows after the base's.
+        """
+        if catalog.delta is None:
+            return [(catalog, 0)]
+        return [(catalog, 0), (catalog.delta, catalog.size)]
+
+    @staticmethod
+    def _record(catalog: CatalogIndex, row: int) -> Dict[str, Any]:
+        if row < catalog.size:
+            return catalog.internships[row]
+        return catalog.delta.internships[row - catalog.size]
+
+    @staticmethod
+    def _live_size(catalog: CatalogIndex) -> int:
+        return catalog.size - catalog.expired + (catalog.delta.size if catalog.delta is not None else 0)
+
+    @staticmethod
+    def _live_internships(catalog: CatalogIndex) -> List[Dict[str, Any]]:
+        if catalog.alive is None:
+            internships = list(catalog.internships)
+        else:
+            internships = [catalog.internships[row] for row in np.flatnonzero(catalog.alive).tolist()]
+        if catalog.delta is not None:
+            internships.extend(catalog.delta.internships)
+        return internships
     
-    def _calculate_similarity_score(self, candidate: Dict[str, Any], internship: Dict[str, Any]) -> float:
+    def _location_score(self, candidate_location: str, internship_location: str,
+                        profile: ScoringProfile) -> float:
+        """Location match for lowercased locations, ignoring remote availability"""
+        candidate_place = self.gazetteer.resolve(candidate_location)
+        internship_place = self.gazetteer.resolve(internship_location)
+        if candidate_place >= 0 and internship_place >= 0:
+            return float(profile.location_levels[self.gazetteer.relation[candidate_place, internship_place]])
+        return profile.location_match(candidate_location, internship_location)
+
+    def _calculate_similarity_score(self, candidate: Dict[str, Any], internship: Dict[str, Any],
+                                    profile: ScoringProfile = None) -> float:
         """
         Calculate similarity score between candidate profile and internship
-        Uses weighted scoring based on multiple factors
+        Uses weighted scoring based on multiple factors, weighted by a scoring
+        profile (the default one if not given)
+
+        This is the reference implementation of the scoring formula; recommend()
+        uses the vectorized equivalent in _score_catalog().
         """
+        profile = profile or self.scoring_profiles.get()
         score = 0.0
         total_weight = 0.0
         
-        # 1. Education Level Match (Weight: 0.25)
-        education_weight = 0.25
-        candidate_edu = candidate.get('education', '').lower()
-        internship_edu = internship.get('required_education', '').lower()
-        
-        if candidate_edu == internship_edu or internship_edu == 'any':
-            score += education_weight * 1.0
-        elif 'graduate' in candidate_edu and 'graduate' in internship_edu:
-            score += education_weight * 0.8
-        elif 'undergraduate' in candidate_edu and 'undergraduate' in internship_edu:
-            score += education_weight * 0.8
-        total_weight += education_weight
+        # 1. Education Level Match
+        candidate_edu = (candidate.get('education') or '').lower()
+        internship_edu = (internship.get('required_education') or '').lower()
+        score += profile.education_weight * profile.education_match(candidate_edu, internship_edu)
+        total_weight += profile.education_weight
         
-        # 2. Skills Match (Weight: 0.30)
-        skills_weight = 0.30
-        candidate_skills = [s.lower() for s in candidate.get('skills', [])]
-        internship_skills = [s.lower() for s in internship.get('required_skills', [])]
+        # 2. Skills Match (canonical skill names, so aliases match)
+        candidate_skills = self.vocabulary.canonicalize_all(candidate.get('skills', []))
+        internship_skills = self.vocabulary.canonicalize_all(internship.get('required_skills', []))
         
         if len(internship_skills) == 0:
-            skills_match = 0.5  # Neutral score if no skills specified
+            skills_match = profile.no_skills_match  # Neutral score if no skills specified
         else:
             matched_skills = len(set(candidate_skills) & set(internship_skills))
             skills_match = matched_skills / len(internship_skills)
         
-        score += skills_weight * skills_match
-        total_weight += skills_weight
+        score += profile.skills_weight * skills_match
+        total_weight += profile.skills_weight
         
-        # 3. Sector/Interest Match (Weight: 0.25)
-        interest_weight = 0.25
+        # 3. Sector/Interest Match
         candidate_interests = [i.lower() for i in candidate.get('interests', [])]
-        internship_sector = internship.get('sector', '').lower()
+        internship_sector = (internship.get('sector') or '').lower()
+        score += profile.interest_weight * profile.interest_match(candidate_interests, internship_sector)
+        total_weight += profile.interest_weight
         
-        if len(candidate_interests) == 0:
-            interest_match = 0.3  # Lower score if no interests specified
-        else:
-            # Check if any interest matches the sector
-            interest_match = 0.0
-            for interest in candidate_interests:
-                if interest in internship_sector or internship_sector in interest:
-                    interest_match = 1.0
-                    break
-                # Partial match scoring
-                if any(word in internship_sector for word in interest.split()):
-                    interest_match = max(interest_match, 0.6)
-        
-        score += interest_weight * interest_match
-        total_weight += interest_weight
-        
-        # 4. Location Match (Weight: 0.15)
-        location_weight = 0.15
-        candidate_location = candidate.get('location', '').lower()
-        internship_location = internship.get('location', '').lower()
-        remote_available = internship.get('remote_available', False)
-        
-        if remote_available:
-            location_match = 0.8  # High score if remote is available
-        elif candidate_location == internship_location:
-            location_match = 1.0
-        elif any(word in internship_location for word in candidate_location.split() if len(word) > 2):
-            location_match = 0.7
-        else:
-            location_match = 0.4  # Lower but not zero for different locations
-        
-        score += location_weight * location_match
-        total_weight += location_weight
+        # 4. Location Match
+        candidate_location = (candidate.get('location') or '').lower()
+        internship_location = (internship.get('location') or '').lower()
         
-        # 5. Experience Match (Weight: 0.05)
-        experience_weight = 0.05
-        candidate_experience = candidate.get('previous_experience', False)
-        internship_experience_required = internship.get('experience_required', False)
-        
-        if not internship_experience_required:
-            experience_match = 1.0  # Perfect for beginners
-        elif candidate_experience == internship_experience_required:
-            experience_match = 1.0
+        if internship.get('remote_available', False):
+            location_match = profile.remote_match  # High score if remote is available
         else:
-            experience_match = 0.6  # Some penalty but not zero
+            location_match = self._location_score(candidate_location, internship_location, profile)
+        
+        score += profile.location_weight * location_match
+        total_weight += profile.location_weight
         
-        score += experience_weight * experience_match
-        total_weight += experience_weight
+        # 5. Experience Match
+        experience_match = profile.experience_match(candidate.get('previous_experience', False),
+                                                    internship.get('experience_required', False))
+        score += profile.experience_weight * experience_match
+        total_weight += profile.experience_weight
         
         # Normalize score
         if total_weight > 0:
@@ -114,39 +547,702 @@ class RecommendationEngine:
             normalized_score = 0.0
         
         return normalized_score
+
+    def profile_fingerprint(self, candidate: Dict[str, Any], top_n: int,
+                            filters: Dict[str, List[str]] = None, explain: bool = False,
+                            profile: ScoringProfile = None) -> str:
+        """
+        Hash of the parts of a profile that affect its ranking, normalized the
+        way the scoring normalizes them: skills by canonical name, interests
+        lowercased, both sorted and deduplicated since order does not matter.
+        filters are expected in FacetIndex.normalize() form. The scoring
+        profile is identified by its version, a hash of its weights.
+        """
+        profile = profile or self.scoring_profiles.get()
+        encoded = self.encoder.current(candidate)
+        key = [
+            encoded['education'],
+            sorted(self.encoder.skill_names(encoded)),
+            sorted(set(encoded['interests'])),
+            encoded['location'],
+            encoded['experience'],
+            tokenize(candidate.get('bio') or ''),
+            top_n,
+            sorted((filters or {}).items()),
+            bool(explain),
+            profile.version,
+        ]
+        encoded = json.dumps(key, separators=(',', ':'), default=str)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+    def _candidate_features(self, candidate: Dict[str, Any], catalog: CatalogIndex,
+                            profile: ScoringProfile = None, semantic: bool = True) -> Dict[str, Any]:
+        """
+        Evaluate each factor once per distinct catalog value for a candidate
+        under a scoring profile (the default one if not given).
+
+        The returned tables are indexed by the catalog's integer codes, so the
+        per-internship factor scores are plain array gathers. 'semantic' holds
+        the (rows, similarities) of internships similar to the bio, or None
+        when there is no bio or it shares no term with the catalog. With
+        semantic=False the bio is left to the caller (see _segment_features).
+
+        Profiles loaded from the database carry their stored encoding (see
+        ProfileEncoder), so their text fields are not normalized again.
+        """
+        profile = profile or self.scoring_profiles.get()
+        encoded = self.encoder.current(candidate)
+        candidate_edu = encoded['education']
+        candidate_skills = self.encoder.skill_names(encoded)
+        candidate_interests = encoded['interests']
+        candidate_location = encoded['location']
+        candidate_experience = encoded['experience']
+
+        bio = candidate.get('bio') or ''
+        if semantic and bio.strip():
+            semantic = catalog.semantic.query(bio, self.SEMANTIC_NEIGHBOURS)
+            if len(semantic[0]) == 0:
+                semantic = None
+        else:
+            semantic = None
+
+        return {
+            'education': np.array([profile.education_match(candidate_edu, edu)
+                                   for edu in catalog.education_values], dtype=np.float64),
+            'interest': np.array([profile.interest_match(candidate_interests, sector)
+                                  for sector in catalog.sector_values], dtype=np.float64),
+            'location': self._location_table(candidate_location, encoded['place'], catalog, profile),
+            'experience': np.array([profile.experience_match(candidate_experience, required)
+                                    for required in catalog.experience_values], dtype=np.float64),
+            'skill_ids': catalog.skill_ids_for(candidate_skills),
+            'has_interests': len(candidate_interests) > 0,
+            'semantic': semantic,
+            'profile': profile,
+        }
+
+    def _segment_features(self, candidate: Dict[str, Any], catalog: CatalogIndex,
+                          profile: ScoringProfile) -> List[Dict[str, Any]]:
+        """_candidate_features() for each of the catalog's _segments()"""
+        segments = self._segments(catalog)
+        if len(segments) == 1 and catalog.alive is None:
+            return [self._candidate_features(candidate, catalog, profile)]
+        features = [self._candidate_features(candidate, index, profile, semantic=False) for index, _ in segments]
+        neighbours = self._segment_neighbours(candidate.get('bio') or '', segments)
+        if neighbours is not None:
+            for segment_features, semantic in zip(features, neighbours):
+                segment_features['semantic'] = semantic
+        return features
+
+    def _segment_neighbours(self, bio: str, segments: List[Tuple[CatalogIndex, int]]):
+        """
+        The SEMANTIC_NEIGHBOURS live internships most similar to a bio across
+        all segments, as (rows, similarities) per segment, or None when no
+        live internship shares a term with it. A segment with no neighbour
+        gets empty arrays, so that every segment weighs the factor alike.
+        """
+        if not bio.strip():
+            return None
+        found_rows, found_similarities = [], []
+        for index, start in segments:
+            # Extra neighbours make up for those that expired
+            rows, similarities = index.semantic.query(bio, self.SEMANTIC_NEIGHBOURS + index.expired)
+            if index.alive is not None:
+                live = index.alive[rows]
+                rows, similarities = rows[live], similarities[live]
+            found_rows.append(rows + start)
+            found_similarities.append(similarities)
+        rows, similarities = np.concatenate(found_rows), np.concatenate(found_similarities)
+        if len(rows) == 0:
+            return None
+        # Best similarities first, ties to the lower row, as SemanticIndex.query
+        keep = np.sort(np.lexsort((rows, -similarities))[:self.SEMANTIC_NEIGHBOURS])
+        rows, similarities = rows[keep], similarities[keep]
+        neighbours = []
+        for index, start in segments:
+            inside = (rows >= start) & (rows < start + index.size)
+            neighbours.append((rows[inside] - start, similarities[inside]))
+        return neighbours
+
+    def _location_table(self, candidate_location: str, candidate_place: int, catalog: CatalogIndex,
+                        profile: ScoringProfile) -> np.ndarray:
+        """
+        Location match per distinct catalog location: the profile's score for
+        the gazetteer relation of resolved places, the string heuristic otherwise
+        """
+        places = catalog.location_places
+        if candidate_place < 0:
+            return np.array([profile.location_match(candidate_location, loc)
+                             for loc in catalog.location_values], dtype=np.float64)
+        table = profile.location_levels[self.gazetteer.relation[candidate_place][np.maximum(places, 0)]]
+        for code in np.flatnonzero(places < 0).tolist():
+            table[code] = profile.location_match(candidate_location, catalog.location_values[code])
+        return table
+
+    def _score_catalog(self, features: Dict[str, Any], catalog: CatalogIndex,
+                       rows: np.ndarray = None) -> np.ndarray:
+        """
+        Score a candidate against every internship in the catalog at once, or
+        only against the given sorted rows or contiguous slice of rows.
+
+        Without a semantic factor the result is identical to calling
+        _calculate_similarity_score() per internship.
+        """
+        if rows is None:
+            education_codes, sector_codes = catalog.education_codes, catalog.sector_codes
+            location_codes, experience_codes = catalog.location_codes, catalog.experience_codes
+            remote, skill_counts = catalog.remote, catalog.skill_counts
+        else:
+            education_codes, sector_codes = catalog.education_codes[rows], catalog.sector_codes[rows]
+            location_codes, experience_codes = catalog.location_codes[rows], catalog.experience_codes[rows]
+            remote, skill_counts = catalog.remote[rows], catalog.skill_counts[rows]
+
+        profile = features['profile']
+        matched = catalog.matched_skill_counts(features['skill_ids'], rows)
+        skills = np.full(len(skill_counts), profile.no_skills_match)  # Neutral score if no skills specified
+        np.divide(matched, skill_counts, out=skills, where=skill_counts > 0)
+
+        # Accumulate in the same order as the scalar formula so floating point
+        # results (and therefore rounded scores and ties) are identical
+        score = profile.education_weight * features['education'][education_codes]
+        score += profile.skills_weight * skills
+        score += profile.interest_weight * features['interest'][sector_codes]
+        score += profile.location_weight * np.where(remote, profile.remote_match, features['location'][location_codes])
+        score += profile.experience_weight * features['experience'][experience_codes]
+        if features['semantic'] is None:
+            return score / profile.total_weight
+        score += profile.semantic_weight * self._semantic_factor(features['semantic'], catalog, rows)
+        return score / (profile.total_weight + profile.semantic_weight)
+
+    @staticmethod
+    def _semantic_factor(semantic: Tuple[np.ndarray, np.ndarray], catalog: CatalogIndex, rows=None) -> np.ndarray:
+        """Semantic similarity for all rows, a slice of rows or the given sorted rows"""
+        similar_rows, similarities = semantic
+        if rows is None:
+            rows = slice(0, catalog.size)
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(catalog.size)
+            factor = np.zeros(stop - start)
+            inside = (similar_rows >= start) & (similar_rows < stop)
+            factor[similar_rows[inside] - start] = similarities[inside]
+            return factor
+        factor = np.zeros(len(rows))
+        if len(similar_rows) and len(rows):
+            pos = np.minimum(np.searchsorted(rows, similar_rows), len(rows) - 1)
+            found = rows[pos] == similar_rows
+            factor[pos[found]] = similarities[found]
+        return factor
+
+    def _candidate_rows(self, features: Dict[str, Any], catalog: CatalogIndex, top_n: int,
+                        allowed: np.ndarray = None) -> np.ndarray:
+        """
+        Sorted rows that can reach the top N for a candidate, or None when
+        pruning would not pay off and the whole catalog should be scored.
+        With an allowed flag per row (facet filters), only allowed rows are
+        returned and pruning falls back to all allowed rows instead of None.
+
+        Rows sharing a skill, a matching sector or a matching location with the
+        candidate are found through the inverted indexes. Every other row
+        scores exactly the same as the rest of its residual group (education,
+        empty skill list, remote flag, experience), and ties are broken by row
+        order, so only the first top_n such rows of each group can make the
+        cut. The result therefore gives the same top N as exhaustive scoring.
+        """
+        profile = features['profile']
+        signal_rows = [catalog.rows_with_skills(features['skill_ids'])]
+        if features['has_interests']:
+            signal_rows.append(catalog.rows_with_sectors(
+                np.flatnonzero(features['interest'] != profile.interest_mismatch)))
+        signal_rows.append(catalog.rows_with_locations(
+            np.flatnonzero(features['location'] != profile.location_elsewhere)))
+        if features['semantic'] is not None:
+            signal_rows.append(features['semantic'][0])
+
+        signal = np.zeros(catalog.size, dtype=bool)
+        for part in signal_rows:
+            signal[part] = True
+        if allowed is None:
+            if np.count_nonzero(signal) > catalog.size * self.CANDIDATE_PRUNING_MAX_FRACTION:
+                return None
+            excluded = signal
+        else:
+            signal &= allowed
+            if np.count_nonzero(signal) > np.count_nonzero(allowed) * self.CANDIDATE_PRUNING_MAX_FRACTION:
+                return np.flatnonzero(allowed)
+            excluded = signal | ~allowed
+
+        for group in range(len(catalog.group_offsets) - 1):
+            group_rows = catalog.group_rows(group)
+            limit = top_n
+            while True:
+                fallback = group_rows[:limit]
+                fallback = fallback[~excluded[fallback]]
+                if len(fallback) >= top_n or limit >= len(group_rows):
+                    break
+                limit *= 2
+            signal[fallback[:top_n]] = True
+        return np.flatnonzero(signal)
     
-    def recommend(self, candidate_profile: Dict[str, Any], top_n: int = 5) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _top_rows(scores: np.ndarray, rows: np.ndarray, top_n: int) -> List[Tuple[int, float]]:
+        """
+        Select the top N (row, match_score) pairs without sorting every score.
+
+        Results are ordered by the rounded percentage, then by catalog row,
+        which is exactly what a stable sort of all rounded scores gives. The
+        top_n-th best raw score is found with a partition; anything that could
+        round to the same percentage lies within 0.1 points of it, so only
+        that band is rounded and sorted.
+        """
+        if top_n <= 0 or len(scores) == 0:
+            return []
+        if len(scores) > top_n:
+            kth = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+            band = np.flatnonzero(scores >= kth - 0.0011)
+            scores, rows = scores[band], rows[band]
+        ranked = sorted(zip((-round(s * 100, 1) for s in scores.tolist()), rows.tolist()))
+        return [(row, -neg_score) for neg_score, row in ranked[:top_n]]
+
+    def _shard_executor(self) -> ThreadPoolExecutor:
+        if self._shard_pool is None:
+            with self._shard_pool_lock:
+                if self._shard_pool is None:
+                    self._shard_pool = ThreadPoolExecutor(max_workers=self.scoring_shards,
+                                                          thread_name_prefix='scoring-shard')
+        return self._shard_pool
+
+    def _rank_sharded(self, features: Dict[str, Any], catalog: CatalogIndex,
+                      rows: Optional[np.ndarray], top_n: int) -> List[Tuple[int, float]]:
+        """
+        _top_rows() over shards of the catalog (or of the given rows) scored
+        in parallel.
+
+        NumPy releases the GIL inside the array operations, so threads scoring
+        contiguous shards run on separate cores while sharing the catalog
+        arrays. Each shard keeps its own top N; as those are ordered by
+        rounded score and then row, merging them the same way gives exactly
+        the single-threaded result.
+        """
+        count = catalog.size if rows is None else len(rows)
+        bounds = np.linspace(0, count, self.scoring_shards + 1).astype(int)
+
+        def rank_shard(start: int, stop: int) -> List[Tuple[int, float]]:
+            if rows is None:
+                scores = self._score_catalog(features, catalog, slice(start, stop))
+                return self._top_rows(scores, np.arange(start, stop), top_n)
+            shard_rows = rows[start:stop]
+            return self._top_rows(self._score_catalog(features, catalog, shard_rows), shard_rows, top_n)
+
+        executor = self._shard_executor()
+        futures = [executor.submit(rank_shard, start, stop)
+                   for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        merged = [pair for future in futures for pair in future.result()]
+        merged.sort(key=lambda pair: (-pair[1], pair[0]))
+        return merged[:top_n]
+
+    def _rank(self, features: Dict[str, Any], catalog: CatalogIndex, top_n: int,
+              allowed: np.ndarray = None) -> List[Tuple[int, float]]:
+        """Top N (row, match_score) pairs for a candidate's features among allowed rows"""
+        if top_n <= 0:
+            return []
+        rows = self._candidate_rows(features, catalog, top_n, allowed)
+        count = catalog.size if rows is None else len(rows)
+        if self.scoring_shards > 1 and count >= max(self.shard_min_rows, 1):
+            return self._rank_sharded(features, catalog, rows, top_n)
+
+        scores = self._score_catalog(features, catalog, rows)
+        if rows is None:
+            rows = np.arange(catalog.size)
+        return self._top_rows(scores, rows, top_n)
+
+    def _rank_segments(self, features: List[Dict[str, Any]], catalog: CatalogIndex, top_n: int,
+                       filters: Dict[str, List[str]]) -> List[Tuple[int, float]]:
+        """
+        Top N (global row, match_score) pairs across the catalog's segments.
+        Each segment keeps its own top N among its live rows matching the
+        filters; those are ordered by rounded score and then row, so merging
+        them the same way gives the top N of the whole catalog.
+        """
+        ranked = []
+        for (index, start), segment_features in zip(self._segments(catalog), features):
+            allowed = index.facets.select(filters, within=index.alive_bits) if filters else index.alive
+            ranked.extend((row + start, match_score)
+                          for row, match_score in self._rank(segment_features, index, top_n, allowed))
+        if len(features) > 1:
+            ranked.sort(key=lambda pair: (-pair[1], pair[0]))
+        return ranked[:top_n]
+
+    def _explain_segments(self, features: List[Dict[str, Any]], catalog: CatalogIndex,
+                          rows: List[int]) -> List[Dict[str, Dict[str, Any]]]:
+        """_explain() for global rows, a segment at a time"""
+        if len(features) == 1:
+            return self._explain(features[0], catalog, rows)
+        breakdowns = [None] * len(rows)
+        for (index, start), segment_features in zip(self._segments(catalog), features):
+            positions = [i for i, row in enumerate(rows) if start <= row < start + index.size]
+            if positions:
+                explained = self._explain(segment_features, index, [rows[i] - start for i in positions])
+                for i, breakdown in zip(positions, explained):
+                    breakdowns[i] = breakdown
+        return breakdowns
+
+    def _explain(self, features: Dict[str, Any], catalog: CatalogIndex,
+                 rows: List[int]) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Per-factor breakdown of the scores of the given rows, gathered from the
+        candidate's precomputed feature tables rather than by scoring again.
+
+        For each factor, 'match' is its score in [0, 1], 'weight' its share of
+        the total weight and 'points' its contribution to match_score, so the
+        points add up to match_score up to rounding. The skills factor also
+        lists the matched and missing required skills. The entries of the
+        other factors, bar the description, are the profile's shared
+        BreakdownParts: treat breakdowns as read-only, as cached
+        recommendations already share theirs.
+        """
+        profile = features['profile']
+        rows = np.asarray(rows, dtype=np.int64)
+        # One gather of a few ints per row and the candidate's small tables;
+        # the rest is plain Python over a handful of rows, as each NumPy call
+        # costs more than it saves at this size
+        columns = catalog.explain_columns()[rows].tolist()
+        table = np.concatenate((features['education'], features['interest'],
+                                features['location'], features['experience'])).tolist()
+        skill_ids, skill_names = catalog.skill_ids, catalog.skill_names
+        has = set(features['skill_ids'].tolist())
+        description = None
+        if features['semantic'] is not None:
+            order = np.argsort(rows)
+            description = np.empty(len(rows))
+            description[order] = self._semantic_factor(features['semantic'], catalog, rows[order])
+            description = description.tolist()
+
+        parts = profile.breakdown_parts[description is not None]
+        shared = parts.shared
+        education_parts, skills_parts, interest_parts, location_parts, experience_parts = parts.cache[:5]
+        breakdowns = []
+        for education, sector, location, experience, low, high, remote in columns:
+            required = skill_ids[low:high].tolist()
+            matched = [skill_names[skill] for skill in required if skill in has]
+            missing = [skill_names[skill] for skill in required if skill not in has]
+            skills = len(matched) / len(required) if required else profile.no_skills_match
+            education, sector, experience = table[education], table[sector], table[experience]
+            location = profile.remote_match if remote else table[location]
+            breakdowns.append({
+                'education': education_parts.get(education) or shared(0, education),
+                'skills': dict(skills_parts.get(skills) or shared(1, skills), matched=matched, missing=missing),
+                'interest': interest_parts.get(sector) or shared(2, sector),
+                'location': location_parts.get(location) or shared(3, location),
+                'experience': experience_parts.get(experience) or shared(4, experience),
+            })
+        if description is not None:
+            for breakdown, match in zip(breakdowns, description):
+                breakdown['description'] = parts.build(5, match)
+        return breakdowns
+
+    def recommend(self, candidate_profile: Dict[str, Any], top_n: int = 5,
+                  filters: Dict[str, Any] = None, explain: bool = False,
+                  scoring_profile: str = None) -> List[Dict[str, Any]]:
         """
         Get top N internship recommendations for a candidate
         
         Args:
             candidate_profile: Dictionary with candidate information
             top_n: Number of top recommendations to return
+            filters: Optional facet filters, e.g. {"sector": [...], "remote": true};
+                only matching internships are ranked (see FacetIndex.normalize)
+            explain: Add a per-factor 'score_breakdown' to each recommendation
+                (see _explain)
+            scoring_profile: Name of a profile in data/scoring_profiles.json,
+                the default one if None
         
         Returns:
             List of internship recommendations with scores
         """
-        scored_internships = []
+        filters = FacetIndex.normalize(filters)
+        profile = self.scoring_profiles.get(scoring_profile)
+        self.maybe_reload()
+        catalog = self.catalog
+
+        key = None
+        if self.cache.enabled and top_n <= self.CACHE_MAX_TOP_N:
+            key = self.profile_fingerprint(candidate_profile, top_n, filters, explain, profile)
+            cached = self.cache.get(key, catalog.version)
+            if cached is not None:
+                return [dict(recommendation) for recommendation in cached]
+
+        features = self._segment_features(candidate_profile, catalog, profile)
+
+        # Only the returned internships are copied
+        ranked = self._rank_segments(features, catalog, top_n, filters)
+        recommendations = [dict(self._record(catalog, row), match_score=match_score)
+                           for row, match_score in ranked]
+        if explain and ranked:
+            breakdowns = self._explain_segments(features, catalog, [row for row, _ in ranked])
+            for recommendation, breakdown in zip(recommendations, breakdowns):
+                recommendation['score_breakdown'] = breakdown
+        if key is not None:
+            self.cache.put(key, catalog.version, recommendations)
+            return [dict(recommendation) for recommendation in recommendations]
+        return recommendations
+    
+    def _score_matrix(self, features: List[Dict[str, Any]], catalog: CatalogIndex,
+                      rows: np.ndarray = None) -> np.ndarray:
+        """
+        Score several candidates against the whole catalog in one pass, or
+        only against the given sorted rows.
+
+        Returns a (candidates x internships) matrix with the same values
+        _score_catalog() gives per candidate. Matched skill counts are the
+        product of a (candidates x skills) and a (skills x internships)
+        incidence matrix, taken over blocks of the skills the candidates
+        hold so that no intermediate exceeds BATCH_MAX_CELLS.
+        """
+        skill_ids = sorted({s for f in features for s in f['skill_ids'].tolist()})
+        local = {skill_id: j for j, skill_id in enumerate(skill_ids)}
+        held = np.zeros((len(features), len(skill_ids)), dtype=np.float32)
+        for i, f in enumerate(features):
+            held[i, [local[s] for s in f['skill_ids'].tolist()]] = 1.0
+
+        def column(name):
+            values = getattr(catalog, name)
+            return values if rows is None else values[rows]
+
+        def columns_of(found_rows):
+            """Matrix columns of catalog rows, and which of them were found"""
+            if rows is None:
+                return found_rows, slice(None)
+            pos = np.minimum(np.searchsorted(rows, found_rows), max(len(rows) - 1, 0))
+            found = rows[pos] == found_rows if len(rows) else np.zeros(len(found_rows), dtype=bool)
+            return pos[found], found
+
+        # Counts are small integers, so float32 products are exact
+        size = catalog.size if rows is None else len(rows)
+        skill_counts = column('skill_counts')
+        matched = np.zeros((len(features), size), dtype=np.float32)
+        block = max(1, self.BATCH_MAX_CELLS // max(size, 1))
+        for start in range(0, len(skill_ids), block):
+            block_ids = skill_ids[start:start + block]
+            required = np.zeros((len(block_ids), size), dtype=np.float32)
+            for j, skill_id in enumerate(block_ids):
+                required[j, columns_of(catalog.rows_with_skills([skill_id]))[0]] = 1.0
+            matched += held[:, start:start + block] @ required
+        profile = features[0]['profile']
+        skills = np.full(matched.shape, profile.no_skills_match)  # Neutral score if no skills specified
+        np.divide(matched, skill_counts, out=skills, where=skill_counts > 0)
+
+        def table(name, codes):
+            return np.stack([f[name] for f in features])[:, column(codes)]
+
+        # Same accumulation order as _score_catalog()
+        score = profile.education_weight * table('education', 'education_codes')
+        score += profile.skills_weight * skills
+        score += profile.interest_weight * table('interest', 'sector_codes')
+        score += profile.location_weight * np.where(column('remote'), profile.remote_match,
+                                                    table('location', 'location_codes'))
+        score += profile.experience_weight * table('experience', 'experience_codes')
+        totals = np.full((len(features), 1), profile.total_weight)
+        for i, f in enumerate(features):
+            if f['semantic'] is not None:
+                similar_rows, similarities = f['semantic']
+                positions, found = columns_of(similar_rows)
+                score[i, positions] += profile.semantic_weight * similarities[found]
+                totals[i] = profile.total_weight + profile.semantic_weight
+        score /= totals
+        return score
+
+    def recommend_many(self, candidate_profiles: List[Dict[str, Any]], top_n: int = 5,
+                       filters: Dict[str, Any] = None,
+                       scoring_profile: str = None) -> List[List[Dict[str, Any]]]:
+        """
+        Get top N internship recommendations for many candidates at once
         
-        for internship in self.internships:
-            score = self._calculate_similarity_score(candidate_profile, internship)
-            scored_internship = internship.copy()
-            scored_internship['match_score'] = round(score * 100, 1)  # Convert to percentage
-            scored_internships.append(scored_internship)
+        Profiles are scored in chunks of (candidates x internships) matrices
+        holding at most BATCH_MAX_CELLS scores, which bounds memory regardless
+        of cohort or catalog size.
         
-        # Sort by score (descending) and return top N
-        scored_internships.sort(key=lambda x: x['match_score'], reverse=True)
+        Args:
+            candidate_profiles: List of candidate profiles
+            top_n: Number of top recommendations to return per candidate
+            filters: Optional facet filters applied to every candidate
+            scoring_profile: Scoring profile name for every candidate
         
-        return scored_internships[:top_n]
+        Returns:
+            One list of recommendations per profile, in the same order, each
+            identical to what recommend() returns for that profile
+        """
+        filters = FacetIndex.normalize(filters)
+        profile = self.scoring_profiles.get(scoring_profile)
+        self.maybe_reload()
+        catalog = self.catalog
+        if top_n <= 0 or self._live_size(catalog) == 0:
+            return [[] for _ in candidate_profiles]
+
+        segments = self._segments(catalog)
+        allowed_rows = []
+        for index, _ in segments:
+            allowed = index.facets.select(filters, within=index.alive_bits) if filters else index.alive
+            allowed_rows.append(None if allowed is None else np.flatnonzero(allowed))
+        rows = np.concatenate([(np.arange(index.size) if allowed is None else allowed) + start
+                               for (index, start), allowed in zip(segments, allowed_rows)])
+        chunk_size = max(1, self.BATCH_MAX_CELLS // sum(index.size for index, _ in segments))
+        results = []
+        for start in range(0, len(candidate_profiles), chunk_size):
+            chunk = candidate_profiles[start:start + chunk_size]
+            features = [self._segment_features(p, catalog, profile) for p in chunk]
+            parts = []
+            for k, (index, _) in enumerate(segments):
+                scores = self._score_matrix([f[k] for f in features], index)
+                parts.append(scores if allowed_rows[k] is None else scores[:, allowed_rows[k]])
+            scores = parts[0] if len(parts) == 1 else np.hstack(parts)
+            for row_scores in scores:
+                results.append([dict(self._record(catalog, row), match_score=match_score)
+                                for row, match_score in self._top_rows(row_scores, rows, top_n)])
+        return results
     
+    def _live_rows(self, catalog: CatalogIndex, internship_ids: List[Any] = None) -> List[np.ndarray]:
+        """
+        Sorted rows per segment of the given internships, or of every live
+        one. Raises KeyError for an id that is not in the catalog.
+        """
+        segments = self._segments(catalog)
+        if internship_ids is None:
+            return [np.arange(index.size) if index.alive is None else np.flatnonzero(index.alive)
+                    for index, _ in segments]
+        wanted = {str(internship_id) for internship_id in internship_ids}
+        found = {}
+        for k, (index, _) in enumerate(segments):
+            for row, internship_id in enumerate(index.column('id')):
+                if str(internship_id) in wanted and (index.alive is None or index.alive[row]):
+                    found[str(internship_id)] = (k, row)
+        missing = wanted - set(found)
+        if missing:
+            raise KeyError(f"Internships not found: {', '.join(sorted(missing))}")
+        return [np.array(sorted(row for segment, row in found.values() if segment == k), dtype=np.int64)
+                for k in range(len(segments))]
+
+    def rank_candidates(self, candidate_profiles: Iterable[Dict[str, Any]], internship_ids: List[Any] = None,
+                        top_k: int = 50, scoring_profile: str = None) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Rank candidates for internships: the reverse of recommend_many().
+
+        Candidates are scored with the factors and weights of
+        _calculate_similarity_score(). The bio is ignored, since description
+        similarity is only computed for each candidate's nearest internships.
+        candidate_profiles may be a generator over millions of profiles
+        (see Database.iter_candidate_profiles). It is consumed in chunks whose
+        (candidates x internships) score matrix holds at most BATCH_MAX_CELLS
+        scores, and only a running top K per internship is kept.
+
+        Args:
+            candidate_profiles: Profiles with an integer 'user_id' (below 2**32)
+            internship_ids: Internships to rank candidates for, all if None
+            top_k: Candidates to keep per internship
+            scoring_profile: Scoring profile name
+
+        Returns:
+            {internship id: [{"user_id", "match_score"}, ...]} ordered by
+            match_score, ties to the lower user id
+        """
+        profile = self.scoring_profiles.get(scoring_profile)
+        self.maybe_reload()
+        catalog = self.catalog
+        segments = self._segments(catalog)
+        rows = self._live_rows(catalog, internship_ids)
+        internships = [self._record(catalog, row)['id'] for row in
+                       np.concatenate([segment_rows + start for (_, start), segment_rows in zip(segments, rows)]).tolist()]
+        if top_k <= 0 or not internships:
+            return {internship_id: [] for internship_id in internships}
+
+        # Running top K per internship as int64 keys: the rounded score in
+        # tenths of a percent above 32 bits of inverted user id, so that a
+        # larger key is a better candidate (ties to the lower user id), keys
+        # are unique and an unordered partition keeps the right ones
+        best = np.full((len(internships), top_k), -1, dtype=np.int64)
+        chunk_size = max(1, self.BATCH_MAX_CELLS // len(internships))
+        candidates = iter(candidate_profiles)
+        while True:
+            chunk = list(itertools.islice(candidates, chunk_size))
+            if not chunk:
+                break
+            features = [self._segment_features(dict(p, bio=''), catalog, profile) for p in chunk]
+            scores = np.hstack([self._score_matrix([f[k] for f in features], index, rows[k])
+                                for k, (index, _) in enumerate(segments)])
+            users = np.array([p['user_id'] for p in chunk], dtype=np.int64)
+            if users.min() < 0 or users.max() > self.MAX_USER_ID:
+                raise ValueError(f"User ids must be between 0 and {self.MAX_USER_ID}")
+            keys = (self._tenths(scores) << 32) | (self.MAX_USER_ID - users)[:, None]
+            keys = keys.T
+
+            # Most columns cannot change once the top K fill up
+            changed = np.flatnonzero((keys > best.min(axis=1)[:, None]).any(axis=1))
+            if len(changed):
+                merged = np.hstack([best[changed], keys[changed]])
+                best[changed] = np.partition(merged, len(chunk), axis=1)[:, len(chunk):]
+
+        best = -np.sort(-best, axis=1)
+        results = {}
+        for internship_id, keys in zip(internships, best.tolist()):
+            results[internship_id] = [{'user_id': self.MAX_USER_ID - (key & self.MAX_USER_ID),
+                                       'match_score': (key >> 32) / 10}
+                                      for key in keys if key >= 0]
+        return results
+
+    @staticmethod
+    def _tenths(scores: np.ndarray) -> np.ndarray:
+        """round(score * 100, 1) * 10 as integers, exactly as round() gives them"""
+        scaled = scores * 100
+        tenths = np.clip(np.floor(scaled * 10).astype(np.int64), 0, 1000)
+        midpoints = _MIDPOINTS[tenths]
+        return tenths + ((scaled > midpoints) | ((scaled == midpoints) & _ROUNDS_UP_AT_MIDPOINT[tenths]))
+
     def get_all_internships(self) -> List[Dict[str, Any]]:
         """Get all available internships"""
-        return self.internships
+        self.maybe_reload()
+        return self._live_internships(self.catalog)
     
     def get_available_sectors(self) -> List[str]:
-        """Get unique list of available sectors"""
-        sectors = set()
-        for internship in self.internships:
-            sectors.add(internship.get('sector', 'Other'))
-        return sorted(list(sectors))
+        """
+        Get unique list of available sectors, spelled as in the live postings
+        ('Other' for postings without one). Unlike the sector facet, sectors
+        differing only in case are listed separately.
+        """
+        self.maybe_reload()
+        catalog = self.catalog
+        sectors = catalog.column('sector', 'Other')
+        if catalog.alive is not None:
+            sectors = [sectors[row] for row in np.flatnonzero(catalog.alive).tolist()]
+        sectors = set(sectors)
+        if catalog.delta is not None:
+            sectors.update(catalog.delta.column('sector', 'Other'))
+        return sorted(sector for sector in sectors if isinstance(sector, str))
+
+    def _facet_counts(self, catalog: CatalogIndex, filters: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        results = [index.facets.counts(filters, within=index.alive_bits) for index, _ in self._segments(catalog)]
+        return results[0] if len(results) == 1 else FacetIndex.merge_counts(results)
+
+    def search_internships(self, filters: Dict[str, Any] = None, limit: int = 20,
+                           offset: int = 0) -> Dict[str, Any]:
+        """
+        Internships matching facet filters, in catalog order, with counts per
+        facet value
+
+        Args:
+            filters: Facet filters (see FacetIndex.normalize)
+            limit: Page size
+            offset: Number of matches to skip
+
+        Returns:
+            {"total", "internships" (the requested page), "facets"}
+        """
+        filters = FacetIndex.normalize(filters)
+        self.maybe_reload()
+        catalog = self.catalog
+        rows = np.concatenate([index.facets.rows(index.facets.mask(filters, within=index.alive_bits)) + start
+                               for index, start in self._segments(catalog)])
+        page = rows[max(offset, 0):max(offset, 0) + max(limit, 0)]
+        return {
+            'total': len(rows),
+            'internships': [self._record(catalog, row) for row in page.tolist()],
+            'facets': self._facet_counts(catalog, filters),
+        }
 
@@ -0,0 +1,238 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy as np
+
+from location_gazetteer import Gazetteer
+
+# Built-in scoring scheme. Profiles in data/scoring_profiles.json override
+# any subset of these weights and partial-match scores.
+DEFAULT_WEIGHTS = {
+    'education': 0.25,
+    'skills': 0.30,
+    'interest': 0.25,
+    'location': 0.15,
+    'experience': 0.05,
+    # Only for profiles with a bio, see RecommendationEngine
+    'description': 0.20,
+}
+
+DEFAULT_MATCHES = {
+    'education': {'exact': 1.0, 'partial': 0.8, 'mismatch': 0.0},
+    'skills': {'no_requirements': 0.5},
+    'interest': {'match': 1.0, 'partial': 0.6, 'mismatch': 0.0, 'no_interests': 0.3},
+    'location': {'remote': 0.8, 'same_place': 1.0, 'nearby': 0.85, 'same_state': 0.7,
+                 'partial': 0.7, 'elsewhere': 0.4},
+    'experience': {'meets': 1.0, 'missing': 0.6},
+}
+
+
+def _education_scorer(exact: float, partial: float, mismatch: float) -> Callable[[str, str], float]:
+    def education_match(candidate_edu: str, internship_edu: str) -> float:
+        """Education level match for lowercased education strings"""
+        if candidate_edu == internship_edu or internship_edu == 'any':
+            return exact
+        elif 'graduate' in candidate_edu and 'graduate' in internship_edu:
+            return partial
+        elif 'undergraduate' in candidate_edu and 'undergraduate' in internship_edu:
+            return partial
+        return mismatch
+    return education_match
+
+
+def _interest_scorer(match: float, partial: float, mismatch: float,
+                     no_interests: float) -> Callable[[List[str], str], float]:
+    def interest_match(candidate_interests: List[str], internship_sector: str) -> float:
+        """Best match between lowercased candidate interests and a lowercased sector"""
+        if len(candidate_interests) == 0:
+            return no_interests
+        partial_match = False
+        for interest in candidate_interests:
+            if interest in internship_sector or internship_sector in interest:
+                return match
+            if any(word in internship_sector for word in interest.split()):
+                partial_match = True
+        return partial if partial_match else mismatch
+    return interest_match
+
+
+def _location_scorer(same_place: float, partial: float, elsewhere: float) -> Callable[[str, str], float]:
+    def location_match(candidate_location: str, internship_location: str) -> float:
+        """String heuristic location match for lowercased locations the gazetteer does not know"""
+        if candidate_location == internship_location:
+            return same_place
+        elif any(word in internship_location for word in candidate_location.split() if len(word) > 2):
+            return partial
+        return elsewhere
+    return location_match
+
+
+def _experience_scorer(meets: float, missing: float) -> Callable[[Any, Any], float]:
+    def experience_match(candidate_experience: Any, internship_experience_required: Any) -> float:
+        """Experience match between the candidate flag and the internship requirement"""
+        if not internship_experience_required:
+            return meets
+        elif candidate_experience == internship_experience_required:
+            return meets
+        return missing
+    return experience_match
+
+
+class BreakdownParts:
+    """
+    Per-factor entries of score breakdowns (see RecommendationEngine._explain)
+    under one profile, with or without the description factor.
+
+    An entry is the factor's rounded 'match', its rounded share of the total
+    weight and the rounded 'points' it adds to match_score. The factors only
+    take the few values the profile's match scores allow (skills a few
+    fractions), so shared() builds the entry once per value and hands out
+    the same dict afterwards; callers must copy it before adding to it.
+    """
+
+    def __init__(self, weights: List[float]):
+        total_weight = sum(weights)
+        self.shares = [weight / total_weight for weight in weights]
+        self.rounded_shares = [round(share * 1000) / 1000 for share in self.shares]
+        # match -> entry, per factor
+        self.cache = tuple({} for _ in weights)
+
+    def build(self, factor: int, match: float) -> Dict[str, float]:
+        # round(x * 10 ** d) / 10 ** d is exactly what np.round(x, d) computes
+        return {'match': round(match * 1000) / 1000, 'weight': self.rounded_shares[factor],
+                'points': round(self.shares[factor] * match * 100 * 10) / 10}
+
+    def shared(self, factor: int, match: float) -> Dict[str, float]:
+        entry = self.cache[factor].get(match)
+        if entry is None:
+            entry = self.cache[factor][match] = self.build(factor, match)
+        return entry
+
+
+class ScoringProfile:
+    """
+    One compiled scoring scheme.
+
+    Weights become plain attributes for the vectorized scorer, and the
+    partial-match scores are bound into the match functions as closure
+    constants, so a profile costs nothing per internship compared to
+    hard-coded numbers. Raises ValueError for unknown keys, negative weights
+    or match scores outside [0, 1].
+    """
+
+    def __init__(self, name: str, weights: Dict[str, float] = None,
+                 matches: Dict[str, Dict[str, float]] = None, description: str = ''):
+        self.name = name
+        self.description = description
+        self.weights = dict(DEFAULT_WEIGHTS)
+        for factor, weight in (weights or {}).items():
+            if factor not in DEFAULT_WEIGHTS:
+                raise ValueError(f"Scoring profile '{name}': unknown weight '{factor}'")
+            if not isinstance(weight, (int, float)) or weight < 0:
+                raise ValueError(f"Scoring profile '{name}': weight '{factor}' must be a non-negative number")
+            self.weights[factor] = float(weight)
+
+        self.matches = copy.deepcopy(DEFAULT_MATCHES)
+        for factor, scores in (matches or {}).items():
+            for key, score in scores.items():
+                if key not in DEFAULT_MATCHES.get(factor, {}):
+                    raise ValueError(f"Scoring profile '{name}': unknown match score '{factor}.{key}'")
+                if not isinstance(score, (int, float)) or not 0.0 <= score <= 1.0:
+                    raise ValueError(f"Scoring profile '{name}': match score '{factor}.{key}' must be in [0, 1]")
+                self.matches[factor][key] = float(score)
+
+        self.education_weight = self.weights['education']
+        self.skills_weight = self.weights['skills']
+        self.interest_weight = self.weights['interest']
+        self.location_weight = self.weights['location']
+        self.experience_weight = self.weights['experience']
+        self.semantic_weight = self.weights['description']
+        self.total_weight = (self.education_weight + self.skills_weight + self.interest_weight
+                             + self.location_weight + self.experience_weight)
+        if self.total_weight <= 0:
+            raise ValueError(f"Scoring profile '{name}': weights must not all be zero")
+        factor_weights = [self.education_weight, self.skills_weight, self.interest_weight,
+                          self.location_weight, self.experience_weight]
+        # Indexed by whether the candidate has a bio
+        self.breakdown_parts = (BreakdownParts(factor_weights),
+                                BreakdownParts(factor_weights + [self.semantic_weight]))
+
+        education, interest = self.matches['education'], self.matches['interest']
+        location, experience = self.matches['location'], self.matches['experience']
+        self.education_match = _education_scorer(education['exact'], education['partial'], education['mismatch'])
+        self.interest_match = _interest_scorer(interest['match'], interest['partial'], interest['mismatch'],
+                                               interest['no_interests'])
+        self.interest_mismatch = interest['mismatch']
+        self.location_match = _location_scorer(location['same_place'], location['partial'], location['elsewhere'])
+        self.location_elsewhere = location['elsewhere']
+        self.remote_match = location['remote']
+        # Score per gazetteer relation level (see Gazetteer.relation)
+        self.location_levels = np.array([location[level] for level in Gazetteer.LEVELS], dtype=np.float64)
+        self.experience_match = _experience_scorer(experience['meets'], experience['missing'])
+        self.no_skills_match = self.matches['skills']['no_requirements']
+
+        encoded = json.dumps([self.weights, self.matches], sort_keys=True)
+        self.version = hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:12]
+
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name, 'description': self.description,
+                'weights': dict(self.weights), 'matches': copy.deepcopy(self.matches)}
+
+
+class ScoringProfiles:
+    """
+    Named scoring profiles from data/scoring_profiles.json, all compiled
+    when the file is loaded so that selecting one per request is a lookup.
+    Without the file, only the built-in 'standard' profile exists.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.path.dirname(__file__), 'data', 'scoring_profiles.json')
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            print(f"Warning: {self.path} not found. Using the built-in scoring profile.")
+            raw = b'{}'
+        self.version = hashlib.sha1(raw).hexdigest()[:12]
+        data = json.loads(raw)
+
+        self.default = data.get('default', 'standard')
+        configs = data.get('profiles', {})
+        configs.setdefault(self.default, {})
+        self._profiles: Dict[str, ScoringProfile] = {
+            name: ScoringProfile(name, config.get('weights'), config.get('matches'), config.get('description', ''))
+            for name, config in configs.items()
+        }
+
+    def names(self) -> List[str]:
+        return list(self._profiles)
+
+    def get(self, name: Optional[str] = None) -> ScoringProfile:
+        """A compiled profile by name, the default one for None"""
+        profile = self._profiles.get(name or self.default)
+        if profile is None:
+            raise ValueError(f"Unknown scoring profile '{name}', expected one of {', '.join(self._profiles)}")
+        return profile
+
+    def describe(self) -> Dict[str, Any]:
+        return {'default': self.default,
+                'profiles': [profile.describe() for profile in self._profiles.values()]}
+
+
+_default_profiles = None
+_default_lock = threading.Lock()
+
+
+def get_scoring_profiles() -> ScoringProfiles:
+    """Process-wide scoring profiles"""
+    global _default_profiles
+    if _default_profiles is None:
+        with _default_lock:
+            if _default_profiles is None:
+                _default_profiles = ScoringProfiles()
+    return _default_profiles
@@ -0,0 +1,223 @@
+import re
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be been but by can for from has have
+in into is it its of on or our over such than that the their them they this to
+under up was we were which while will with within work working you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of a text without stop words and one-letter tokens"""
+    return [word for word in _WORD.findall(str(text or '').lower())
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+def _expand(offsets: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the entries of several rows in a CSR layout, and their lengths"""
+    starts, lengths = offsets[rows], offsets[rows + 1] - offsets[rows]
+    total = int(lengths.sum())
+    shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(total, dtype=np.int64) + shift, lengths
+
+
+class SemanticIndex:
+    """
+    TF-IDF vectors of free text with a random-projection LSH index.
+
+    Each document becomes an L2-normalized sparse vector of sublinear term
+    frequencies times smoothed inverse document frequencies, stored in CSR
+    form (doc_offsets, doc_terms, doc_weights). For approximate search the
+    vectors are projected onto n_tables x n_bits random +-1 hyperplanes; the
+    signs of each table's projections form a bucket code, so documents at a
+    small angle to each other tend to share buckets. A query looks up its own
+    bucket and the buckets one bit away in every table, then ranks only
+    those candidates by exact cosine similarity.
+
+    Catalogs of at most EXACT_MAX_DOCS documents are always searched
+    exhaustively, which is cheap at that size and keeps recall at 1.
+    """
+
+    ARRAYS = ('idf', 'doc_offsets', 'doc_terms', 'doc_weights', 'planes',
+              'bucket_offsets', 'bucket_postings')
+    TABLES = ('terms', 'n_tables', 'n_bits')
+
+    EXACT_MAX_DOCS = 5000
+    N_TABLES = 16
+    SEED = 1729
+
+    # Upper bound on (document terms x hyperplanes) cells projected at once
+    PROJECTION_MAX_CELLS = 1_000_000
+
+    def __init__(self, documents: List[str], n_tables: int = None, n_bits: int = None):
+        size = len(documents)
+        self.n_tables = self.N_TABLES if n_tables is None else n_tables
+        # About 64 documents per bucket, within 4..16 bits
+        self.n_bits = n_bits or int(np.clip(np.log2(max(size, 1) / 64), 4, 16))
+
+        # Term frequencies per document from one sort of (row, term id) keys;
+        # each document's terms end up in ascending id order
+        tokens = [tokenize(document) for document in documents]
+        term_ids: Dict[str, int] = {}
+        ids = np.fromiter((term_ids.setdefault(term, len(term_ids)) for words in tokens for term in words),
+                          dtype=np.int64, count=sum(len(words) for words in tokens))
+        self.terms = list(term_ids)
+        owners = np.repeat(np.arange(size, dtype=np.int64), [len(words) for words in tokens])
+        keys, frequencies = np.unique(owners * max(len(self.terms), 1) + ids, return_counts=True)
+        doc_rows = keys // max(len(self.terms), 1)
+        self.doc_terms = (keys % max(len(self.terms), 1)).astype(np.int32)
+        self.doc_offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_rows, minlength=size), out=self.doc_offsets[1:])
+
+        document_frequency = np.bincount(self.doc_terms, minlength=len(self.terms))
+        self.idf = np.log((1 + size) / (1 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(frequencies)) * self.idf[self.doc_terms]
+        norms = np.sqrt(np.bincount(doc_rows, weights=weights * weights, minlength=size))
+        if len(weights):
+            weights /= norms[doc_rows]
+        self.doc_weights = weights.astype(np.float32)
+
+        rng = np.random.default_rng(self.SEED)
+        self.planes = (rng.integers(0, 2, (len(self.terms), self.n_tables * self.n_bits), dtype=np.int8) * 2 - 1)
+        self._init_lookup()
+        self._build_buckets()
+
+    @classmethod
+    def from_columns(cls, arrays: Dict[str, np.ndarray], tables: Dict[str, Any]) -> 'SemanticIndex':
+        """Rebuild an index from persisted arrays and tables"""
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        for name in cls.TABLES:
+            setattr(index, name, tables[name])
+        index._init_lookup()
+        return index
+
+    def extension(self, documents: List[str]) -> 'SemanticIndex':
+        """
+        Index of further documents in this index's term space, so that their
+        similarities are comparable with this index's: weights use this
+        index's IDF, and terms it does not know count toward a document's norm
+        as if seen in one document, then are dropped since no query can hold
+        them. Hyperplanes are shared, so buckets are built only for the new
+        documents.
+        """
+        index = SemanticIndex.__new__(SemanticIndex)
+        for name in ('terms', 'idf', 'planes', 'n_tables', 'n_bits', '_term_ids', '_bit_values'):
+            setattr(index, name, getattr(self, name))
+        unseen_idf = np.log((1 + self.size) / 2) + 1.0
+
+        offsets, terms, weights = [0], [], []
+        for document in documents:
+            known, unseen_norm = [], 0.0
+            for term, count in Counter(tokenize(document)).items():
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    unseen_norm += ((1.0 + np.log(count)) * unseen_idf) ** 2
+                else:
+                    known.append((term_id, (1.0 + np.log(count)) * self.idf[term_id]))
+            known.sort()
+            norm = np.sqrt(sum(weight * weight for _, weight in known) + unseen_norm)
+            terms.extend(term_id for term_id, _ in known)
+            weights.extend(weight / norm for _, weight in known)
+            offsets.append(len(terms))
+        index.doc_offsets = np.array(offsets, dtype=np.int64)
+        index.doc_terms = np.array(terms, dtype=np.int32)
+        index.doc_weights = np.array(weights, dtype=np.float32)
+        index.size = len(documents)
+        index._build_buckets()
+        return index
+
+    def _init_lookup(self):
+        self.size = len(self.doc_offsets) - 1
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        self._bit_values = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+
+    def _codes(self, projections: np.ndarray) -> np.ndarray:
+        """Bucket code per table from (n x tables*bits) projections"""
+        signs = (projections > 0).reshape(len(projections), self.n_tables, self.n_bits)
+        return signs @ self._bit_values
+
+    def _build_buckets(self):
+        """Project every document and group rows by (table, bucket code)"""
+        width = self.n_tables * self.n_bits
+        nonempty = np.flatnonzero(np.diff(self.doc_offsets) > 0)
+        codes = np.empty((len(nonempty), self.n_tables), dtype=np.int64)
+
+        # Chunks of documents whose terms fit in PROJECTION_MAX_CELLS cells
+        max_entries = max(1, self.PROJECTION_MAX_CELLS // max(width, 1))
+        start = 0
+        while start < len(nonempty):
+            first = self.doc_offsets[nonempty[start]]
+            limit = np.searchsorted(self.doc_offsets[nonempty + 1], first + max_entries, side='right')
+            stop = max(start + 1, min(int(limit), len(nonempty)))
+            rows = nonempty[start:stop]
+            low, high = self.doc_offsets[rows[0]], self.doc_offsets[rows[-1] + 1]
+            contributions = self.planes[self.doc_terms[low:high]] * self.doc_weights[low:high, None]
+            # Rows are non-empty, so their starts split the entries exactly
+            projections = np.add.reduceat(contributions, self.doc_offsets[rows] - low, axis=0)
+            codes[start:stop] = self._codes(projections)
+            start = stop
+
+        buckets = 1 << self.n_bits
+        keys = (codes + np.arange(self.n_tables) * buckets).reshape(-1)
+        order = np.argsort(keys, kind='stable')
+        self.bucket_offsets = np.zeros(self.n_tables * buckets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=self.n_tables * buckets), out=self.bucket_offsets[1:])
+        self.bucket_postings = np.repeat(nonempty, self.n_tables)[order].astype(np.int32)
+
+    def vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted term ids and normalized TF-IDF weights of a query; unknown terms are ignored"""
+        counts = Counter(term for term in tokenize(text) if term in self._term_ids)
+        if not counts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        terms = np.array(sorted(self._term_ids[term] for term in counts), dtype=np.int32)
+        names = [self.terms[term] for term in terms]
+        weights = (1.0 + np.log([counts[name] for name in names])) * self.idf[terms]
+        return terms, weights / np.linalg.norm(weights)
+
+    def _candidates(self, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Rows sharing a bucket with the query, or one bit away from it, in any table"""
+        projections = (weights[:, None] * self.planes[terms]).sum(axis=0)
+        codes = self._codes(projections[None, :])[0]
+        probes = np.concatenate([codes[:, None], codes[:, None] ^ self._bit_values], axis=1)
+        keys = probes + (np.arange(self.n_tables) * (1 << self.n_bits))[:, None]
+        keys = keys.reshape(-1)
+        positions, _ = _expand(self.bucket_offsets, keys)
+        return np.unique(self.bucket_postings[positions])
+
+    def cosine(self, terms: np.ndarray, weights: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact cosine similarity of a vectorized query with the given rows"""
+        positions, lengths = _expand(self.doc_offsets, rows)
+        doc_terms = self.doc_terms[positions]
+        match = np.minimum(np.searchsorted(terms, doc_terms), len(terms) - 1)
+        found = terms[match] == doc_terms
+        products = np.where(found, self.doc_weights[positions] * weights[match], 0.0)
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        return np.bincount(owners, weights=products, minlength=len(rows))
+
+    def query(self, text: str, limit: int, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up to limit rows most similar to a free text, as (rows in ascending
+        order, cosine similarities). Rows with no term in common are omitted.
+        """
+        terms, weights = self.vectorize(text)
+        if len(terms) == 0 or limit <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        if exact or self.size <= self.EXACT_MAX_DOCS:
+            rows = np.arange(self.size)
+        else:
+            rows = self._candidates(terms, weights)
+        similarities = self.cosine(terms, weights, rows)
+        keep = np.flatnonzero(similarities > 0)
+        if len(keep) > limit:
+            # Best similarities first, ties to the lower row
+            keep = keep[np.lexsort((rows[keep], -similarities[keep]))[:limit]]
+            keep.sort()
+        return rows[keep].astype(np.int64), similarities[keep]
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import List, Dict, Iterable, Optional, Tuple
+
+_SEPARATORS = re.compile(r'[\s_\-/]+')
+_PUNCTUATION = re.compile(r'[^\w\s+#.]')
+
+
+def normalize_skill(text: str) -> str:
+    """Lowercase a skill and collapse separators: 'Social-Media ' -> 'social media'"""
+    text = _SEPARATORS.sub(' ', str(text).lower())
+    text = _PUNCTUATION.sub('', text)
+    return ' '.join(text.split()).strip('.')
+
+
+class SkillVocabulary:
+    """
+    Canonical skill dictionary with aliases, interned to integer ids.
+
+    Skills from data/skill_vocabulary.json get stable ids in file order, so
+    ids of known skills mean the same thing in every process. Skills outside
+    the dictionary are normalized and interned on first use with ids after
+    the known ones; those ids are only stable within one process.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.path.dirname(__file__), 'data', 'skill_vocabulary.json')
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            print(f"Warning: {self.path} not found. Skills will only be normalized.")
+            raw = b'{}'
+        self.version = hashlib.sha1(raw).hexdigest()[:12]
+
+        self._aliases: Dict[str, str] = {}
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name, aliases in json.loads(raw).items():
+            canonical = normalize_skill(name)
+            self._add(canonical)
+            for term in [name] + list(aliases):
+                self._aliases.setdefault(normalize_skill(term), canonical)
+        self.known_count = len(self._names)
+        self._max_term_words = max((len(term.split()) for term in self._aliases), default=1)
+        self._lock = threading.Lock()
+
+    def _add(self, name: str) -> int:
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            skill_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return skill_id
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def canonical(self, skill: str) -> str:
+        """Canonical name of a skill ('ML' -> 'machine learning')"""
+        normalized = normalize_skill(skill)
+        return self._aliases.get(normalized, normalized)
+
+    def canonicalize_all(self, skills: Iterable[str]) -> List[str]:
+        """Canonical names of several skills, deduplicated, in first-seen order"""
+        names = []
+        for skill in skills:
+            name = self.canonical(skill)
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def intern(self, skill: str) -> int:
+        """Integer id of a skill's canonical name, assigned on first use"""
+        name = self.canonical(skill)
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._add(name)
+        return skill_id
+
+    def encode(self, skills: Iterable[str]) -> List[int]:
+        """Sorted, distinct ids of several skills"""
+        return sorted({self.intern(skill) for skill in skills if normalize_skill(skill)})
+
+    def known_id(self, name: str) -> Optional[int]:
+        """Stable id of a canonical name if it is a dictionary skill, else None"""
+        skill_id = self._ids.get(name)
+        return skill_id if skill_id is not None and skill_id < self.known_count else None
+
+    def name(self, skill_id: int) -> str:
+        return self._names[skill_id]
+
+    def is_known(self, skill: str) -> bool:
+        """Whether a skill resolves to an entry of the canonical dictionary"""
+        skill_id = self._ids.get(self.canonical(skill))
+        return skill_id is not None and skill_id < self.known_count
+
+    def split_text(self, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Split free text into the canonical names of dictionary skills it
+        mentions and the remaining words. Matches whole words and prefers the
+        longest alias at each position.
+        """
+        words = [word.strip('.') for word in normalize_skill(text).split()]
+        found, rest = [], []
+        position = 0
+        while position < len(words):
+            for length in range(min(self._max_term_words, len(words) - position), 0, -1):
+                name = self._aliases.get(' '.join(words[position:position + length]))
+                if name is not None:
+                    if name not in found:
+                        found.append(name)
+                    position += length
+                    break
+            else:
+                rest.append(words[position])
+                position += 1
+        return found, rest
+
+    def find_in_text(self, text: str) -> List[str]:
+        """Canonical names of dictionary skills mentioned in free text"""
+        return self.split_text(text)[0]
+
+
+_default_vocabulary = None
+_default_lock = threading.Lock()
+
+
+def get_skill_vocabulary() -> SkillVocabulary:
+    """Process-wide vocabulary shared by the recommender, ATS scoring and live search"""
+    global _default_vocabulary
+    if _default_vocabulary is None:
+        with _default_lock:
+            if _default_vocabulary is None:
+                _default_vocabulary = SkillVocabulary()
+    return _default_vocabulary
@@ -0,0 +1,239 @@
+"""Offline checks of LiveJobsService deadlines, caching and deduplication, using fake sources (no network)"""
+import os
+import tempfile
+import time
+
+from live_jobs_cache import LiveJobsCache
+from live_jobs_refresher import LiveJobsRefresher
+from job_store import JobStore, canonical_url, stable_job_id
+from live_jobs_service import LiveJobsService, JobSource
+
+
+class FakeSource(JobSource):
+    def __init__(self, name, delay, jobs=3, timeout=1.0, fail=False):
+        super().__init__(timeout)
+        self.name = name
+        self.delay = delay
+        self.jobs = jobs
+        self.fail = fail
+        self.calls = 0
+
+    def search(self, query, location, limit):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("source down")
+        return [{"id": i, "title": f"{self.name} {query} {i}", "company": self.name, "location": location,
+                 "apply_url": f"https://{self.name}.example/{i}", "source": "Live Web", "posted_at": "Recently"}
+                for i in range(self.jobs)]
+
+
+def timed(service, budget=None):
+    started = time.monotonic()
+    jobs = service.search_jobs("Python Intern", "Delhi", limit=10, budget=budget)
+    return jobs, time.monotonic() - started
+
+
+# Sources are queried concurrently and merged round robin
+service = LiveJobsService([FakeSource('a', 0.2), FakeSource('b', 0.2)])
+jobs, elapsed = timed(service)
+assert elapsed < 0.35, elapsed
+assert [job['company'] for job in jobs] == ['a', 'b', 'a', 'b', 'a', 'b'], jobs
+print(f"concurrent: {len(jobs)} jobs in {elapsed:.2f}s")
+
+# A slow source is cut off at its own timeout, the fast one still counts
+service = LiveJobsService([FakeSource('fast', 0.05), FakeSource('slow', 2.0, timeout=0.3)])
+jobs, elapsed = timed(service)
+assert 0.25 < elapsed < 0.5, elapsed
+assert {job['company'] for job in jobs} == {'fast'}, jobs
+assert service.status()['slow']['timeouts'] == 1
+print(f"source timeout: {len(jobs)} jobs in {elapsed:.2f}s")
+
+# The overall budget caps the wait below the sources' timeouts
+service = LiveJobsService([FakeSource('fast', 0.05), FakeSource('slow', 2.0, timeout=5.0)])
+jobs, elapsed = timed(service, budget=0.2)
+assert elapsed < 0.35, elapsed
+assert {job['company'] for job in jobs} == {'fast'}, jobs
+print(f"budget: {len(jobs)} jobs in {elapsed:.2f}s")
+
+# Failing sources are skipped; with nothing left the simulated feed is used
+service = LiveJobsService([FakeSource('down', 0.0, fail=True), FakeSource('ok', 0.0)])
+jobs, _ = timed(service)
+assert {job['company'] for job in jobs} == {'ok'} and service.status()['down']['errors'] == 1
+jobs, _ = timed(LiveJobsService([FakeSource('down', 0.0, fail=True)]))
+assert jobs and all(job['source'] == "Simulated Feed" for job in jobs)
+print("failures: ok")
+
+# Work done between start_search() and results() counts against the budget
+service = LiveJobsService([FakeSource('a', 0.3), FakeSource('b', 5.0, timeout=5.0)])
+started = time.monotonic()
+search = service.start_search("Python Intern", "Delhi")
+time.sleep(0.35)  # e.g. scoring the static catalog
+jobs = search.results(budget=0.4)
+elapsed = time.monotonic() - started
+assert elapsed < 0.5, elapsed
+assert {job['company'] for job in jobs} == {'a'}, jobs
+print(f"overlap: {len(jobs)} jobs in {elapsed:.2f}s")
+
+# Cache shared by two services (as by two workers), in a temporary file
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'live_jobs_cache.db')
+    first, second = FakeSource('a', 0.1), FakeSource('a', 0.1)
+    worker1 = LiveJobsService([first], cache=LiveJobsCache(path, ttl=0.3, negative_ttl=0.3))
+    worker2 = LiveJobsService([second], cache=LiveJobsCache(path, ttl=0.3, negative_ttl=0.3))
+    jobs, _ = timed(worker1)
+    time.sleep(0.05)  # cached once the sources are done
+    cached, elapsed = timed(worker2)
+    assert cached == jobs and second.calls == 0 and elapsed < 0.05, (second.calls, elapsed)
+    print(f"cache hit: {len(cached)} jobs in {elapsed * 1000:.1f}ms")
+
+    # Stale entries are served at once; only one worker refreshes them
+    time.sleep(0.35)
+    stale1, elapsed1 = timed(worker1)
+    stale2, elapsed2 = timed(worker2)
+    assert stale1 == jobs and stale2 == jobs and max(elapsed1, elapsed2) < 0.05
+    time.sleep(0.2)
+    assert first.calls + second.calls == 2, (first.calls, second.calls)
+    # Leases: the first search's and this refresh
+    assert worker1.cache.status()['refreshes'] + worker2.cache.status()['refreshes'] == 2
+    timed(worker2)
+    assert worker2.cache.status()['hits'] == 2
+    print("stale while revalidate: ok")
+
+    # Searches nobody has cached are run by one worker; the other waits for its results
+    cold1, cold2 = FakeSource('a', 0.2), FakeSource('a', 0.2)
+    worker1 = LiveJobsService([cold1], cache=LiveJobsCache(path + '.cold'))
+    worker2 = LiveJobsService([cold2], cache=LiveJobsCache(path + '.cold'))
+    search1 = worker1.start_search("Python Intern", "Delhi", 10)
+    search2 = worker2.start_search("Python Intern", "Delhi", 10)
+    jobs1, jobs2 = search1.results(), search2.results()
+    assert jobs2 == jobs1 and cold1.calls == 1 and cold2.calls == 0, (cold1.calls, cold2.calls)
+    # ...or for its budget, then gets the simulated feed
+    worker1.start_search("Data Intern", "Delhi", 10)
+    started = time.monotonic()
+    jobs = worker2.start_search("Data Intern", "Delhi", 10).results(0.05)
+    elapsed = time.monotonic() - started
+    assert all(job['source'] == "Simulated Feed" for job in jobs) and cold2.calls == 0 and elapsed < 0.15, elapsed
+    print("cold miss lease: ok")
+
+    # Searches that found nothing are cached too, for negative_ttl
+    empty = FakeSource('empty', 0.0, jobs=0)
+    worker = LiveJobsService([empty], cache=LiveJobsCache(path + '.empty', negative_ttl=0.3))
+    timed(worker)
+    time.sleep(0.05)
+    jobs, _ = timed(worker)
+    assert empty.calls == 1 and all(job['source'] == "Simulated Feed" for job in jobs)
+    time.sleep(0.35)
+    timed(worker)
+    time.sleep(0.05)
+    assert empty.calls == 2
+    print("negative cache: ok")
+
+    # ...but not searches no source answered: failed, or cancelled at the budget
+    down = FakeSource('down', 0.0, fail=True)
+    worker = LiveJobsService([down], cache=LiveJobsCache(path + '.down'))
+    timed(worker)
+    time.sleep(0.05)
+    timed(worker)
+    assert down.calls == 2, down.calls
+    busy = FakeSource('busy', 0.3)
+    worker = LiveJobsService([busy], max_workers=1, cache=LiveJobsCache(path + '.busy'))
+    worker.start_search("Other Intern", "Delhi")  # holds the only pool thread
+    jobs, _ = timed(worker, budget=0.05)
+    time.sleep(0.35)
+    assert busy.calls == 1 and all(job['source'] == "Simulated Feed" for job in jobs)
+    jobs, _ = timed(worker)
+    assert busy.calls == 2 and {job['company'] for job in jobs} == {'busy'}, jobs
+    print("no cache without answers: ok")
+
+# The refresher keeps the most popular searches warm, one worker per search
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'live_jobs_cache.db')
+    source, other = FakeSource('r', 0.1, timeout=0.5), FakeSource('r', 0.1, timeout=0.5)
+    service = LiveJobsService([source], cache=LiveJobsCache(path, ttl=1.5))
+    for count, query in [(3, 'popular'), (2, 'common'), (1, 'rare')]:
+        for _ in range(count):
+            service.search_jobs(query, "Delhi")
+    time.sleep(0.8)
+    calls = source.calls
+
+    # Due once they expire within interval + timeout = 0.9s
+    refresher = LiveJobsRefresher(service, top_k=2, interval=0.4, jitter=0.0, concurrency=1)
+    peer = LiveJobsRefresher(LiveJobsService([other], cache=LiveJobsCache(path)), top_k=2, interval=0.4,
+                             jitter=0.0, concurrency=1)
+    plan = refresher.plan()
+    assert [search['query'] for search in plan] == ['popular', 'common'], plan
+    peer_plan = peer.plan()
+    started = time.monotonic()
+    results = refresher.run_once()
+    elapsed = time.monotonic() - started
+    assert [result['outcome'] for result in results] == ['refreshed', 'refreshed'], results
+    assert source.calls == calls + 2 and elapsed >= 0.2, (source.calls, elapsed)  # one at a time
+    # A worker that planned before the refresh leaves the fresh results alone
+    assert [peer._refresh(search)['outcome'] for search in peer_plan] == ['skipped (refreshed by another worker)'] * 2
+    assert other.calls == 0 and refresher.plan() == [] and peer.plan() == []
+    print(f"refresher: top 2 refreshed in {elapsed:.2f}s")
+
+# The job store merges the same posting under different URLs or on different boards
+assert canonical_url('http://in.linkedin.com/jobs/view/python-intern-at-acme-3912345678/?trk=abc&refId=x') == \
+    canonical_url('https://www.linkedin.com/jobs/view/3912345678') == 'https://linkedin.com/jobs/view/3912345678'
+assert canonical_url('https://m.indeed.com/viewjob?jk=ab12&from=serp&vjs=3#apply') == \
+    'https://indeed.com/viewjob?jk=ab12'
+assert stable_job_id('https://www.linkedin.com/jobs/view/3912345678?utm_source=x') == \
+    stable_job_id('https://linkedin.com/jobs/view/3912345678')
+
+
+class BoardSource(FakeSource):
+    def search(self, query, location, limit):
+        self.calls += 1
+        time.sleep(self.delay)
+        snippet = "Acme Analytics is hiring a Python intern in Delhi to build data pipelines for six months"
+        return [{"id": 0, "title": "Python Intern", "company": "Acme", "location": location,
+                 "apply_url": f"https://{self.name}.example/jobs/42?utm_source={self.name}", "source": "Live Web",
+                 "posted_at": "Recently", "snippet": snippet + (" Apply now" if self.name == 'b' else "")},
+                {"id": 1, "title": f"Data Intern at {self.name}", "company": self.name, "location": location,
+                 "apply_url": f"https://{self.name}.example/jobs/7", "source": "Live Web",
+                 "posted_at": "Recently", "snippet": f"{self.name} needs a data intern"}]
+
+
+with tempfile.TemporaryDirectory() as directory:
+    store = JobStore(os.path.join(directory, 'live_jobs.db'))
+    service = LiveJobsService([BoardSource('a', 0.0), BoardSource('b', 0.0)], store=store)
+    jobs, _ = timed(service)
+    assert len(jobs) == 3 and [job['company'] for job in jobs].count('Acme') == 1, jobs
+    assert store.status()['merged_duplicates'] == 1
+    # Apply links are kept as found; boards may need the parameters canonical_url() drops
+    assert jobs[0]['apply_url'] == "https://a.example/jobs/42?utm_source=a", jobs[0]
+    again, _ = timed(LiveJobsService([BoardSource('b', 0.0), BoardSource('a', 0.0)], store=store))
+    assert {job['id']: job for job in again} == {job['id']: job for job in jobs}, again
+    print(f"job store: {len(jobs)} of 4 postings kept, ids stable")
+
+    # With a cache, searches it does not have are served from the store while they are refreshed
+    source = BoardSource('a', 0.3)
+    worker = LiveJobsService([source], cache=LiveJobsCache(os.path.join(directory, 'live_jobs_cache.db')), store=store)
+    stored, elapsed = timed(worker)
+    assert stored == again and elapsed < 0.1, (stored, elapsed)
+    time.sleep(0.4)
+    assert source.calls == 1 and len(worker.cache.get(LiveJobsService.cache_key("Python Intern", "Delhi", 10))[0]) == 2
+    print(f"job store fallback: {len(stored)} jobs in {elapsed * 1000:.1f}ms")
+
+    # Harvested postings are searched locally; the sources only when too few match
+    local_source = BoardSource('c', 0.3)
+    service = LiveJobsService([local_source], store=store)
+    started = time.monotonic()
+    jobs = service.find_jobs("python pipelines", "Delhi", min_local=1)
+    elapsed = time.monotonic() - started
+    assert [job['company'] for job in jobs] == ['Acme'] and local_source.calls == 0 and elapsed < 0.05, elapsed
+    assert service.find_jobs("data intern", "Mumbai", min_local=1) and local_source.calls == 1
+    jobs = service.find_jobs("data intern", "Delhi", min_local=4)
+    assert {job['title'] for job in jobs} == {"Python Intern", "Data Intern at a", "Data Intern at b",
+                                              "Data Intern at c"}, jobs
+    assert local_source.calls == 2 and service.status()['local index'] == {'answered': 1, 'fallbacks': 2}
+    # Offline, local matches are served rather than the simulated feed ("c" was first found in Mumbai)
+    offline = LiveJobsService([FakeSource('down', 0.0, fail=True)], store=store)
+    offline_jobs = offline.find_jobs("data intern", "Delhi", min_local=10)
+    assert {job['title'] for job in offline_jobs} == {"Python Intern", "Data Intern at a", "Data Intern at b"}, \
+        offline_jobs
+    print(f"local search: 1 job in {elapsed * 1000:.1f}ms")
+
+print("All live job checks passed")
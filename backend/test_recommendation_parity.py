@@ -0,0 +1,124 @@
+"""
+Offline checks that the pruned, vectorized ranking returns exactly what the
+scalar _calculate_similarity_score() formula gives by scoring every posting,
+on a seeded messy catalog (no server, no network)
+"""
+import json
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from recommendation_engine import RecommendationEngine
+
+rng = random.Random(1234)
+
+SKILLS = ['Python', 'python', 'PYTHON', 'ML', 'machine learning', 'Machine-Learning', 'SQL', 'sql ',
+          'MS Excel', 'excel', 'Social Media', 'social-media', 'Java', 'Data Analysis', 'communication',
+          'Content Writing', 'Research', 'Design'] + [f'Skill {i}' for i in range(40)]
+SECTORS = ['Technology', 'technology', 'TECHNOLOGY', 'Healthcare and Public Health', 'healthcare',
+           'Finance and Banking', 'Rural Development', 'Arts and Culture', 'Education', '', None]
+LOCATIONS = ['New Delhi', 'new delhi', 'Delhi', 'Delhi NCR', ' Mumbai ', 'Mumbai', 'Navi Mumbai',
+             'Bengaluru', 'Bangalore', 'Pune', 'Chennai', 'Remote', '', None] + [f'Town {i}' for i in range(15)]
+EDUCATION = ['Undergraduate', 'undergraduate', 'Graduate', 'Postgraduate', 'Any', 'Diploma', '', None]
+
+
+def posting(i):
+    skills = rng.sample(SKILLS, rng.choice([0, 0, 1, 2, 3, 5]))
+    if skills and rng.random() < 0.2:
+        skills.append(skills[0].upper())  # duplicate under another spelling
+    return {'id': i, 'title': f'Intern {i}', 'organization': f'Org {i % 37}',
+            'sector': rng.choice(SECTORS), 'location': rng.choice(LOCATIONS),
+            'remote_available': rng.random() < 0.15, 'required_education': rng.choice(EDUCATION),
+            'required_skills': skills, 'experience_required': rng.random() < 0.3}
+
+
+def candidate():
+    skills = rng.sample(SKILLS, rng.choice([0, 1, 2, 4, 6]))
+    skills += [skill.upper() for skill in skills if rng.random() < 0.3]
+    return {'education': rng.choice(EDUCATION[:-1]), 'skills': skills,
+            'interests': rng.sample(['technology', 'Tech', 'health care', 'FINANCE', 'arts', 'data'],
+                                    rng.choice([0, 1, 2])),
+            'location': rng.choice(LOCATIONS[:-1] + ['delhi', 'MUMBAI', 'Mumbai Suburban']),
+            'previous_experience': rng.random() < 0.5}
+
+
+internships = [posting(i) for i in range(1500)]
+# Runs of identical postings put many equal scores at the top N cut, where
+# only the row order decides
+for start in range(0, 1500, 250):
+    for i in range(start + 1, start + 8):
+        internships[i] = dict(internships[start], id=i, title=f'Intern {i}')
+
+
+def exhaustive(engine, profile, top_n):
+    """(id, match_score) of the top N by the scalar formula and a stable sort of every posting"""
+    scored = [(round(engine._calculate_similarity_score(profile, internship) * 100, 1), internship['id'])
+              for internship in internships]
+    scored.sort(key=lambda pair: -pair[0])
+    return [(id_, score) for score, id_ in scored[:top_n]]
+
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'internships.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(internships, f)
+    engine = RecommendationEngine(path, use_artifact=False, use_journal=False)
+    engine.reload_check_interval = 0
+    engine.cache.max_entries = 0
+    catalog = engine.catalog
+    assert catalog.size == len(internships)
+
+    profiles = [candidate() for _ in range(150)]
+    pruned = 0
+    for n, profile in enumerate(profiles):
+        top_n = (1, 5, 10, 50)[n % 4]
+        expected = exhaustive(engine, profile, top_n)
+
+        # Exhaustive vectorized scoring matches the scalar formula per posting
+        features = engine._candidate_features(profile, catalog)
+        scores = engine._score_catalog(features, catalog)
+        reference = [engine._calculate_similarity_score(profile, internship) for internship in internships]
+        assert np.array_equal(scores, reference), profile
+        assert [(internships[row]['id'], score) for row, score in
+                engine._top_rows(scores, np.arange(catalog.size), top_n)] == expected, (profile, top_n)
+
+        # Pruned candidates (forced even when the engine would score everything) lose nothing
+        rows = engine._candidate_rows(features, catalog, top_n)
+        if rows is None:
+            engine.CANDIDATE_PRUNING_MAX_FRACTION = 1.01
+            rows = engine._candidate_rows(features, catalog, top_n)
+            del engine.CANDIDATE_PRUNING_MAX_FRACTION
+        else:
+            pruned += 1
+        assert np.all(np.diff(rows) > 0)
+        assert [(internships[row]['id'], score) for row, score in
+                engine._top_rows(engine._score_catalog(features, catalog, rows), rows, top_n)] == expected, \
+            (profile, top_n)
+
+        # And so does recommend(), whichever path it takes
+        assert [(r['id'], r['match_score']) for r in engine.recommend(profile, top_n)] == expected, (profile, top_n)
+    print(f"parity: {len(profiles)} profiles, {pruned} pruned by the engine itself, "
+          f"all equal to exhaustive scoring")
+
+    # Ties at the cut: identical postings rank by catalog order
+    profile = dict(candidate(), skills=internships[0]['required_skills'])
+    expected = exhaustive(engine, profile, 50)
+    assert len({score for _, score in expected}) < len(expected)
+    assert [(r['id'], r['match_score']) for r in engine.recommend(profile, 50)] == expected
+    print(f"ties: {len(expected) - len({score for _, score in expected})} tied scores in the top 50 kept in row order")
+
+# Raw scores a hair apart that round to the same percentage, or straddle a
+# rounding boundary, around the top N cut
+generator = np.random.default_rng(1234)
+for trial in range(300):
+    size, top_n = int(generator.integers(1, 400)), int(generator.integers(1, 60))
+    scores = generator.integers(600, 620, size) / 1000 + generator.uniform(-0.0006, 0.0006, size)
+    expected = sorted(range(size), key=lambda row: -round(scores[row] * 100, 1))[:top_n]
+    top = RecommendationEngine._top_rows(scores, np.arange(size), top_n)
+    assert [row for row, _ in top] == expected, (trial, size, top_n)
+    assert [score for _, score in top] == [round(scores[row] * 100, 1) for row in expected]
+print("rounding band: top N equal to a stable sort of all rounded scores")
+
+print("All recommendation parity checks passed")